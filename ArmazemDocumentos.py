@@ -0,0 +1,397 @@
+########## ArmazemDocumentos.py ##########
+import json
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+from functools import lru_cache
+from Tokenizador import Tokenizador
+
+
+class ArmazemDocumentos(Mapping):
+    """
+    A classe ArmazemDocumentos é o armazém dos atributos das páginas indexadas (título, subtítulos, links, parágrafos, imagens, listas e tabelas), separado do índice invertido e aberto com `mmap`.
+
+    Os atributos de cada página formam um registro JSON comprimido com zlib. O arquivo tem um cabeçalho, uma tabela de offsets das URLs, uma tabela de offsets dos registros, as URLs e os registros. As URLs são ordenadas pelos seus bytes UTF-8, e o identificador de um documento é a sua posição nessa ordem, de modo que uma URL é localizada por busca binária, sem carregar um dicionário de URLs na memória. Abrir o armazém não lê nenhum registro: cada registro é lido e descomprimido apenas quando é pedido, para exibir um resultado ou o seu trecho. O ranqueamento do `Buscador` nunca abre o armazém.
+
+    A classe se comporta como um dicionário somente leitura: `armazem[url]` devolve os atributos da página, no formato `{atributo: [textos]}`.
+
+    Atributos:
+    \n\t`caminho (str)`: O arquivo do armazém.
+    \n\t`n_documentos (int)`: O número de documentos do armazém.
+
+    Métodos:
+    \n\t`arquivo(index_file) -> str`: Devolve o caminho do armazém associado a um índice.
+    \n\t`comprimir(objeto, params=None, nivel=6) -> bytes`: Extrai e comprime os atributos de uma página (objeto Url).
+    \n\t`escrever(arquivo, registros, acrescentar=False, remover=()) -> None`: Grava os registros comprimidos de várias páginas.
+    \n\t`url(doc_id) -> str`: Devolve a URL de um identificador de documento.
+    \n\t`doc_id(url) -> int or None`: Localiza o identificador de documento de uma URL.
+    \n\t`documento(doc_id) -> dict`: Lê e descomprime os atributos de um documento.
+    \n\t`trecho(url, query, tamanho=200) -> str or None`: Devolve o trecho da página que melhor corresponde a uma consulta.
+    \n\t`estatisticas() -> dict`: Devolve o número de documentos e o tamanho médio, em bytes, de um registro.
+    \n\t`fechar() -> None`: Libera o mapeamento de memória e fecha o arquivo.
+
+    Exemplo:
+    >>> indexer.add_attr_inverted_index(['page', 'paragrafos'])
+    >>> indexer.save_index()
+    >>> armazem = ArmazemDocumentos(ArmazemDocumentos.arquivo("index-Root"))
+    >>> armazem["https://www.ifmg.edu.br"]["page"]
+    ['IFMG - Instituto Federal de Minas Gerais']
+    >>> armazem.trecho("https://www.ifmg.edu.br", "processo seletivo", 60)
+    '...inscrições para o processo seletivo 2024 estão abertas...'
+    """
+
+    VERSAO = 1
+    MAGICO = b'SRIA'
+    ATRIBUTOS = ('page', 'titles', 'links', 'paragrafos',
+                 'imagens', 'listas', 'tabelas')
+    # Os atributos em que os trechos são procurados, na ordem de preferência
+    ATRIBUTOS_TRECHO = ('paragrafos', 'titles', 'listas', 'tabelas', 'page')
+
+    # magico, versao, quantidade
+    CABECALHO = struct.Struct('<4sII')
+    OFFSET = struct.Struct('<Q')
+
+    ARQUIVO = 'armazem.bin'
+
+    # O número de URLs decodificadas mantidas em cache por `url`
+    CACHE_URLS = 4096
+
+    def __init__(self, caminho) -> None:
+        """
+        O construtor da classe ArmazemDocumentos.
+
+        Este método abre o arquivo, mapeia-o em memória e valida o cabeçalho. Nenhum registro é lido neste momento.
+
+        Parâmetros:
+        \n\t`caminho (str)`: O arquivo do armazém (veja `arquivo`).
+
+        Retorno:
+        \n\t`None`
+        """
+        self.caminho = caminho
+        self._file = open(caminho, 'rb')
+        self._dados = b''
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._dados = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._dados) < self.CABECALHO.size:
+            self.fechar()
+            raise ValueError(f"Armazém de documentos inválido: {caminho}")
+        assinatura, versao, quantidade = self.CABECALHO.unpack_from(
+            self._dados, 0)
+        if assinatura != self.MAGICO:
+            self.fechar()
+            raise ValueError(f"Armazém de documentos inválido: {caminho}")
+        if versao != self.VERSAO:
+            self.fechar()
+            raise ValueError(
+                f"Versão de armazém {versao} não suportada: {caminho}")
+        self.n_documentos = quantidade
+        self._offsets_urls = self.CABECALHO.size
+        self._offsets_registros = self._offsets_urls + \
+            (quantidade + 1) * self.OFFSET.size
+        self._inicio_urls = self._offsets_registros + \
+            (quantidade + 1) * self.OFFSET.size
+        self._inicio_registros = self._inicio_urls + \
+            self._intervalo(self._offsets_urls, quantidade)[0]
+        self._urls = lru_cache(maxsize=self.CACHE_URLS)(self._decodificar_url)
+
+    @staticmethod
+    def arquivo(index_file) -> str:
+        """
+        Devolve o caminho do armazém de documentos associado a um índice.
+
+        Para um índice em diretório (binário, segmentado ou em shards), o armazém fica no arquivo `armazem.bin` dentro do diretório. Para um índice JSON, ele fica ao lado do arquivo, com a extensão `.armazem.bin`.
+
+        Parâmetros:
+        \n\t`index_file (str)`: O diretório do índice ou o arquivo do índice JSON.
+
+        Retorno:
+        \n\t`str`: O caminho do armazém.
+        """
+        if index_file.endswith('.json'):
+            return os.path.splitext(index_file)[0] + '.' + ArmazemDocumentos.ARQUIVO
+        return os.path.join(index_file, ArmazemDocumentos.ARQUIVO)
+
+    @staticmethod
+    def comprimir(objeto, params=None, nivel=6) -> bytes:
+        """
+        Extrai os atributos de uma página e os comprime em um registro.
+
+        Cada atributo é guardado como uma lista de textos: um texto isolado (o título) vira uma lista com um elemento, e os atributos ausentes (None) são omitidos.
+
+        Parâmetros:
+        \n\t`objeto (Url)`: A página.
+        \n\t`params (iterable or None)`: Os atributos a guardar. Se None, guarda todos os atributos (veja `ATRIBUTOS`).
+        \n\t`nivel (int)`: O nível de compressão do zlib, de 1 (mais rápido) a 9 (menor). O valor padrão é 6.
+
+        Retorno:
+        \n\t`bytes`: O registro comprimido.
+        """
+        atributos = {}
+        for attr in ArmazemDocumentos.ATRIBUTOS if params is None else params:
+            attribute = getattr(objeto, attr, None)
+            if attribute is not None:
+                if isinstance(attribute, str):
+                    attribute = [attribute]
+                atributos[attr] = list(attribute)
+        return zlib.compress(json.dumps(atributos, ensure_ascii=False).encode('utf-8'), nivel)
+
+    @staticmethod
+    def escrever(arquivo, registros, acrescentar=False, remover=()) -> None:
+        """
+        Grava os registros comprimidos de várias páginas em um armazém.
+
+        O arquivo é gravado com um nome temporário e renomeado ao final, de modo que um armazém aberto por outro processo continua lendo o arquivo antigo.
+
+        Parâmetros:
+        \n\t`arquivo (str)`: O arquivo do armazém.
+        \n\t`registros (dict)`: Um dicionário `{url: registro}`, com os registros criados por `comprimir`.
+        \n\t`acrescentar (bool)`: Se True, os registros de um armazém existente no mesmo arquivo são mantidos, exceto os das URLs de `registros`, que são substituídos. Os registros mantidos são copiados sem ser descomprimidos. O valor padrão é False.
+        \n\t`remover (iterable)`: As URLs cujos registros no armazém existente são descartados, como as páginas removidas do índice. Os registros dessas URLs presentes em `registros` são gravados normalmente. O valor padrão é uma tupla vazia.
+
+        Retorno:
+        \n\t`None`
+        """
+        anterior = None
+        if acrescentar and os.path.exists(arquivo):
+            anterior = ArmazemDocumentos(arquivo)
+        try:
+            # (url, registro novo) ou (url, doc_id no armazém anterior)
+            documentos = [(url.encode('utf-8'), registro)
+                          for url, registro in registros.items()]
+            if anterior is not None:
+                remover = set(remover)
+                documentos.extend(
+                    (url.encode('utf-8'), doc_id) for doc_id, url in enumerate(anterior)
+                    if url not in registros and url not in remover)
+            documentos.sort(key=lambda documento: documento[0])
+
+            diretorio = os.path.dirname(arquivo)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            with open(arquivo + '.tmp', 'wb') as file:
+                file.write(ArmazemDocumentos.CABECALHO.pack(
+                    ArmazemDocumentos.MAGICO, ArmazemDocumentos.VERSAO, len(documentos)))
+                offset = 0
+                file.write(ArmazemDocumentos.OFFSET.pack(offset))
+                for url, _ in documentos:
+                    offset += len(url)
+                    file.write(ArmazemDocumentos.OFFSET.pack(offset))
+                tamanhos = [len(registro) if isinstance(registro, bytes)
+                            else anterior._tamanho(registro)
+                            for _, registro in documentos]
+                offset = 0
+                file.write(ArmazemDocumentos.OFFSET.pack(offset))
+                for tamanho in tamanhos:
+                    offset += tamanho
+                    file.write(ArmazemDocumentos.OFFSET.pack(offset))
+                for url, _ in documentos:
+                    file.write(url)
+                for _, registro in documentos:
+                    if not isinstance(registro, bytes):
+                        registro = anterior._registro(registro)
+                    file.write(registro)
+        finally:
+            if anterior is not None:
+                anterior.fechar()
+        os.replace(arquivo + '.tmp', arquivo)
+
+    def _intervalo(self, tabela, doc_id) -> tuple:
+        """
+        Lê os offsets de início e de fim de um documento em uma das tabelas de offsets.
+
+        Parâmetros:
+        \n\t`tabela (int)`: A posição da tabela no arquivo.
+        \n\t`doc_id (int)`: O identificador do documento.
+
+        Retorno:
+        \n\t`tuple`: Os offsets `(inicio, fim)`, relativos ao início das URLs ou dos registros.
+        """
+        return struct.unpack_from('<QQ', self._dados, tabela + doc_id * self.OFFSET.size)
+
+    def _url_bytes(self, doc_id) -> bytes:
+        inicio, fim = self._intervalo(self._offsets_urls, doc_id)
+        return self._dados[self._inicio_urls + inicio:self._inicio_urls + fim]
+
+    def _decodificar_url(self, doc_id) -> str:
+        return self._url_bytes(doc_id).decode('utf-8')
+
+    def _registro(self, doc_id) -> bytes:
+        inicio, fim = self._intervalo(self._offsets_registros, doc_id)
+        return self._dados[self._inicio_registros + inicio:self._inicio_registros + fim]
+
+    def _tamanho(self, doc_id) -> int:
+        inicio, fim = self._intervalo(self._offsets_registros, doc_id)
+        return fim - inicio
+
+    def url(self, doc_id) -> str:
+        """
+        Devolve a URL associada a um identificador de documento. As últimas `CACHE_URLS` URLs decodificadas são mantidas em um cache LRU.
+
+        Parâmetros:
+        \n\t`doc_id (int)`: O identificador do documento.
+
+        Retorno:
+        \n\t`str`: A URL do documento.
+        """
+        if not 0 <= doc_id < self.n_documentos:
+            raise IndexError(f"Documento inexistente: {doc_id}")
+        return self._urls(doc_id)
+
+    def doc_id(self, url):
+        """
+        Localiza o identificador de documento de uma URL por busca binária.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL procurada.
+
+        Retorno:
+        \n\t`int or None`: O identificador do documento, ou None se a URL não estiver no armazém.
+        """
+        if not isinstance(url, str):
+            return None
+        chave = url.encode('utf-8')
+        inicio, fim = 0, self.n_documentos
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            atual = self._url_bytes(meio)
+            if atual < chave:
+                inicio = meio + 1
+            elif atual > chave:
+                fim = meio
+            else:
+                return meio
+        return None
+
+    def documento(self, doc_id) -> dict:
+        """
+        Lê e descomprime os atributos de um documento.
+
+        Parâmetros:
+        \n\t`doc_id (int)`: O identificador do documento.
+
+        Retorno:
+        \n\t`dict`: Os atributos do documento, no formato `{atributo: [textos]}`.
+        """
+        if not 0 <= doc_id < self.n_documentos:
+            raise IndexError(f"Documento inexistente: {doc_id}")
+        return json.loads(zlib.decompress(self._registro(doc_id)).decode('utf-8'))
+
+    def trecho(self, url, query, tamanho=200):
+        """
+        Devolve o trecho da página que melhor corresponde a uma consulta, para exibir com o resultado.
+
+        Os textos da página são percorridos na ordem de `ATRIBUTOS_TRECHO`, e é escolhido o primeiro texto com o maior número de tokens distintos da consulta (sem as stop words, normalizados como no `Tokenizador`). O trecho começa pouco antes da primeira ocorrência de um desses tokens e é cortado em um limite de palavra. Se nenhum texto contiver a consulta, o trecho é o início do primeiro texto.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página.
+        \n\t`query (str)`: A consulta.
+        \n\t`tamanho (int)`: O número máximo de caracteres do trecho, sem as reticências. O valor padrão é 200.
+
+        Retorno:
+        \n\t`str or None`: O trecho, uma string vazia se a página não tiver textos, ou None se a URL não estiver no armazém.
+        """
+        doc_id = self.doc_id(url)
+        if doc_id is None:
+            return None
+        atributos = self.documento(doc_id)
+        termos = set(Tokenizador.tokens(query))
+        termos = termos - Tokenizador.STOP_WORDS or termos
+        normalizar = Tokenizador.normalizar
+
+        melhor, melhor_inicio, melhor_termos = None, 0, -1
+        for attr in self.ATRIBUTOS_TRECHO:
+            for texto in atributos.get(attr, ()):
+                texto = ' '.join(texto.split())
+                if not texto:
+                    continue
+                encontrados, primeiro = set(), None
+                for ocorrencia in Tokenizador.PADRAO.finditer(texto):
+                    token = normalizar(ocorrencia.group())
+                    if token in termos:
+                        encontrados.add(token)
+                        if primeiro is None:
+                            primeiro = ocorrencia.start()
+                if len(encontrados) > melhor_termos:
+                    melhor, melhor_inicio, melhor_termos = texto, primeiro or 0, len(
+                        encontrados)
+                    if melhor_termos == len(termos):
+                        break
+            if melhor_termos == len(termos):
+                break
+        if melhor is None:
+            return ''
+
+        inicio = max(0, melhor_inicio - tamanho // 4)
+        if inicio > 0:
+            espaco = melhor.find(' ', inicio, melhor_inicio)
+            inicio = melhor_inicio if espaco < 0 else espaco + 1
+        fim = inicio + tamanho
+        if fim < len(melhor):
+            espaco = melhor.rfind(' ', inicio, fim + 1)
+            if espaco > inicio:
+                fim = espaco
+        trecho = melhor[inicio:fim].strip()
+        if inicio > 0:
+            trecho = '...' + trecho
+        if fim < len(melhor):
+            trecho += '...'
+        return trecho
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve o tamanho do armazém, sem descomprimir os registros.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: O número de documentos (`documentos`), os bytes dos registros comprimidos (`bytes_registros`) e o tamanho médio de um registro (`bytes_por_documento`).
+        """
+        total = self._intervalo(self._offsets_registros, self.n_documentos)[
+            0] if self.n_documentos else 0
+        return {
+            'documentos': self.n_documentos,
+            'bytes_registros': total,
+            'bytes_por_documento': round(total / self.n_documentos, 2) if self.n_documentos else 0.0,
+        }
+
+    def __getitem__(self, url) -> dict:
+        doc_id = self.doc_id(url)
+        if doc_id is None:
+            raise KeyError(url)
+        return self.documento(doc_id)
+
+    def __contains__(self, url) -> bool:
+        return self.doc_id(url) is not None
+
+    def __iter__(self):
+        for doc_id in range(self.n_documentos):
+            yield self.url(doc_id)
+
+    def __len__(self) -> int:
+        return self.n_documentos
+
+    def fechar(self) -> None:
+        """
+        Libera o mapeamento de memória e fecha o arquivo do armazém.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if isinstance(self._dados, mmap.mmap):
+            self._dados.close()
+        self._dados = b''
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.fechar()
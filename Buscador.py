@@ -1,7 +1,25 @@
 ########## Buscador.py ##########
+import heapq
 import json
-import nltk
+import multiprocessing
+import os
+import threading
+from ArmazemDocumentos import ArmazemDocumentos
+from CacheConsultas import CacheConsultas
 from Expressoes import Expressoes
+from IndiceBinario import IndiceBinario, galopar, limite_superior
+from IndiceSegmentado import IndiceSegmentado
+from IndiceKgram import IndiceKgram
+from Metricas import METRICAS
+from Tokenizador import Tokenizador
+
+
+class ConsultaNaoSuportada(ValueError):
+    """
+    A exceção ConsultaNaoSuportada indica uma consulta que o índice aberto não pode responder, como uma consulta por frase em um índice sem posições, ou um modo de consulta desconhecido.
+
+    Ela é um erro de quem faz a consulta, e não do índice: o `ServidorBusca` a responde com o status 400, e os demais erros, com o status 500.
+    """
 
 
 class Buscador:
@@ -9,13 +27,32 @@ class Buscador:
     A classe Buscador realiza buscas em um índice invertido.
 
     Atributos:
-    \n\t`inverted_index (dict)`: O índice invertido onde a busca será realizada.
+    \n\t`index_file (str)`: O arquivo JSON ou o diretório binário de onde o índice foi carregado.
+    \n\t`inverted_index (dict, IndiceBinario or IndiceSegmentado)`: O índice invertido onde a busca será realizada.
+    \n\t`limites (dict)`: Os limites superiores de pontuação calculados para índices JSON.
+    \n\t`kgramas (IndiceKgram or None)`: O índice de k-gramas do vocabulário, usado por `deep_search` e `width_search`.
+    \n\t`matriz (MatrizCSR or None)`: A matriz termo×documento usada por `rank_csr`.
+    \n\t`cache (CacheConsultas or None)`: O cache LRU dos resultados das consultas, invalidado quando o índice muda.
+    \n\t`posicoes (dict or None)`: As posições dos termos de um índice JSON, carregadas na primeira consulta por frase.
+    \n\t`armazem (ArmazemDocumentos or None)`: O armazém dos atributos das páginas, aberto na primeira chamada a `documento` ou `trecho` e nunca usado no ranqueamento.
 
     Métodos:
-    \n\t`__init__(self, index_file: str)`: Inicializa um objeto Buscador com o índice invertido contido no arquivo especificado.
+    \n\t`__init__(self, index_file: str, cache=True)`: Inicializa um objeto Buscador com o índice invertido contido no arquivo (JSON) ou diretório (binário) especificado.
     \n\t`deep_search(self, query: str) -> set`: Realiza uma busca em profundidade no índice invertido.
     \n\t`width_search(self, query: str) -> set`: Realiza uma busca em largura no índice invertido.
-    \n\t`rank(self, query: str) -> list`: Realiza um ranqueamento dos documentos com base na consulta de pesquisa.
+    \n\t`indice_kgram(self) -> IndiceKgram`: Devolve o índice de k-gramas do vocabulário, construindo-o na primeira chamada.
+    \n\t`rank(self, query: str, k: int = 10, modo: str = 'ou') -> list`: Realiza um ranqueamento dos documentos que contêm algum dos tokens da consulta ('ou'), todos eles ('e') ou a frase ('frase') e devolve os k melhores.
+    \n\t`rank_many(self, queries: list, k: int = 10, workers: int = None) -> list`: Ranqueia um lote de consultas, obtendo os postings de cada token uma única vez e, opcionalmente, em vários processos.
+    \n\t`rank_csr(self, query: str, k: int = 10, cosseno: bool = False) -> list`: Realiza o ranqueamento com um produto esparso vetorizado sobre a matriz CSR do índice.
+    \n\t`matriz_csr(self) -> MatrizCSR`: Devolve a matriz CSR do índice, carregando-a ou construindo-a na primeira chamada.
+    \n\t`armazem_documentos(self) -> ArmazemDocumentos or None`: Devolve o armazém dos atributos das páginas, abrindo-o na primeira chamada.
+    \n\t`documento(self, url: str) -> dict or None`: Devolve os atributos de uma página do resultado.
+    \n\t`trecho(self, url: str, query: str, tamanho: int = 200) -> str or None`: Devolve o trecho de uma página do resultado que melhor corresponde à consulta.
+    \n\t`limite(self, token: str, postings: dict = None) -> float`: Devolve o limite superior de pontuação de um token.
+    \n\t`versao_indice(self) -> tuple`: Devolve a versão do arquivo do índice, usada para invalidar o cache.
+    \n\t`versao_arquivo(index_file) -> tuple`: Devolve a versão de um índice no disco, sem abri-lo.
+    \n\t`arquivo_posicoes(index_file) -> str`: Devolve o caminho do arquivo de posições associado a um índice.
+    \n\t`estatisticas_cache(self) -> dict`: Devolve as estatísticas de acertos e falhas do cache.
 
     Exemplo de uso:
     \n\tbuscador = Buscador("index_file.json")
@@ -23,26 +60,69 @@ class Buscador:
     \n\tprint(result)
     """
 
-    def __init__(self, index_file) -> None:
+    MODOS = ('ou', 'e', 'frase')
+
+    def __init__(self, index_file, cache=True) -> None:
         """
         O construtor da classe Buscador.
 
-        Este método é chamado automaticamente quando um objeto da classe Buscador é criado. Ele inicializa o índice invertido que é carregado de um arquivo JSON.
+        Este método é chamado automaticamente quando um objeto da classe Buscador é criado. Se `index_file` for um diretório, ele abre o índice binário com `mmap` (veja `IndiceBinario`) e apenas os postings consultados são decodificados. Se o diretório tiver um manifesto de segmentos, ele abre o índice segmentado (veja `IndiceSegmentado`), e as buscas consideram todos os segmentos vivos, com as estatísticas globais de cada termo. Caso contrário, o índice invertido é carregado de um arquivo JSON.
+
+        Os resultados de `rank`, `rank_csr`, `deep_search` e `width_search` são guardados em um cache LRU (veja `CacheConsultas`), indexado pelos tokens normalizados da consulta e pelo modo de busca. O cache é esvaziado automaticamente quando o arquivo do índice muda, e o índice é reaberto antes da consulta seguinte (veja `_em_cache`).
+
+        Parâmetros:
+        \n\t`index_file (str)`: O nome do arquivo JSON ou do diretório binário que contém o índice invertido.
+        \n\t`cache (bool or CacheConsultas)`: True para usar um cache com os limites padrão, False para desativá-lo, ou um objeto `CacheConsultas`. O valor padrão é True.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.index_file = index_file
+        self._trava = threading.Lock()
+        self._abrir()
+        if cache is True:
+            cache = CacheConsultas()
+        elif cache is False:
+            cache = None
+        self.cache = cache
+
+    def _abrir(self) -> None:
+        """
+        Abre (ou reabre) o índice de `index_file` e descarta as estruturas construídas a partir do índice anterior: os limites, as posições, o índice de k-gramas, a matriz CSR e o armazém de documentos.
+
+        O índice novo é aberto antes de substituir o anterior, e o índice e o armazém anteriores não são fechados: as consultas em andamento em outras threads continuam lendo os seus mapeamentos de memória, que são liberados pelo coletor de lixo quando a última consulta termina.
 
         Parâmetros:
-        \n\t`index_file (str)`: O nome do arquivo JSON que contém o índice invertido.
+        \n\t`None`
 
         Retorno:
         \n\t`None`
         """
-        with open(index_file, 'r') as file:
-            self.inverted_index = json.load(file)
+        index_file = self.index_file
+        # A versão é lida antes de abrir, de modo que uma gravação durante a abertura provoca uma nova reabertura
+        versao = self.versao_indice()
+        if IndiceSegmentado.eh_segmentado(index_file):
+            indice = IndiceSegmentado(index_file, compactacao_automatica=False)
+        elif os.path.isdir(index_file):
+            indice = IndiceBinario(index_file)
+        else:
+            with open(index_file, 'r') as file:
+                indice = json.load(file)
+        # As estruturas derivadas são descartadas antes da troca, de modo que nenhuma consulta as combina com o índice novo
+        self.limites = {}
+        self.posicoes = None
+        self.kgramas = None
+        self.matriz = None
+        self.armazem = None
+        self._versao_estruturas = None
+        self.inverted_index = indice
+        self._versao_aberta = versao
 
     def deep_search(self, query) -> set:
         """
         Realiza uma pesquisa em profundidade no índice invertido.
 
-        Este método tokeniza a consulta de pesquisa e, para cada token na consulta de pesquisa, percorre todas as chaves no índice invertido. Se o token estiver na chave, ele percorre todos os itens na lista de valores da chave e adiciona o item ao conjunto de links relevantes.
+        Este método tokeniza a consulta de pesquisa e, para cada token na consulta de pesquisa, localiza pelo índice de k-gramas a primeira chave (na ordem de inserção do índice invertido, também no índice binário) que contém o token. Em seguida, ele adiciona todos os itens da lista de valores dessa chave ao conjunto de links relevantes.
 
         Parâmetros:
         \n\t`query (str)`: A consulta de pesquisa.
@@ -50,21 +130,27 @@ class Buscador:
         Retorno:
         \n\t`set`: Um conjunto de links relevantes para a consulta de pesquisa.
         """
-        query_tokens = nltk.word_tokenize(query)
+        query_tokens = Tokenizador.tokens(query)
+        chave = ('deep_search', normalizar(query_tokens))
+        relevant_links = self._em_cache(chave)
+        if relevant_links is not None:
+            return relevant_links
+
+        indice = self.inverted_index
+        kgramas = self.indice_kgram()
         relevant_links = set()
         for token in query_tokens:
-            for chave in self.inverted_index.keys():
-                if token in chave:
-                    for item in self.inverted_index[chave].keys():
-                        relevant_links.add(item)
-                    break
-        return relevant_links
+            termo_id = kgramas.primeiro(token)
+            if termo_id is not None:
+                for item in indice.get(kgramas.termos[termo_id], {}).keys():
+                    relevant_links.add(item)
+        return self._guardar(chave, relevant_links)
 
     def width_search(self, query) -> set:
         """
         Realiza uma pesquisa em largura no índice invertido.
 
-        Este método tokeniza a consulta de pesquisa e, para cada chave no índice invertido, percorre todos os tokens na consulta de pesquisa. Se o token estiver na chave, ele percorre todos os itens na lista de valores da chave e adiciona o item ao conjunto de links relevantes.
+        Este método tokeniza a consulta de pesquisa e, para cada token na consulta de pesquisa, localiza pelo índice de k-gramas todas as chaves que contêm o token. Em seguida, ele adiciona todos os itens da lista de valores dessas chaves ao conjunto de links relevantes.
 
         Parâmetros:
         \n\t`query (str)`: A consulta de pesquisa.
@@ -72,44 +158,745 @@ class Buscador:
         Retorno:
         \n\t`set`: Um conjunto de links relevantes para a consulta de pesquisa.
         """
-        query_tokens = nltk.word_tokenize(query)
+        query_tokens = Tokenizador.tokens(query)
+        chave = ('width_search', normalizar(query_tokens))
+        relevant_links = self._em_cache(chave)
+        if relevant_links is not None:
+            return relevant_links
+
+        indice = self.inverted_index
+        kgramas = self.indice_kgram()
+        termos = set()
+        for token in query_tokens:
+            termos.update(kgramas.candidatos(token))
         relevant_links = set()
-        for chave in self.inverted_index.keys():
-            for token in query_tokens:
-                if token in chave:
-                    for item in self.inverted_index[chave].keys():
-                        relevant_links.add(item)
-                    break
-        return relevant_links
+        for termo_id in termos:
+            for item in indice.get(kgramas.termos[termo_id], {}).keys():
+                relevant_links.add(item)
+        return self._guardar(chave, relevant_links)
+
+    def indice_kgram(self) -> IndiceKgram:
+        """
+        Devolve o índice de k-gramas do vocabulário, construindo-o na primeira chamada.
 
-    def rank(self, query) -> set:
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`IndiceKgram`: O índice de k-gramas sobre as chaves do índice invertido.
         """
-        Realiza um ranqueamento dos documentos com base na consulta de pesquisa.
+        self._validar_estruturas()
+        kgramas = self.kgramas
+        if kgramas is None:
+            indice = self.inverted_index
+            # O dicionário do índice binário é ordenado: os termos são listados na ordem do índice original
+            termos = indice.ordem_original() if isinstance(
+                indice, IndiceBinario) else indice.keys()
+            kgramas = self.kgramas = IndiceKgram(termos)
+        return kgramas
+
+    def rank(self, query, k=10, modo='ou') -> list:
+        """
+        Realiza um ranqueamento dos documentos com base na consulta de pesquisa e devolve os k melhores.
+
+        Este método tokeniza a consulta de pesquisa com a mesma normalização usada pelo `Indexador` (veja `Tokenizador.tokens`) e busca diretamente no índice invertido apenas os tokens da consulta. Para cada URL associada a um token, ele obtém a frequência do token na URL (i), o número total de documentos (n) e o número de documentos em que o token ocorre (ni), calcula o peso do token na consulta (wiq) e o soma à pontuação da URL.
+
+        Os tokens são processados em ordem decrescente do seu limite superior de pontuação (o maior `wiq` do token, pré-calculado pelo `Indexador`). Quando a soma dos limites dos tokens restantes não alcança a k-ésima maior pontuação atual (estratégia MaxScore), nenhum documento novo pode entrar no top-k: os tokens restantes apenas atualizam os candidatos que ainda podem alcançá-la. Os k melhores são selecionados com um heap limitado. Empates são desempatados pela URL.
 
-        Este método tokeniza a consulta de pesquisa e, para cada token no índice invertido, verifica se o token está na consulta. Se estiver, ele percorre cada URL associada ao token no índice invertido, obtém a frequência do token na URL (i), o número total de documentos (n) e o número de documentos em que o token ocorre (ni). Em seguida, calcula o peso do token na consulta (wiq) e adiciona o peso do token à pontuação da URL. Finalmente, classifica as URLs com base em suas pontuações em ordem decrescente.
+        Com `modo='e'`, apenas os documentos que contêm todos os tokens da consulta (sem as stop words) são ranqueados, com as mesmas pontuações do modo 'ou'. As listas de postings são intersectadas da menor para a maior: no índice binário, os postings estão ordenados por identificador de documento, e cada candidato é procurado na lista seguinte por busca galopante (veja a função `galopar` de IndiceBinario.py), de modo que apenas os candidatos são pontuados e apenas as URLs do top-k são lidas da tabela de documentos. Com `modo='frase'`, os candidatos também precisam conter os tokens da consulta em posições consecutivas, lidas do arquivo de posições gravado pelo `Indexador` com `posicional=True`.
 
         Parâmetros:
         \n\t`query (str)`: A consulta de pesquisa.
+        \n\t`k (int or None)`: O número de documentos a devolver. Se None, devolve o ranqueamento completo. O valor padrão é 10.
+        \n\t`modo (str)`: 'ou' (documentos com algum dos tokens), 'e' (documentos com todos os tokens) ou 'frase' (documentos com os tokens em sequência). O valor padrão é 'ou'.
 
         Retorno:
-        \n\t`list`: Uma lista de URLs classificadas em ordem decrescente de pontuação.
+        \n\t`list`: Uma lista de tuplas (URL, pontuação) classificadas em ordem decrescente de pontuação.
         """
-        query_tokens = nltk.word_tokenize(query)
+        if modo not in Buscador.MODOS:
+            raise ConsultaNaoSuportada(
+                f"Modo de consulta desconhecido: {modo}")
+        with METRICAS.cronometro('buscador_consulta_segundos', metodo='rank'):
+            query_tokens = Tokenizador.tokens(query)
+            if modo == 'ou':
+                chave = ('rank', normalizar(query_tokens), k)
+            else:
+                query_tokens = [token for token in query_tokens
+                                if token not in Tokenizador.STOP_WORDS]
+                # A ordem dos tokens só importa nas consultas por frase
+                chave = ('rank', normalizar(query_tokens) if modo == 'e' else tuple(query_tokens), k, modo)
+            ranked_urls = self._em_cache(chave)
+            if ranked_urls is not None:
+                return ranked_urls
+            if modo == 'ou':
+                return self._guardar(chave, self._ranquear(query_tokens, k))
+            return self._guardar(chave, self._ranquear_conjuntivo(query_tokens, k, modo == 'frase'))
+
+    def _ranquear(self, query_tokens, k, postings_lote=None) -> list:
+        """
+        Ranqueia os documentos para uma consulta já tokenizada (veja `rank`).
+
+        Parâmetros:
+        \n\t`query_tokens (list)`: Os tokens da consulta.
+        \n\t`k (int or None)`: O número de documentos a devolver. Se None, devolve o ranqueamento completo.
+        \n\t`postings_lote (dict or None)`: Os postings já obtidos de cada token, como em `rank_many`. Se None, os postings são lidos do índice.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas (URL, pontuação) classificadas em ordem decrescente de pontuação.
+        """
+        listas = []
+        for token in dict.fromkeys(query_tokens):
+            if postings_lote is None:
+                postings = self.inverted_index.get(token)
+            else:
+                postings = postings_lote.get(token)
+            if postings:
+                listas.append((self.limite(token, postings), postings))
+        listas.sort(key=lambda item: item[0], reverse=True)
+
+        # restante[j] é a maior pontuação que os tokens j, j+1, ... ainda podem somar
+        restante = [0] * (len(listas) + 1)
+        for j in range(len(listas) - 1, -1, -1):
+            restante[j] = restante[j + 1] + listas[j][0]
 
         scores = {}
+        lidos = 0
+        # A maior pontuação que os tokens já lidos podem ter somado
+        acumulado = 0
 
-        for token in self.inverted_index.keys():
-            if token in query_tokens:
-                for url in self.inverted_index[token].keys():
-                    i, n, ni, _ = self.inverted_index[token][url]
+        for j, (limite, postings) in enumerate(listas):
+            limiar = None
+            # O limiar nunca passa de `acumulado`, e só é calculado quando pode descartar candidatos
+            if k is not None and len(scores) >= k and acumulado > restante[j]:
+                limiar = heapq.nlargest(k, scores.values())[-1]
+            acumulado += limite
 
+            if limiar is None or restante[j] >= limiar:
+                lidos += len(postings)
+                for url, (i, n, ni, _) in postings.items():
                     wiq = Expressoes.calcular_wiq(i, n, ni)
 
                     if url not in scores:
                         scores[url] = 0
 
                     scores[url] += wiq
+            else:
+                # Apenas os candidatos que ainda podem alcançar o limiar são mantidos
+                scores = {url: score for url, score in scores.items()
+                          if score + restante[j] >= limiar}
+                lidos += len(scores)
+                for url in scores.keys():
+                    valores = postings.get(url)
+                    if valores is not None:
+                        i, n, ni, _ = valores
+                        scores[url] += Expressoes.calcular_wiq(i, n, ni)
 
-        ranked_urls = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if METRICAS.ativo:
+            METRICAS.contar('buscador_termos_total', len(listas))
+            METRICAS.contar('buscador_postings_lidos_total', lidos)
+
+        if k is None:
+            return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+        ranked_urls = heapq.nsmallest(
+            k, scores.items(), key=lambda x: (-x[1], x[0]))
 
         return ranked_urls
+
+    def _ranquear_conjuntivo(self, query_tokens, k, frase=False) -> list:
+        """
+        Ranqueia apenas os documentos que contêm todos os tokens da consulta, ou a frase (veja `rank` com `modo='e'` e `modo='frase'`).
+
+        Parâmetros:
+        \n\t`query_tokens (list)`: Os tokens da consulta, sem as stop words e na ordem da consulta.
+        \n\t`k (int or None)`: O número de documentos a devolver. Se None, devolve o ranqueamento completo.
+        \n\t`frase (bool)`: Se True, exige os tokens em posições consecutivas. O valor padrão é False.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas (URL, pontuação) classificadas em ordem decrescente de pontuação.
+        """
+        if not query_tokens:
+            return []
+        indice = self.inverted_index
+        if isinstance(indice, IndiceBinario):
+            scores = self._intersecao_binaria(indice, query_tokens, frase)
+            if k is not None and len(scores) > k:
+                # Apenas os documentos que podem entrar no top-k têm a URL lida da tabela de documentos
+                corte = heapq.nlargest(k, scores.values())[-1]
+                scores = {doc_id: score for doc_id, score in scores.items()
+                          if score >= corte}
+            # As URLs são lidas do mesmo índice dos identificadores, mesmo que ele tenha sido trocado durante a consulta
+            url = indice.url
+            scores = {url(doc_id): score for doc_id, score in scores.items()}
+        else:
+            scores = self._intersecao_postings(query_tokens, frase)
+
+        if k is None:
+            return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        return heapq.nsmallest(k, scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def _intersecao_binaria(self, indice, query_tokens, frase) -> dict:
+        """
+        Intersecta os postings dos tokens no índice binário e pontua os documentos da interseção.
+
+        As listas são decodificadas em colunas (veja `IndiceBinario.colunas`) da menor para a maior, e cada lista só é decodificada se a interseção das anteriores não for vazia. Os candidatos são procurados em cada lista por busca galopante, a partir da posição do candidato anterior.
+
+        Parâmetros:
+        \n\t`indice (IndiceBinario)`: O índice binário.
+        \n\t`query_tokens (list)`: Os tokens da consulta.
+        \n\t`frase (bool)`: Se True, mantém apenas os documentos com os tokens em posições consecutivas.
+
+        Retorno:
+        \n\t`dict`: Um dicionário `{doc_id: pontuação}`.
+        """
+        if frase and not indice.posicional:
+            raise ConsultaNaoSuportada(
+                f"O índice {self.index_file} não tem posições (use Indexador(..., posicional=True))")
+        termos = list(dict.fromkeys(query_tokens))
+        tamanhos = sorted((indice.tamanho(termo), termo) for termo in termos)
+        if tamanhos[0][0] == 0:
+            return {}
+
+        colunas = {}
+        # indices[termo][c] é a posição do candidato c na lista do termo
+        indices = {}
+        candidatos = None
+        lidos = 0
+        for _, termo in tamanhos:
+            colunas[termo] = indice.colunas(termo)
+            doc_ids = colunas[termo][0]
+            if candidatos is None:
+                candidatos = doc_ids
+                indices[termo] = list(range(len(doc_ids)))
+                lidos += len(doc_ids)
+                continue
+            lidos += len(candidatos)
+            mantidos, achados = [], []
+            j = 0
+            for c, doc_id in enumerate(candidatos):
+                j = galopar(doc_ids, doc_id, j)
+                if j == len(doc_ids):
+                    break
+                if doc_ids[j] == doc_id:
+                    mantidos.append(c)
+                    achados.append(j)
+            candidatos = [candidatos[c] for c in mantidos]
+            for anterior, posicoes in indices.items():
+                indices[anterior] = [posicoes[c] for c in mantidos]
+            indices[termo] = achados
+            if not candidatos:
+                break
+
+        if candidatos and frase:
+            posicoes = {termo: indice.posicoes(termo, indices[termo])
+                        for termo in termos}
+            mantidos = [c for c in range(len(candidatos))
+                        if _contem_frase([posicoes[token][c] for token in query_tokens])]
+            candidatos = [candidatos[c] for c in mantidos]
+            for termo, lista in indices.items():
+                indices[termo] = [lista[c] for c in mantidos]
+
+        if METRICAS.ativo:
+            METRICAS.contar('buscador_termos_total', len(termos))
+            METRICAS.contar('buscador_postings_lidos_total', lidos)
+
+        # Os pesos são somados na mesma ordem de `_ranquear`, para que as pontuações sejam idênticas
+        ordem = sorted(termos, key=indice.limite, reverse=True)
+        scores = {}
+        for c, doc_id in enumerate(candidatos):
+            score = 0
+            for termo in ordem:
+                _, frequencias, F, n_i = colunas[termo]
+                score += Expressoes.calcular_wiq(
+                    frequencias[indices[termo][c]], F, n_i)
+            scores[doc_id] = score
+        return scores
+
+    def _intersecao_postings(self, query_tokens, frase) -> dict:
+        """
+        Intersecta os postings dos tokens em um índice JSON ou segmentado e pontua os documentos da interseção.
+
+        Os postings desses índices são dicionários indexados pela URL: os candidatos da menor lista são procurados nas demais, da menor para a maior, com custo O(1) por candidato.
+
+        Parâmetros:
+        \n\t`query_tokens (list)`: Os tokens da consulta.
+        \n\t`frase (bool)`: Se True, mantém apenas os documentos com os tokens em posições consecutivas.
+
+        Retorno:
+        \n\t`dict`: Um dicionário `{url: pontuação}`.
+        """
+        posicoes = self._posicoes_json() if frase else None
+        termos = list(dict.fromkeys(query_tokens))
+        listas = {}
+        for termo in termos:
+            postings = self.inverted_index.get(termo)
+            if not postings:
+                return {}
+            listas[termo] = postings
+
+        ordenadas = sorted(listas.values(), key=len)
+        candidatos = list(ordenadas[0])
+        lidos = len(candidatos)
+        for postings in ordenadas[1:]:
+            lidos += len(candidatos)
+            candidatos = [url for url in candidatos if url in postings]
+            if not candidatos:
+                break
+
+        if candidatos and frase:
+            candidatos = [url for url in candidatos
+                          if _contem_frase([posicoes.get(token, {}).get(url, ()) for token in query_tokens])]
+
+        if METRICAS.ativo:
+            METRICAS.contar('buscador_termos_total', len(termos))
+            METRICAS.contar('buscador_postings_lidos_total', lidos)
+
+        # Os pesos são somados na mesma ordem de `_ranquear`, para que as pontuações sejam idênticas
+        ordem = sorted(termos, key=lambda termo: self.limite(
+            termo, listas[termo]), reverse=True)
+        scores = {}
+        for url in candidatos:
+            score = 0
+            for termo in ordem:
+                i, n, ni, _ = listas[termo][url]
+                score += Expressoes.calcular_wiq(i, n, ni)
+            scores[url] = score
+        return scores
+
+    def _posicoes_json(self) -> dict:
+        """
+        Devolve as posições dos termos de um índice JSON, carregando-as do arquivo de posições na primeira chamada.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: As posições no formato `{termo: {url: [posicoes]}}`.
+        """
+        if self.posicoes is None:
+            arquivo = Buscador.arquivo_posicoes(self.index_file)
+            if isinstance(self.inverted_index, IndiceSegmentado) or not os.path.isfile(arquivo):
+                raise ConsultaNaoSuportada(
+                    f"O índice {self.index_file} não tem posições (use Indexador(..., posicional=True))")
+            with open(arquivo, 'r') as file:
+                self.posicoes = json.load(file)
+        return self.posicoes
+
+    def rank_many(self, queries, k=10, workers=None) -> list:
+        """
+        Ranqueia um lote de consultas de pesquisa.
+
+        Este método tokeniza todas as consultas de uma vez e responde pelo cache as consultas já conhecidas. Para as demais, ele remove os tokens repetidos entre as consultas do lote e obtém os postings de cada token uma única vez. Com `workers` maior que 1, as consultas são pontuadas em um pool de processos. Onde o início de processos por `fork` está disponível, os processos herdam o índice e os postings já obtidos como memória somente leitura compartilhada, sem que eles sejam serializados; nos demais sistemas, cada processo abre o índice a partir de `index_file`.
+
+        Parâmetros:
+        \n\t`queries (list)`: As consultas de pesquisa.
+        \n\t`k (int or None)`: O número de documentos a devolver por consulta. Se None, devolve o ranqueamento completo. O valor padrão é 10.
+        \n\t`workers (int or None)`: O número de processos. Se None ou 1, as consultas são pontuadas no processo atual.
+
+        Retorno:
+        \n\t`list`: Uma lista com o resultado de `rank` para cada consulta, na mesma ordem das consultas.
+        """
+        with METRICAS.cronometro('buscador_consulta_segundos', metodo='rank_many'):
+            return self._rank_many(queries, k, workers)
+
+    def _rank_many(self, queries, k, workers) -> list:
+        """
+        Ranqueia um lote de consultas de pesquisa (veja `rank_many`).
+        """
+        resultados = []
+        pendentes = {}
+        for posicao, query in enumerate(queries):
+            query_tokens = Tokenizador.tokens(query)
+            chave = ('rank', normalizar(query_tokens), k)
+            ranked_urls = self._em_cache(chave)
+            if ranked_urls is None:
+                pendentes.setdefault(chave, (query_tokens, []))[
+                    1].append(posicao)
+            resultados.append(ranked_urls)
+
+        consultas = [query_tokens for query_tokens, _ in pendentes.values()]
+        for chave, ranked_urls in zip(pendentes.keys(), self._ranquear_lote(consultas, k, workers)):
+            self._guardar(chave, ranked_urls)
+            for posicao in pendentes[chave][1]:
+                resultados[posicao] = list(ranked_urls)
+        return resultados
+
+    def _ranquear_lote(self, consultas, k, workers) -> list:
+        """
+        Ranqueia um lote de consultas tokenizadas, no processo atual ou em um pool de processos (veja `rank_many`).
+
+        Parâmetros:
+        \n\t`consultas (list)`: Os tokens de cada consulta.
+        \n\t`k (int or None)`: O número de documentos a devolver por consulta.
+        \n\t`workers (int or None)`: O número de processos.
+
+        Retorno:
+        \n\t`list`: O ranqueamento de cada consulta, na mesma ordem das consultas.
+        """
+        tokens = dict.fromkeys(
+            token for query_tokens in consultas for token in query_tokens)
+
+        if workers is None or workers <= 1 or len(consultas) <= 1:
+            postings_lote = {token: self.inverted_index.get(token)
+                             for token in tokens}
+            return [self._ranquear(query_tokens, k, postings_lote) for query_tokens in consultas]
+
+        global _LOTE
+        chunksize = max(1, len(consultas) // (workers * 4))
+        if 'fork' in multiprocessing.get_all_start_methods():
+            postings_lote = {token: self.inverted_index.get(token)
+                             for token in tokens}
+            _LOTE = (self, postings_lote, k)
+            try:
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    return pool.map(_ranquear_no_pool, consultas, chunksize)
+            finally:
+                _LOTE = None
+        with multiprocessing.Pool(workers, initializer=_iniciar_lote,
+                                  initargs=(self.index_file, k)) as pool:
+            return pool.map(_ranquear_no_pool, consultas, chunksize)
+
+    def rank_csr(self, query, k=10, cosseno=False) -> list:
+        """
+        Realiza um ranqueamento dos documentos com um produto esparso vetorizado sobre a matriz CSR do índice.
+
+        Este método tokeniza a consulta de pesquisa, transforma-a em um vetor esparso sobre os termos e pontua todos os documentos de uma só vez com NumPy (veja `MatrizCSR`). Os k melhores são selecionados com `numpy.argpartition`. Sem normalização, as pontuações são as mesmas de `rank`.
+
+        Parâmetros:
+        \n\t`query (str)`: A consulta de pesquisa.
+        \n\t`k (int or None)`: O número de documentos a devolver. Se None, devolve o ranqueamento completo. O valor padrão é 10.
+        \n\t`cosseno (bool)`: Se True, normaliza as pontuações pelo cosseno. O valor padrão é False.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas (URL, pontuação) classificadas em ordem decrescente de pontuação.
+        """
+        query_tokens = Tokenizador.tokens(query)
+        chave = ('rank_csr', normalizar(query_tokens), k, cosseno)
+        ranked_urls = self._em_cache(chave)
+        if ranked_urls is not None:
+            return ranked_urls
+        return self._guardar(chave, self.matriz_csr().top_k(query_tokens, k, cosseno))
+
+    def matriz_csr(self):
+        """
+        Devolve a matriz CSR do índice, carregando-a ou construindo-a na primeira chamada.
+
+        Se o `Indexador` tiver gravado a matriz junto com o índice, ela é carregada do disco. Caso contrário, ou se o arquivo da matriz for mais antigo que o arquivo do índice (uma matriz de um índice anterior, regravado depois sem a matriz), ela é construída a partir do índice invertido.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`MatrizCSR`: A matriz termo×documento do índice.
+        """
+        self._validar_estruturas()
+        if self.matriz is None:
+            # O NumPy só é necessário para o modo CSR
+            from MatrizCSR import MatrizCSR
+            arquivo = MatrizCSR.arquivo(self.index_file)
+            if self._matriz_atual(arquivo):
+                self.matriz = MatrizCSR.carregar(arquivo)
+            else:
+                self.matriz = MatrizCSR.de_indice(self.inverted_index)
+        return self.matriz
+
+    def armazem_documentos(self):
+        """
+        Devolve o armazém dos atributos das páginas, abrindo-o com `mmap` na primeira chamada.
+
+        O armazém é gravado pelo `Indexador` quando os atributos das páginas são guardados (veja `Indexador.add_attr_inverted_index`). Abri-lo não lê nenhum registro, e os métodos de ranqueamento nunca o abrem.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`ArmazemDocumentos or None`: O armazém do índice, ou None se o índice não tiver um armazém.
+        """
+        self._validar_estruturas()
+        if self.armazem is None:
+            arquivo = ArmazemDocumentos.arquivo(self.index_file)
+            if os.path.exists(arquivo):
+                self.armazem = ArmazemDocumentos(arquivo)
+        return self.armazem
+
+    def documento(self, url):
+        """
+        Devolve os atributos de uma página, lidos e descomprimidos do armazém de documentos apenas neste momento.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página (por exemplo, um resultado de `rank`).
+
+        Retorno:
+        \n\t`dict or None`: Os atributos da página, no formato `{atributo: [textos]}`, ou None se o índice não tiver um armazém ou a página não estiver nele.
+        """
+        armazem = self.armazem_documentos()
+        return None if armazem is None else armazem.get(url)
+
+    def trecho(self, url, query, tamanho=200):
+        """
+        Devolve o trecho de uma página que melhor corresponde à consulta, para exibir com o resultado (veja `ArmazemDocumentos.trecho`).
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página.
+        \n\t`query (str)`: A consulta.
+        \n\t`tamanho (int)`: O número máximo de caracteres do trecho. O valor padrão é 200.
+
+        Retorno:
+        \n\t`str or None`: O trecho, ou None se o índice não tiver um armazém ou a página não estiver nele.
+        """
+        armazem = self.armazem_documentos()
+        return None if armazem is None else armazem.trecho(url, query, tamanho)
+
+    def _matriz_atual(self, arquivo) -> bool:
+        """
+        Verifica se o arquivo da matriz existe e foi gravado depois do arquivo do índice (veja `versao_arquivo`), como faz o `Indexador`.
+
+        Parâmetros:
+        \n\t`arquivo (str)`: O arquivo da matriz.
+
+        Retorno:
+        \n\t`bool`: True se a matriz pode ser carregada.
+        """
+        versao = self.versao_indice()
+        try:
+            return versao is None or os.stat(arquivo).st_mtime_ns >= versao[2]
+        except OSError:
+            return False
+
+    def limite(self, token, postings=None) -> float:
+        """
+        Devolve o limite superior de pontuação de um token.
+
+        Para índices binários, o limite é lido do dicionário de termos, onde foi gravado pelo `Indexador`. Para índices segmentados, ele é calculado a cada consulta, com as estatísticas globais atuais do termo. Para índices JSON, ele é calculado a partir dos postings na primeira consulta ao token e guardado em cache.
+
+        Parâmetros:
+        \n\t`token (str)`: O token da consulta.
+        \n\t`postings (dict or None)`: Os postings do token, se já tiverem sido obtidos.
+
+        Retorno:
+        \n\t`float`: O maior valor de `Expressoes.calcular_wiq` entre os postings do token.
+        """
+        if isinstance(self.inverted_index, IndiceBinario):
+            return self.inverted_index.limite(token)
+        if isinstance(self.inverted_index, IndiceSegmentado):
+            # As estatísticas globais mudam a cada atualização: o limite é calculado sobre os postings atuais
+            if postings is None:
+                postings = self.inverted_index.get(token, {})
+            return limite_superior(postings)
+        if token not in self.limites:
+            if postings is None:
+                postings = self.inverted_index.get(token, {})
+            self.limites[token] = limite_superior(postings)
+        return self.limites[token]
+
+    def versao_indice(self) -> tuple:
+        """
+        Devolve a versão do arquivo do índice (veja `versao_arquivo`).
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`tuple`: A versão do índice, ou None se o arquivo não existir mais.
+        """
+        return Buscador.versao_arquivo(self.index_file)
+
+    @staticmethod
+    def versao_arquivo(index_file) -> tuple:
+        """
+        Devolve a versão de um índice no disco, sem abri-lo.
+
+        A versão é formada pelo inode, pelo tamanho e pela data de modificação do arquivo JSON, do dicionário de termos do índice binário ou do manifesto do índice segmentado. Ela muda sempre que o índice é regravado ou atualizado.
+
+        Parâmetros:
+        \n\t`index_file (str)`: O arquivo JSON ou o diretório do índice.
+
+        Retorno:
+        \n\t`tuple`: A versão do índice, ou None se o arquivo não existir.
+        """
+        arquivo = index_file
+        if IndiceSegmentado.eh_segmentado(arquivo):
+            arquivo = os.path.join(arquivo, IndiceSegmentado.MANIFESTO)
+        elif os.path.isdir(arquivo):
+            arquivo = os.path.join(arquivo, IndiceBinario.ARQUIVO_TERMOS)
+        try:
+            stat = os.stat(arquivo)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def arquivo_posicoes(index_file) -> str:
+        """
+        Devolve o caminho do arquivo de posições associado a um índice.
+
+        Para um índice binário, as posições ficam no arquivo `posicoes.bin` dentro do diretório do índice (veja `IndiceBinario`). Para um índice JSON, elas ficam ao lado do arquivo, com a extensão `.posicoes.json`.
+
+        Parâmetros:
+        \n\t`index_file (str)`: O diretório do índice binário ou o arquivo do índice JSON.
+
+        Retorno:
+        \n\t`str`: O caminho do arquivo de posições.
+        """
+        if os.path.isdir(index_file):
+            return os.path.join(index_file, IndiceBinario.ARQUIVO_POSICOES)
+        return os.path.splitext(index_file)[0] + '.posicoes.json'
+
+    def _validar_estruturas(self) -> None:
+        """
+        Descarta o índice de k-gramas, a matriz CSR e o armazém de documentos aberto de um índice segmentado que foi atualizado desde que eles foram construídos. O armazém descartado não é fechado, pois outra thread pode estar lendo dele.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if not isinstance(self.inverted_index, IndiceSegmentado):
+            return
+        versao = self.versao_indice()
+        if versao != self._versao_estruturas:
+            self.kgramas = None
+            self.matriz = None
+            self.armazem = None
+            self._versao_estruturas = versao
+
+    def estatisticas_cache(self) -> dict:
+        """
+        Devolve as estatísticas de acertos e falhas do cache de consultas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: As estatísticas de `CacheConsultas.estatisticas`, ou um dicionário vazio se o cache estiver desativado.
+        """
+        if self.cache is None:
+            return {}
+        return self.cache.estatisticas()
+
+    def _em_cache(self, chave):
+        """
+        Devolve o resultado de uma consulta guardado no cache, esvaziando-o antes se o índice tiver mudado.
+
+        Antes, o índice é atualizado se tiver sido regravado desde que foi aberto: um índice segmentado recarrega o manifesto (veja `IndiceSegmentado.atualizar`), e um índice JSON ou binário é reaberto (veja `_abrir`). Assim, a consulta nunca é respondida com o índice anterior, nem o resultado é guardado no cache da versão nova. Quando várias threads compartilham o Buscador, apenas uma delas reabre o índice, e as consultas em andamento terminam com o índice anterior.
+
+        Parâmetros:
+        \n\t`chave (tuple)`: A chave da consulta (modo de busca, tokens normalizados e parâmetros).
+
+        Retorno:
+        \n\t`list or set or None`: O resultado guardado, ou None se ele não estiver no cache.
+        """
+        if isinstance(self.inverted_index, IndiceSegmentado):
+            self.inverted_index.atualizar()
+            versao = self.versao_indice()
+        else:
+            versao = self.versao_indice()
+            if versao is not None and versao != self._versao_aberta:
+                with self._trava:
+                    if versao != self._versao_aberta:
+                        self._abrir()
+        if self.cache is None:
+            return None
+        self.cache.validar(versao)
+        return self.cache.obter(chave)
+
+    def _guardar(self, chave, resultado):
+        """
+        Guarda o resultado de uma consulta no cache e o devolve.
+
+        Parâmetros:
+        \n\t`chave (tuple)`: A chave da consulta.
+        \n\t`resultado (list or set)`: O resultado da consulta.
+
+        Retorno:
+        \n\t`list or set`: O próprio resultado.
+        """
+        if self.cache is not None:
+            self.cache.guardar(chave, resultado)
+        return resultado
+
+
+def normalizar(query_tokens) -> tuple:
+    """
+    Normaliza os tokens de uma consulta para uso como chave do cache.
+
+    Os resultados de todas as buscas dependem apenas do conjunto de tokens da consulta, e não da ordem ou da repetição deles.
+
+    Parâmetros:
+    \n\t`query_tokens (list)`: Os tokens da consulta.
+
+    Retorno:
+    \n\t`tuple`: Os tokens distintos, em ordem alfabética.
+    """
+    return tuple(sorted(set(query_tokens)))
+
+
+def _contem_frase(posicoes) -> bool:
+    """
+    Verifica se os tokens de uma frase ocorrem em posições consecutivas de um documento.
+
+    Parâmetros:
+    \n\t`posicoes (list)`: As posições de cada token da frase no documento, na ordem da frase.
+
+    Retorno:
+    \n\t`bool`: Retorna True se existir uma posição p em que o i-ésimo token ocorre na posição p + i, para todo i.
+    """
+    inicios = set(posicoes[0])
+    for deslocamento, lista in enumerate(posicoes[1:], 1):
+        inicios.intersection_update(posicao - deslocamento for posicao in lista)
+        if not inicios:
+            return False
+    return bool(inicios)
+
+
+# Estado de `rank_many` nos processos do pool: (buscador, postings do lote, k)
+_LOTE = None
+
+
+def _iniciar_lote(index_file, k) -> None:
+    """
+    Inicializa um processo do pool de `rank_many` quando o início por `fork` não está disponível.
+
+    O processo abre o índice a partir do caminho recebido e obtém os postings de cada token sob demanda, guardando-os em cache.
+
+    Parâmetros:
+    \n\t`index_file (str)`: O arquivo JSON ou o diretório binário do índice.
+    \n\t`k (int or None)`: O número de documentos a devolver por consulta.
+
+    Retorno:
+    \n\t`None`
+    """
+    global _LOTE
+    buscador = Buscador(index_file)
+    _LOTE = (buscador, _PostingsSobDemanda(buscador.inverted_index), k)
+
+
+def _ranquear_no_pool(query_tokens) -> list:
+    """
+    Ranqueia uma consulta tokenizada em um processo do pool de `rank_many`.
+
+    Parâmetros:
+    \n\t`query_tokens (list)`: Os tokens da consulta.
+
+    Retorno:
+    \n\t`list`: Uma lista de tuplas (URL, pontuação) classificadas em ordem decrescente de pontuação.
+    """
+    buscador, postings_lote, k = _LOTE
+    return buscador._ranquear(query_tokens, k, postings_lote)
+
+
+class _PostingsSobDemanda(dict):
+    """
+    Um dicionário de postings que lê do índice, e guarda em cache, os tokens ainda não obtidos.
+    """
+
+    def __init__(self, inverted_index) -> None:
+        super().__init__()
+        self.inverted_index = inverted_index
+
+    def get(self, token, default=None):
+        if token not in self:
+            self[token] = self.inverted_index.get(token)
+        postings = self[token]
+        return default if postings is None else postings
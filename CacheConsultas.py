@@ -0,0 +1,178 @@
+########## CacheConsultas.py ##########
+import sys
+import threading
+from collections import OrderedDict
+
+
+class CacheConsultas:
+    """
+    A classe CacheConsultas guarda os resultados das consultas com política de remoção LRU (least recently used).
+
+    O cache é limitado pelo número de entradas e pela memória aproximada ocupada pelos resultados. Cada resultado é associado à versão do índice em que foi calculado: quando a versão muda (por exemplo, porque o arquivo do índice foi regravado), todo o conteúdo do cache é descartado.
+
+    Atributos:
+    \n\t`max_entradas (int)`: O número máximo de resultados guardados.
+    \n\t`max_bytes (int)`: A memória aproximada máxima, em bytes, ocupada pelos resultados.
+    \n\t`versao`: A versão do índice a que os resultados guardados pertencem.
+    \n\t`hits (int)`: O número de consultas respondidas pelo cache.
+    \n\t`misses (int)`: O número de consultas que não estavam no cache.
+    \n\t`remocoes (int)`: O número de resultados removidos pela política LRU.
+    \n\t`invalidacoes (int)`: O número de vezes em que o cache foi esvaziado por mudança de versão do índice.
+
+    Métodos:
+    \n\t`validar(versao) -> None`: Esvazia o cache se a versão do índice mudou.
+    \n\t`obter(chave, default=None)`: Devolve o resultado guardado para a chave.
+    \n\t`guardar(chave, valor) -> None`: Guarda um resultado, removendo os menos usados se necessário.
+    \n\t`limpar() -> None`: Esvazia o cache.
+    \n\t`estatisticas() -> dict`: Devolve as estatísticas de acertos e falhas do cache.
+
+    Exemplo:
+    >>> cache = CacheConsultas(max_entradas=2)
+    >>> cache.guardar(('rank', ('ifmg',), 10), [('https://www.ifmg.edu.br', 1.0)])
+    >>> cache.obter(('rank', ('ifmg',), 10))
+    [('https://www.ifmg.edu.br', 1.0)]
+    >>> cache.estatisticas()['hits']
+    1
+    """
+
+    def __init__(self, max_entradas=1024, max_bytes=64 * 1024 * 1024) -> None:
+        """
+        O construtor da classe CacheConsultas.
+
+        Parâmetros:
+        \n\t`max_entradas (int)`: O número máximo de resultados guardados. O valor padrão é 1024.
+        \n\t`max_bytes (int)`: A memória aproximada máxima ocupada pelos resultados. O valor padrão é 64 MiB.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.versao = None
+        self.hits = 0
+        self.misses = 0
+        self.remocoes = 0
+        self.invalidacoes = 0
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def validar(self, versao) -> None:
+        """
+        Esvazia o cache se a versão do índice for diferente da versão dos resultados guardados.
+
+        Parâmetros:
+        \n\t`versao`: A versão atual do índice.
+
+        Retorno:
+        \n\t`None`
+        """
+        with self._lock:
+            if versao != self.versao:
+                if self._entradas:
+                    self.invalidacoes += 1
+                self._entradas.clear()
+                self._bytes = 0
+                self.versao = versao
+
+    def obter(self, chave, default=None):
+        """
+        Devolve o resultado guardado para a chave e o marca como o mais recentemente usado.
+
+        Parâmetros:
+        \n\t`chave (tuple)`: A chave da consulta.
+        \n\t`default`: O valor devolvido se a chave não estiver no cache. O valor padrão é None.
+
+        Retorno:
+        \n\t`list or set`: Uma cópia do resultado guardado, ou `default`.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.misses += 1
+                return default
+            self._entradas.move_to_end(chave)
+            self.hits += 1
+            valor = entrada[0]
+        return type(valor)(valor)
+
+    def guardar(self, chave, valor) -> None:
+        """
+        Guarda um resultado e remove os resultados menos usados até respeitar os limites do cache.
+
+        Parâmetros:
+        \n\t`chave (tuple)`: A chave da consulta.
+        \n\t`valor (list or set)`: O resultado da consulta.
+
+        Retorno:
+        \n\t`None`
+        """
+        tamanho = _tamanho(chave) + _tamanho(valor)
+        if tamanho > self.max_bytes or self.max_entradas <= 0:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[chave] = (type(valor)(valor), tamanho)
+            self._bytes += tamanho
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                _, (_, removido) = self._entradas.popitem(last=False)
+                self._bytes -= removido
+                self.remocoes += 1
+
+    def limpar(self) -> None:
+        """
+        Esvazia o cache, mantendo as estatísticas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas do cache.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: Um dicionário com `hits`, `misses`, `taxa_acertos`, `remocoes`, `invalidacoes`, `entradas` e `bytes`.
+        """
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acertos': self.hits / consultas if consultas else 0.0,
+                'remocoes': self.remocoes,
+                'invalidacoes': self.invalidacoes,
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+def _tamanho(valor) -> int:
+    """
+    Estima a memória ocupada por um resultado de consulta.
+
+    Parâmetros:
+    \n\t`valor`: Um resultado de consulta (lista de tuplas, conjunto de URLs ou chave).
+
+    Retorno:
+    \n\t`int`: O tamanho aproximado em bytes.
+    """
+    tamanho = sys.getsizeof(valor)
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        for item in valor:
+            tamanho += _tamanho(item)
+    return tamanho
@@ -0,0 +1,176 @@
+import threading
+import time
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+import requests
+
+
+class CacheRobots:
+    """
+    A classe CacheRobots guarda o arquivo "/robots.txt" de cada host já consultado.
+
+    O arquivo de cada host é baixado uma única vez e reaproveitado durante `ttl` segundos. Quando o download falha, a falha também é guardada (cache negativo) durante `ttl_negativo` segundos, e as URLs do host continuam sendo recusadas sem novas tentativas. O cache também informa o `Crawl-delay` declarado pelo host.
+
+    Atributos:
+    \n\t`ttl (float)`: O tempo, em segundos, durante o qual um arquivo robots.txt obtido é reaproveitado.
+    \n\t`ttl_negativo (float)`: O tempo, em segundos, durante o qual uma falha de download é reaproveitada.
+    \n\t`agente (str)`: O user-agent usado nas consultas às regras.
+    \n\t`hits (int)`: O número de consultas respondidas pelo cache.
+    \n\t`misses (int)`: O número de consultas que exigiram baixar o robots.txt.
+    \n\t`falhas (int)`: O número de downloads que falharam.
+
+    Métodos:
+    \n\t`pode_coletar(url) -> bool`: Verifica se a coleta da URL é permitida.
+    \n\t`atraso(url) -> float or None`: Devolve o `Crawl-delay` declarado pelo host da URL.
+    \n\t`estatisticas() -> dict`: Devolve as estatísticas de acertos e falhas do cache.
+
+    Exemplo:
+    >>> robots = CacheRobots()
+    >>> robots.pode_coletar("https://www.ifmg.edu.br")
+    True
+    >>> robots.pode_coletar("https://www.ifmg.edu.br/portal")
+    True
+    >>> robots.estatisticas()["hits"]
+    1
+    """
+
+    def __init__(self, sessoes=None, ttl=3600.0, ttl_negativo=300.0, agente="*", timeout=10.0) -> None:
+        """
+        O construtor da classe CacheRobots.
+
+        Parâmetros:
+        \n\t`sessoes (PoolSessoes or None)`: O pool de sessões usado para baixar os arquivos. Se None, usa `requests.get`.
+        \n\t`ttl (float)`: O tempo de validade de um robots.txt obtido. O valor padrão é 3600 segundos.
+        \n\t`ttl_negativo (float)`: O tempo de validade de uma falha de download. O valor padrão é 300 segundos.
+        \n\t`agente (str)`: O user-agent usado nas consultas às regras. O valor padrão é "*".
+        \n\t`timeout (float)`: O tempo limite do download, em segundos. O valor padrão é 10.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.sessoes = sessoes
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.agente = agente
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.falhas = 0
+        self._entradas = {}
+        self._lock = threading.Lock()
+        self._travas = {}
+
+    def _parser(self, url):
+        """
+        Devolve o parser do robots.txt do host da URL, baixando o arquivo se ele não estiver no cache ou tiver expirado.
+
+        Downloads simultâneos para o mesmo host são evitados: a segunda thread aguarda o resultado da primeira.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+
+        Retorno:
+        \n\t`RobotFileParser or None`: O parser do host, ou None se o download falhou.
+        """
+        parsed_url = urlparse(url)
+        host = parsed_url.scheme + "://" + parsed_url.netloc
+        with self._lock:
+            trava = self._travas.setdefault(host, threading.Lock())
+        with trava:
+            entrada = self._entradas.get(host)
+            if entrada is not None and entrada[1] > time.monotonic():
+                with self._lock:
+                    self.hits += 1
+                return entrada[0]
+            with self._lock:
+                self.misses += 1
+            rp = self._baixar(urljoin(host, "/robots.txt"))
+            validade = self.ttl if rp is not None else self.ttl_negativo
+            self._entradas[host] = (rp, time.monotonic() + validade)
+            return rp
+
+    def _baixar(self, robots_url):
+        """
+        Baixa e analisa um arquivo robots.txt.
+
+        Assim como `RobotFileParser.read`, as respostas 401 e 403 proíbem todo o host e as demais respostas 4xx permitem todo o host.
+
+        Parâmetros:
+        \n\t`robots_url (str)`: A URL do arquivo robots.txt.
+
+        Retorno:
+        \n\t`RobotFileParser or None`: O parser do arquivo, ou None se o download falhou.
+        """
+        rp = RobotFileParser()
+        rp.set_url(robots_url)
+        try:
+            if self.sessoes is not None:
+                response = self.sessoes.get(robots_url, timeout=self.timeout)
+            else:
+                response = requests.get(robots_url, timeout=self.timeout)
+        except requests.RequestException:
+            with self._lock:
+                self.falhas += 1
+            return None
+        if response.status_code in (401, 403):
+            rp.disallow_all = True
+        elif 400 <= response.status_code < 500:
+            rp.allow_all = True
+        elif response.status_code >= 500:
+            with self._lock:
+                self.falhas += 1
+            return None
+        else:
+            rp.parse(response.text.splitlines())
+        return rp
+
+    def pode_coletar(self, url) -> bool:
+        """
+        Verifica se é permitido extrair a URL de acordo com o arquivo "/robots.txt" do seu host.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL a ser verificada.
+
+        Retorno:
+        \n\t`bool or None`: True se a coleta for permitida, False se for proibida, ou None se o robots.txt não pôde ser obtido.
+        """
+        rp = self._parser(url)
+        if rp is None:
+            return None
+        return rp.can_fetch(self.agente, url)
+
+    def atraso(self, url):
+        """
+        Devolve o `Crawl-delay` declarado no robots.txt do host da URL.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+
+        Retorno:
+        \n\t`float or None`: O intervalo mínimo, em segundos, entre requisições ao host, ou None se não foi declarado.
+        """
+        rp = self._parser(url)
+        if rp is None:
+            return None
+        atraso = rp.crawl_delay(self.agente)
+        return float(atraso) if atraso is not None else None
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas do cache.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: Um dicionário com `hosts`, `hits`, `misses`, `taxa_acertos` e `falhas`.
+        """
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hosts': len(self._entradas),
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acertos': self.hits / consultas if consultas else 0.0,
+                'falhas': self.falhas,
+            }
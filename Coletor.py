@@ -1,11 +1,13 @@
 ########## Coletor.py ##########
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
 # from selenium.webdriver.common.action_chains import ActionChains
-from urllib.parse import urlparse, urljoin
-from urllib.robotparser import RobotFileParser
+from urllib.parse import urlparse, urljoin, urldefrag
 import time
+from CacheRobots import CacheRobots
+from Metricas import METRICAS
+from Fronteira import Fronteira
+from MotorAssincrono import MotorAssincrono
+from PoolNavegadores import PoolNavegadores
+from PoolSessoes import PoolSessoes
 from Url import Url
 
 
@@ -13,18 +15,23 @@ class Coletor:
     """
     A classe Coletor é responsável por coletar páginas web.
 
-    Cada objeto da classe Coletor contém um código, um dicionário de URLs a serem coletadas e uma lista de objetos da classe Url que foram criados a partir das URLs coletadas.
+    Cada objeto da classe Coletor contém um código, uma fronteira com as URLs a serem coletadas e uma lista de objetos da classe Url que foram criados a partir das URLs coletadas.
 
     Atributos:
     \n\t`codigo (str)`: Um código fornecido quando um objeto da classe Coletor é criado.
-    \n\t`urls (dict)`: Um dicionário que armazena as URLs que serão coletadas. As chaves são as URLs e os valores são booleanos que indicam se a URL já foi coletada (True) ou não (False).
     \n\t`objects_url (list)`: Uma lista que armazena objetos da classe Url que foram criados a partir das URLs coletadas.
+    \n\t`fronteira (Fronteira)`: A fronteira de coleta, com as URLs (normalizadas) pendentes em filas por host, a profundidade de cada uma, o conjunto de URLs vistas e o número de URLs coletadas e com falha.
+    \n\t`sessoes (PoolSessoes)`: As sessões HTTP persistentes (keep-alive), uma por host.
+    \n\t`robots (CacheRobots)`: O cache dos arquivos robots.txt, um por host.
+    \n\t`navegadores (PoolNavegadores or None)`: O pool de navegadores usado quando `params_page` é uma `str`, criado na primeira coleta com o Selenium.
 
     Métodos:
-    \n\t`addUrl(url)`: Adiciona uma nova URL ao dicionário self.urls, se ela ainda não estiver presente.
+    \n\t`addUrl(url)`: Adiciona uma nova URL à fronteira de coleta, se ela ainda não tiver sido vista.
     \n\t`extrair_informacoes(params=None)`: Extrai informações das URLs que ainda não foram visitadas e que são permitidas pelo arquivo robots.txt.
-    \n\t`can_fetch(url)`: Verifica se a coleta é permitida para a URL especificada pelo arquivo robots.txt.
-    \n\t`extrair_em_profundidade(profundidade=0, params=None)`: Extrai informações das URLs até a profundidade especificada. Quando a profundidade é 0, este método extrai informações de todas as URLs do mesmo domínio que a primeira URL adicionada ao Coletor. Quando a profundidade é um valor diferente de 0, ele extrai informações das URLs até essa profundidade.
+    \n\t`can_fetch(url)`: Verifica se a coleta é permitida para a URL especificada pelo arquivo robots.txt (guardado em cache por host).
+    \n\t`estatisticas()`: Devolve as estatísticas da coleta, da fronteira, do cache de robots.txt e do reaproveitamento de conexões.
+    \n\t`extrair_em_profundidade(profundidade=0, params=None, mesmo_dominio=True)`: Extrai informações das URLs em largura (BFS), seguindo os links das páginas coletadas até a profundidade especificada. Quando a profundidade é 0, este método extrai informações apenas das URLs pendentes, sem seguir links.
+    \n\t`fechar()`: Fecha as sessões HTTP, os navegadores abertos pelo coletor e o armazenamento em disco das URLs vistas.
 
     Exemplo:
     >>> coletor = Coletor("Root")
@@ -34,25 +41,29 @@ class Coletor:
     1
     """
 
-    def __init__(self, codigo) -> None:
+    def __init__(self, codigo, vistos=None) -> None:
         """
         O construtor da classe Coletor.
 
-        Este método é chamado automaticamente quando um objeto da classe Coletor é criado. Ele inicializa o código, o dicionário de URLs a serem coletadas e a lista de objetos da classe Url.
+        Este método é chamado automaticamente quando um objeto da classe Coletor é criado. Ele inicializa o código, a lista de objetos da classe Url e a fronteira de coleta.
 
         Parâmetros:
         \n\t`codigo (str)`: Um código fornecido quando um objeto da classe Coletor é criado.
+        \n\t`vistos (ConjuntoVistos or None)`: O conjunto de URLs vistas da fronteira, por exemplo com um armazenamento exato em disco para coletas grandes. O valor padrão é None (um filtro de Bloom na memória).
 
         Retorno:
         \n\t`None`
         """
         self.codigo = codigo
-        self.urls = {}
         self.objects_url = []
+        self.fronteira = Fronteira(vistos=vistos)
+        self.sessoes = PoolSessoes()
+        self.robots = CacheRobots(self.sessoes)
+        self.navegadores = None
 
     def addUrl(self, url) -> None:
         """
-        Adiciona uma nova URL ao dicionário self.urls, se ela ainda não estiver presente.
+        Adiciona uma nova URL à fronteira de coleta (com profundidade 0), se ela ainda não tiver sido vista. A fronteira identifica a URL pela sua forma normalizada (veja `NormalizadorUrl`), mas coleta a URL original, sem o fragmento.
 
         Parâmetros:
         \n\t`url (str)`: A URL a ser adicionada.
@@ -60,14 +71,13 @@ class Coletor:
         Retorno:
         \n\t`None`
         """
-        if url not in self.urls.keys():
-            self.urls[url] = False
+        self.fronteira.adicionar(url, 0)
 
     def can_fetch(self, url) -> bool:
         """
         Verifica se é permitido extrair a URL de acordo com o arquivo "/robots.txt".
 
-        Este método parseia a URL para obter o esquema e o netloc (por exemplo, 'http', 'www.ifmg.edu.br'). Em seguida, constrói a URL do arquivo robots.txt (por exemplo, 'http://www.ifmg.edu.br/robots.txt') e usa o RobotFileParser para analisar o arquivo robots.txt. Finalmente, verifica se é permitido extrair a URL de acordo com as regras especificadas no arquivo robots.txt.
+        O arquivo robots.txt de cada host é baixado uma única vez, com a sessão persistente do host, e reaproveitado pelo cache `self.robots` (veja `CacheRobots`). Falhas de download também ficam em cache por um tempo menor, e as URLs do host continuam sendo recusadas.
 
         Parâmetros:
         \n\t`url (str)`: A URL a ser verificada.
@@ -75,92 +85,300 @@ class Coletor:
         Retorno:
         \n\t`bool`: Retorna True se for permitido extrair a URL, False caso contrário.
         """
-        parsed_url = urlparse(url)
-        robots_url = urljoin(parsed_url.scheme + "://" +
-                             parsed_url.netloc, "/robots.txt")
-        rp = RobotFileParser()
-        rp.set_url(robots_url)
-        # rp.read()
-        # return rp.can_fetch("*", url)
-        try:
-            rp.read()
-            return rp.can_fetch("*", url)
-        except:
+        with METRICAS.cronometro('coletor_robots_segundos'):
+            permitido = self.robots.pode_coletar(url)
+        if permitido is None:
             print(f"Não foi possível ler o arquivo robots.txt de {url}")
             return False
+        return permitido
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas da coleta.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: Um dicionário com o número de páginas coletadas (`paginas`), as estatísticas da fronteira (`fronteira`), incluindo a memória usada pelo conjunto de URLs vistas, as estatísticas do cache de robots.txt (`robots`) e as estatísticas das conexões HTTP (`conexoes`), incluindo a taxa de acertos do cache e o número de conexões reutilizadas.
+        """
+        estatisticas = {
+            'paginas': len(self.objects_url),
+            'fronteira': self.fronteira.estatisticas(),
+            'robots': self.robots.estatisticas(),
+            'conexoes': self.sessoes.estatisticas(),
+        }
+        if self.navegadores is not None:
+            estatisticas['navegadores'] = self.navegadores.estatisticas()
+        return estatisticas
+
+    def fechar(self) -> None:
+        """
+        Fecha as sessões HTTP, os navegadores abertos pelo coletor e o armazenamento em disco das URLs vistas (se houver).
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        self.sessoes.fechar()
+        if self.navegadores is not None:
+            self.navegadores.fechar()
+        self.fronteira.fechar()
 
     def extrair_informacoes(self, params_page=None) -> None:
         """
         Extrai as informações das URLs que ainda não foram coletadas.
 
-        Este método cria uma lista de URLs que ainda não foram coletadas. Em seguida, para cada URL na lista de URLs não coletadas, ele verifica se é permitido extrair a URL de acordo com o arquivo "/robots.txt". Se for permitido, ele tenta fazer uma requisição GET para a URL e, dependendo do tipo de `params_page`, ele usa diferentes métodos para processar a resposta.
+        Este método retira da fronteira todas as URLs pendentes, sem seguir os links das páginas. Em seguida, para cada URL, ele verifica se é permitido extrair a URL de acordo com o arquivo "/robots.txt". Se for permitido, ele tenta fazer uma requisição GET para a URL e, dependendo do tipo de `params_page`, ele usa diferentes métodos para processar a resposta.
 
         Parâmetros:
-        \n\t`params_page (str, float, int or None)`: Um parâmetro que determina como processar a resposta da requisição GET. Se for uma `str`, ele usa o Selenium para carregar a página web e o BeautifulSoup para analisar o HTML da página. Se for um número do tipo `float`, ele aguarda esse número de segundos após a requisição antes de usar o BeautifulSoup para analisar o HTML da página. Se for None ou 0, ele usa o BeautifulSoup para analisar o HTML da página imediatamente após a requisição.
+        \n\t`params_page (str, float, int, MotorAssincrono, PoolNavegadores or None)`: Um parâmetro que determina como processar a resposta da requisição GET. Se for uma `str` (ou o próprio tipo `str`), ele usa o Selenium, com o pool de navegadores `self.navegadores`, para carregar a página web e o BeautifulSoup para analisar o HTML da página. Se for um objeto `PoolNavegadores`, as páginas são renderizadas em paralelo pelos navegadores desse pool. Se for um número do tipo `float`, ele aguarda esse número de segundos após a requisição antes de usar o BeautifulSoup para analisar o HTML da página. Se for um objeto `MotorAssincrono`, as URLs são coletadas concorrentemente, com limites de concorrência global e por host e com o atraso aplicado por host. Se for None ou 0, ele usa o BeautifulSoup para analisar o HTML da página imediatamente após a requisição.
 
         Retorno:
         \n\t`None`
         """
-        good_urls = [url for url in self.urls.keys() if not self.urls[url]]
+        good_urls = [url for url, _ in self.fronteira.retirar_todos()]
+        self._coletar_lote(good_urls, params_page)
+
+    def _coletar_lote(self, good_urls, params_page) -> list:
+        """
+        Coleta uma lista de URLs e adiciona as páginas obtidas a `objects_url`.
+
+        Parâmetros:
+        \n\t`good_urls (list)`: As URLs a serem coletadas.
+        \n\t`params_page`: O modo de coleta (veja `extrair_informacoes`).
+
+        Retorno:
+        \n\t`list`: O objeto Url de cada URL, ou None se a página não pôde ser coletada, na mesma ordem das URLs.
+        """
+        return [self._registrar(url, html) if html is not None else None
+                for url, html in self.baixar(good_urls, params_page)]
+
+    def baixar(self, good_urls, params_page=None) -> list:
+        """
+        Baixa uma lista de URLs sem criar os objetos Url e registra na fronteira as páginas obtidas e as que falharam.
+
+        Este método é usado pelo `Pipeline`, que analisa e indexa as páginas em outros estágios, sem acumulá-las em `objects_url`.
+
+        Parâmetros:
+        \n\t`good_urls (list)`: As URLs a serem coletadas.
+        \n\t`params_page`: O modo de coleta (veja `extrair_informacoes`). O valor padrão é None.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(url, html)`, na mesma ordem das URLs. `html` é None se a página não pôde ser coletada.
+        """
+        if isinstance(params_page, str) or params_page is str:
+            if self.navegadores is None:
+                self.navegadores = PoolNavegadores()
+            params_page = self.navegadores
+        if isinstance(params_page, PoolNavegadores):
+            paginas = self._baixar_navegadores(good_urls, params_page)
+        elif isinstance(params_page, MotorAssincrono):
+            paginas = self._baixar_assincrono(good_urls, params_page)
+        else:
+            paginas = [(url, self._baixar_url(url, params_page))
+                       for url in good_urls]
+        for url, html in paginas:
+            self.fronteira.concluir(url, html is not None)
+        if METRICAS.ativo:
+            for url, html in paginas:
+                METRICAS.contar('coletor_paginas_total' if html is not None else 'coletor_falhas_total',
+                                host=urlparse(url).netloc)
+        return paginas
+
+    def _baixar_url(self, url, params_page):
+        """
+        Baixa uma URL de forma síncrona.
+
+        A requisição usa a sessão persistente do host. Se o robots.txt do host declarar um `Crawl-delay`, o host é adiado na fronteira por esse intervalo, e a próxima requisição a ele aguarda o tempo restante.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL a ser coletada.
+        \n\t`params_page`: O modo de coleta (veja `extrair_informacoes`).
+
+        Retorno:
+        \n\t`str or None`: O HTML da página, ou None se a página não pôde ser coletada.
+        """
+        if not self.can_fetch(url):
+            print(
+                f"A coleta da URL {url} é proibida pelo arquivo robots.txt.")
+            return None
+        espera = self.fronteira.espera(url)
+        if espera > 0:
+            time.sleep(espera)
+        with METRICAS.cronometro('coletor_download_segundos', host=urlparse(url).netloc):
+            response = self.sessoes.get(url, timeout=2000)
+        if METRICAS.ativo:
+            METRICAS.contar('coletor_bytes_total', len(
+                response.content), host=urlparse(url).netloc)
+        atraso = self.robots.atraso(url)
+        if atraso:
+            self.fronteira.adiar(url, atraso)
+        if isinstance(params_page, float):
+            time.sleep(params_page)
+        if response.status_code == 200:
+            return response.text
+        print(
+            f"Falha ao carregar a página: {response.status_code}")
+        return None
+
+    def _registrar(self, url, html) -> Url:
+        """
+        Cria o objeto Url de uma página coletada e o adiciona a `objects_url`.
+
+        O HTML é analisado uma única vez e a árvore do BeautifulSoup é liberada logo após a extração (veja `Url.de_html`).
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página.
+        \n\t`html (str)`: O HTML da página.
+
+        Retorno:
+        \n\t`Url`: O objeto Url criado.
+        """
+        with METRICAS.cronometro('coletor_analise_segundos'):
+            objeto = Url.de_html(url, html)
+        self.objects_url += [objeto]
+        return objeto
+
+    def _baixar_assincrono(self, good_urls, motor) -> list:
+        """
+        Baixa as URLs com o motor de coleta concorrente.
+
+        Parâmetros:
+        \n\t`good_urls (list)`: As URLs que ainda não foram coletadas.
+        \n\t`motor (MotorAssincrono)`: O motor de coleta concorrente.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(url, html)`, na mesma ordem das URLs.
+        """
+        paginas = []
+        for url, status, html in motor.coletar(good_urls, self.can_fetch, self.sessoes, self.robots.atraso):
+            if status is None:
+                print(
+                    f"A coleta da URL {url} é proibida pelo arquivo robots.txt.")
+            elif status == 0:
+                print(f"Falha ao carregar a página: {url}")
+            elif status != 200:
+                print(f"Falha ao carregar a página: {status}")
+            paginas.append((url, html if status == 200 else None))
+        return paginas
+
+    def _baixar_navegadores(self, good_urls, navegadores) -> list:
+        """
+        Baixa as URLs renderizando as páginas com o pool de navegadores.
+
+        As URLs proibidas pelo robots.txt são descartadas antes da renderização, e o `Crawl-delay` de cada host é respeitado pelo pool.
+
+        Parâmetros:
+        \n\t`good_urls (list)`: As URLs que ainda não foram coletadas.
+        \n\t`navegadores (PoolNavegadores)`: O pool de navegadores.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(url, html)`, na mesma ordem das URLs.
+        """
+        permitidas = []
         for url in good_urls:
             if self.can_fetch(url):
-                if isinstance(params_page, str) and params_page == str:
-                    self.driver = webdriver.Chrome()
-                    self.driver.get(url)
-                    soup = BeautifulSoup(
-                        self.driver.page_source, 'html.parser')  # 'html.parser', 'lxml', 'html5lib'
-                    self.objects_url += [Url(url, soup)]
-                    self.urls[url] = True
-                    self.driver.quit()
-                elif isinstance(params_page, float):
-                    response = requests.get(url, timeout=2000)
-                    time.sleep(params_page)
-                    if response.status_code == 200:
-                        self.objects_url += [
-                            Url(url, BeautifulSoup(response.text, 'html.parser'))]  # 'html.parser', 'lxml', 'html5lib'
-                        self.urls[url] = True
-                    else:
-                        print(
-                            f"Falha ao carregar a página: {response.status_code}")
-                else:
-                    response = requests.get(url, timeout=2000)
-                    if response.status_code == 200:
-                        self.objects_url += [Url(url,
-                                                 BeautifulSoup(response.text, 'html.parser'))]  # 'html.parser', 'lxml', 'html5lib'
-                        self.urls[url] = True
-                    else:
-                        print(
-                            f"Falha ao carregar a página: {response.status_code}")
+                permitidas.append(url)
             else:
                 print(
                     f"A coleta da URL {url} é proibida pelo arquivo robots.txt.")
+        renderizadas = dict(navegadores.renderizar(
+            permitidas, self.robots.atraso))
+        return [(url, renderizadas.get(url)) for url in good_urls]
 
-    def extrair_em_profundidade(self, profundidade=0, params=None) -> None:
+    def extrair_em_profundidade(self, profundidade=0, params=None, mesmo_dominio=True) -> None:
         """
-        Extrai informações das URLs até a profundidade especificada.
+        Extrai informações das URLs em largura (BFS) até a profundidade especificada.
 
-        Quando a profundidade é 0, este método extrai informações de todas as URLs do mesmo domínio que a primeira URL adicionada ao Coletor. Quando a profundidade é um valor diferente de 0, ele extrai informações das URLs até essa profundidade.
+        As URLs adicionadas com `addUrl` têm profundidade 0. Os links de uma página coletada na profundidade d são inseridos na fronteira com profundidade d + 1, desde que d + 1 seja menor que `profundidade` e que o link ainda não tenha sido visto. A fronteira alterna entre os hosts e evita revarreduras das URLs já conhecidas, de modo que cada iteração custa O(1) por URL.
 
         Parâmetros:
-        \n\t`profundidade (int)`: A profundidade até a qual as informações das URLs devem ser extraídas. O valor padrão é 0, o que significa que as informações de todas as URLs do mesmo domínio que a primeira URL serão extraídas.
-        \n\t`params`: Parâmetros adicionais que podem ser passados para o método `extrair_informacoes`. O valor padrão é None.
+        \n\t`profundidade (int)`: O número de níveis a coletar. O valor padrão é 0, o que significa que apenas as URLs pendentes são coletadas, uma única vez, sem seguir links (o mesmo que 1).
+        \n\t`params`: Parâmetros adicionais que podem ser passados para o método `extrair_informacoes` (inclusive um `MotorAssincrono` ou um `PoolNavegadores`). O valor padrão é None.
+        \n\t`mesmo_dominio (bool)`: Se True, apenas os links dos mesmos hosts das URLs pendentes são seguidos. O valor padrão é True.
 
         Retorno:
         \n\t`None`
         """
-        if profundidade == 0:
-            # Extrair todos os links do mesmo domínio que o URL inicial
-            url_inicial = list(self.urls.keys())[0]
-            dominio = urlparse(url_inicial).netloc
-            good_urls = [url for url in self.urls.keys() if urlparse(
-                url).netloc == dominio and not self.urls[url]]
-            for url in good_urls:
-                self.extrair_informacoes(params)
-        else:
-            # Extrair links até a profundidade especificada
-            for i in range(profundidade):
-                good_urls = [url for url in self.urls.keys()
-                             if not self.urls[url]]
-                if not good_urls:
-                    break
-                self.extrair_informacoes(params)
+        if profundidade <= 1:
+            self.extrair_informacoes(params)
+            return
+
+        if mesmo_dominio:
+            self.restringir_dominio()
+        tamanho = self.tamanho_lote(params)
+        while self.fronteira:
+            lote = self.fronteira.retirar_lote(tamanho)
+            objetos = self._coletar_lote([url for url, _ in lote], params)
+            for (url, nivel), objeto in zip(lote, objetos):
+                if objeto is None or nivel + 1 >= profundidade:
+                    continue
+                self.seguir_links(Coletor.links_absolutos(
+                    url, objeto.links), nivel + 1)
+
+    def restringir_dominio(self) -> None:
+        """
+        Restringe a fronteira aos hosts das URLs pendentes, se ela ainda não tiver uma restrição de hosts.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if self.fronteira.hosts_permitidos is None:
+            self.fronteira.hosts_permitidos = self.fronteira.hosts_pendentes()
+
+    def tamanho_lote(self, params) -> int:
+        """
+        Devolve quantas URLs retirar da fronteira por vez para o modo de coleta.
+
+        Parâmetros:
+        \n\t`params`: O modo de coleta (veja `extrair_informacoes`).
+
+        Retorno:
+        \n\t`int`: A concorrência do `MotorAssincrono`, o número de navegadores do `PoolNavegadores`, ou 1.
+        """
+        if isinstance(params, MotorAssincrono):
+            return params.concorrencia
+        if isinstance(params, PoolNavegadores):
+            return params.navegadores
+        return 1
+
+    def seguir_links(self, links, nivel) -> None:
+        """
+        Insere na fronteira os links ainda não vistos, com a profundidade especificada.
+
+        Parâmetros:
+        \n\t`links (list)`: As URLs absolutas dos links.
+        \n\t`nivel (int)`: A profundidade dos links.
+
+        Retorno:
+        \n\t`None`
+        """
+        for link in links:
+            self.fronteira.adicionar(link, nivel)
+
+    @staticmethod
+    def links_absolutos(url, hrefs) -> list:
+        """
+        Devolve os links absolutos (HTTP ou HTTPS, sem fragmento) de uma página coletada.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página.
+        \n\t`hrefs (iterable)`: Os endereços (`href`) dos links da página.
+
+        Retorno:
+        \n\t`list`: As URLs absolutas dos links da página.
+        """
+        links = []
+        for href in hrefs:
+            if not href:
+                continue
+            absoluta = urldefrag(urljoin(url, href.strip()))[0]
+            if urlparse(absoluta).scheme in ('http', 'https'):
+                links.append(absoluta)
+        return links
@@ -0,0 +1,241 @@
+########## ConjuntoVistos.py ##########
+import hashlib
+import math
+import os
+import sqlite3
+
+
+class ConjuntoVistos:
+    """
+    A classe ConjuntoVistos é o conjunto compacto das URLs já vistas pela `Fronteira`, com um filtro de Bloom na memória e, opcionalmente, um armazenamento exato em disco.
+
+    O filtro de Bloom guarda apenas `k` bits por URL em um vetor de bits, e não a URL inteira: com a taxa de erro padrão de 0,1% (0,05% no primeiro filtro), são cerca de 16 bits (2 bytes) por URL, independentemente do tamanho da URL. O vetor de cada filtro é alocado inteiro na sua criação, de modo que a memória por chave só se aproxima desse valor quando o filtro está perto da sua capacidade. O filtro nunca erra ao dizer que uma URL é nova, mas pode dizer que uma URL nova já foi vista (um falso positivo, com probabilidade `erro`). Quando o filtro atinge a sua capacidade, um filtro novo, com o dobro da capacidade e metade da taxa de erro, é criado (filtro de Bloom escalável), de modo que a capacidade inicial não limita a coleta e a taxa de erro total continua abaixo de `erro`. As posições dos bits de uma URL são derivadas de um único hash BLAKE2b de 128 bits (hash duplo), estável entre processos e execuções.
+
+    Sem armazenamento em disco, um falso positivo faz a fronteira descartar uma URL nova. Com `arquivo`, as URLs também são gravadas em uma tabela SQLite, e cada resposta positiva do filtro é confirmada no disco, de modo que o conjunto é exato; como o filtro responde sozinho as URLs novas (a maioria dos links de uma coleta em largura), o disco só é consultado para as URLs repetidas. O arquivo também permite retomar uma coleta: ao abrir um arquivo existente, o filtro é reconstruído a partir das URLs gravadas.
+
+    Atributos:
+    \n\t`capacidade (int)`: O número de URLs do primeiro filtro.
+    \n\t`erro (float)`: A taxa de falsos positivos máxima do conjunto de filtros.
+    \n\t`arquivo (str or None)`: O arquivo SQLite do armazenamento exato, ou None para usar apenas o filtro.
+
+    Métodos:
+    \n\t`adicionar(chave) -> bool`: Insere uma chave e devolve se ela era nova.
+    \n\t`estatisticas() -> dict`: Devolve o número de chaves, a memória usada por chave e as consultas ao disco.
+    \n\t`fechar() -> None`: Grava as chaves pendentes e fecha o armazenamento em disco.
+
+    Exemplo:
+    >>> vistos = ConjuntoVistos(capacidade=1_000_000, arquivo="vistos.db")
+    >>> vistos.adicionar("https://www.ifmg.edu.br/")
+    True
+    >>> "https://www.ifmg.edu.br/" in vistos
+    True
+    >>> vistos.estatisticas()["bytes_por_chave"]
+    1977536.0
+    >>> for i in range(999_999):
+    ...     vistos.adicionar(f"https://www.ifmg.edu.br/pagina/{i}")
+    >>> vistos.estatisticas()["bytes_por_chave"]
+    1.98
+    """
+
+    # O número de inserções entre duas gravações (commits) do armazenamento em disco
+    LOTE = 10000
+
+    def __init__(self, capacidade=100000, erro=0.001, arquivo=None) -> None:
+        """
+        O construtor da classe ConjuntoVistos.
+
+        Parâmetros:
+        \n\t`capacidade (int)`: O número de URLs do primeiro filtro. O valor padrão é 100000.
+        \n\t`erro (float)`: A taxa de falsos positivos máxima. O valor padrão é 0.001.
+        \n\t`arquivo (str or None)`: O arquivo SQLite do armazenamento exato. O valor padrão é None (apenas o filtro).
+
+        Retorno:
+        \n\t`None`
+        """
+        if not 0 < erro < 1:
+            raise ValueError(f"A taxa de erro deve estar entre 0 e 1: {erro}")
+        self.capacidade = max(1, capacidade)
+        self.erro = erro
+        self.arquivo = arquivo
+        self._filtros = []
+        self._itens = 0
+        self._consultas_disco = 0
+        self._falsos_positivos = 0
+        self._nao_gravados = 0
+        self._conexao = None
+        self._novo_filtro()
+        if arquivo is not None:
+            existia = os.path.exists(arquivo)
+            self._conexao = sqlite3.connect(arquivo)
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS vistos (chave TEXT PRIMARY KEY) WITHOUT ROWID")
+            if existia:
+                for (chave,) in self._conexao.execute("SELECT chave FROM vistos"):
+                    self._inserir(_hash(chave))
+                    self._itens += 1
+
+    def _novo_filtro(self) -> None:
+        """
+        Cria um filtro com o dobro da capacidade e metade da taxa de erro do filtro anterior.
+
+        O primeiro filtro tem a taxa de erro `erro / 2`, de modo que a soma das taxas de todos os filtros é menor que `erro`.
+        """
+        ordem = len(self._filtros)
+        capacidade = self.capacidade << ordem
+        erro = self.erro / (2 << ordem)
+        bits = max(8, math.ceil(-capacidade * math.log(erro) / math.log(2) ** 2))
+        hashes = max(1, round(bits / capacidade * math.log(2)))
+        self._filtros.append(_Filtro(bytearray((bits + 7) // 8), bits, hashes, capacidade))
+
+    def _inserir(self, digest) -> None:
+        """
+        Insere um hash no filtro atual, criando um filtro novo quando ele está cheio.
+        """
+        filtro = self._filtros[-1]
+        if filtro.itens >= filtro.capacidade:
+            self._novo_filtro()
+            filtro = self._filtros[-1]
+        filtro.inserir(digest)
+
+    def _no_filtro(self, digest) -> bool:
+        """
+        Verifica se um hash está em algum dos filtros.
+        """
+        for filtro in self._filtros:
+            if filtro.contem(digest):
+                return True
+        return False
+
+    def _no_disco(self, chave) -> bool:
+        """
+        Confirma no armazenamento em disco uma resposta positiva do filtro.
+        """
+        self._consultas_disco += 1
+        encontrada = self._conexao.execute(
+            "SELECT 1 FROM vistos WHERE chave = ?", (chave,)).fetchone() is not None
+        if not encontrada:
+            self._falsos_positivos += 1
+        return encontrada
+
+    def adicionar(self, chave) -> bool:
+        """
+        Insere uma chave (normalmente uma URL normalizada) no conjunto.
+
+        Parâmetros:
+        \n\t`chave (str)`: A chave.
+
+        Retorno:
+        \n\t`bool`: Retorna True se a chave era nova, ou False se ela já estava no conjunto. Sem armazenamento em disco, uma chave nova é considerada vista com probabilidade menor que `erro`.
+        """
+        digest = _hash(chave)
+        if self._no_filtro(digest) and (self._conexao is None or self._no_disco(chave)):
+            return False
+        self._inserir(digest)
+        self._itens += 1
+        if self._conexao is not None:
+            self._conexao.execute(
+                "INSERT OR IGNORE INTO vistos (chave) VALUES (?)", (chave,))
+            self._nao_gravados += 1
+            if self._nao_gravados >= ConjuntoVistos.LOTE:
+                self._conexao.commit()
+                self._nao_gravados = 0
+        return True
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas do conjunto.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: O número de chaves (`chaves`), de filtros (`filtros`), os bytes dos filtros na memória (`bytes`) e por chave (`bytes_por_chave`), a taxa de erro estimada para os filtros atuais (`erro_estimado`), as consultas ao disco (`consultas_disco`) e os falsos positivos do filtro corrigidos pelo disco (`falsos_positivos`).
+        """
+        tamanho = sum(len(filtro.bits) for filtro in self._filtros)
+        return {
+            'chaves': self._itens,
+            'filtros': len(self._filtros),
+            'bytes': tamanho,
+            'bytes_por_chave': round(tamanho / self._itens, 2) if self._itens else 0.0,
+            'erro_estimado': sum(filtro.erro() for filtro in self._filtros),
+            'consultas_disco': self._consultas_disco,
+            'falsos_positivos': self._falsos_positivos,
+        }
+
+    def fechar(self) -> None:
+        """
+        Grava as chaves pendentes e fecha o armazenamento em disco. O filtro continua disponível para consultas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if self._conexao is not None:
+            self._conexao.commit()
+            self._conexao.close()
+            self._conexao = None
+
+    def __contains__(self, chave) -> bool:
+        return self._no_filtro(_hash(chave)) and (self._conexao is None or self._no_disco(chave))
+
+    def __len__(self) -> int:
+        return self._itens
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao) -> None:
+        self.fechar()
+
+
+class _Filtro:
+    """
+    Um filtro de Bloom com `n_bits` bits e `hashes` posições por chave.
+    """
+
+    __slots__ = ('bits', 'n_bits', 'hashes', 'capacidade', 'itens')
+
+    def __init__(self, bits, n_bits, hashes, capacidade) -> None:
+        self.bits = bits
+        self.n_bits = n_bits
+        self.hashes = hashes
+        self.capacidade = capacidade
+        self.itens = 0
+
+    def _posicoes(self, digest):
+        """
+        Gera as posições dos bits de um hash de 128 bits (hash duplo: h1 + i * h2).
+        """
+        h1, h2 = digest
+        n_bits = self.n_bits
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % n_bits
+
+    def inserir(self, digest) -> None:
+        bits = self.bits
+        for posicao in self._posicoes(digest):
+            bits[posicao >> 3] |= 1 << (posicao & 7)
+        self.itens += 1
+
+    def contem(self, digest) -> bool:
+        bits = self.bits
+        for posicao in self._posicoes(digest):
+            if not bits[posicao >> 3] & (1 << (posicao & 7)):
+                return False
+        return True
+
+    def erro(self) -> float:
+        """
+        Estima a taxa de falsos positivos do filtro com o número atual de chaves.
+        """
+        return (1 - math.exp(-self.hashes * self.itens / self.n_bits)) ** self.hashes
+
+
+def _hash(chave) -> tuple:
+    """
+    Devolve o hash BLAKE2b de 128 bits de uma chave, dividido em duas metades de 64 bits (a segunda sempre ímpar).
+    """
+    digest = hashlib.blake2b(chave.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
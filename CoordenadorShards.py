@@ -0,0 +1,433 @@
+import heapq
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from itertools import chain
+from multiprocessing.connection import wait
+from Buscador import Buscador
+from IndiceBinario import IndiceBinario, postings_validos
+
+
+class CoordenadorShards:
+    """
+    A classe CoordenadorShards distribui as consultas entre os shards de um índice particionado e combina os resultados (scatter-gather).
+
+    O índice particionado é gravado pelo `Indexador` (`save_index(shards=N)`): cada documento pertence ao shard `crc32(url) % N`, e cada shard é um índice binário completo (veja `IndiceBinario`) em um subdiretório `shard-NNN`. Os postings de todos os shards guardam as estatísticas globais de cada termo (F e n_i de toda a coleção), de modo que a pontuação de um documento no seu shard é igual à pontuação no índice não particionado.
+
+    Cada shard é atendido por um processo trabalhador com o seu próprio `Buscador`, ligado ao coordenador por um `multiprocessing.Pipe`. Uma consulta é enviada a todos os shards ao mesmo tempo; cada shard devolve o seu top-k, e o top-k global é selecionado entre eles com o mesmo critério de `Buscador.rank` (pontuação decrescente e, em caso de empate, a URL). Os shards que não respondem dentro de `timeout` segundos são ignorados, e o resultado é marcado como parcial. Um trabalhador que terminou inesperadamente é reiniciado na consulta seguinte.
+
+    Atributos:
+    \n\t`diretorio (str)`: O diretório do índice particionado.
+    \n\t`n_shards (int)`: O número de shards.
+    \n\t`timeout (float)`: O tempo máximo de espera pelas respostas dos shards, em segundos.
+
+    Métodos:
+    \n\t`escrever(diretorio, inverted_index, shards) -> None`: Grava um índice invertido particionado em shards.
+    \n\t`shard(url, shards) -> int`: Devolve o shard de uma URL.
+    \n\t`eh_particionado(diretorio) -> bool`: Verifica se um diretório contém um índice particionado.
+    \n\t`apagar(diretorio) -> None`: Apaga o manifesto e os shards de um índice particionado.
+    \n\t`buscar(query, k=10) -> dict`: Ranqueia os documentos e informa os shards que não responderam.
+    \n\t`rank(query, k=10, modo='ou') -> list`: Ranqueia os documentos, como `Buscador.rank`.
+    \n\t`rank_many(queries, k=10) -> list`: Ranqueia um lote de consultas, enviando o lote inteiro a cada shard.
+    \n\t`estatisticas() -> dict`: Devolve o número de consultas, de respostas parciais e de reinícios de trabalhadores.
+    \n\t`fechar() -> None`: Encerra os processos trabalhadores.
+
+    Exemplo:
+    >>> indexer.save_index(shards=4)
+    index-Root = 4 shards
+    >>> with CoordenadorShards("index-Root", timeout=1.0) as coordenador:
+    ...     coordenador.rank("ifmg")
+    [('https://www.ifmg.edu.br', 3.58)]
+    """
+
+    MANIFESTO = 'shards.json'
+    _SHARD = re.compile(r'shard-(\d{3,})$')
+
+    def __init__(self, diretorio, timeout=2.0) -> None:
+        """
+        O construtor da classe CoordenadorShards.
+
+        Este método lê o manifesto do índice particionado e inicia um processo trabalhador para cada shard.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório do índice particionado.
+        \n\t`timeout (float)`: O tempo máximo de espera pelas respostas dos shards, em segundos. O valor padrão é 2.0.
+
+        Retorno:
+        \n\t`None`
+        """
+        with open(os.path.join(diretorio, self.MANIFESTO), 'r') as file:
+            manifesto = json.load(file)
+        self.diretorio = diretorio
+        self.n_shards = manifesto['shards']
+        self.timeout = timeout
+        self._contexto = multiprocessing.get_context()
+        self._trabalhadores = [None] * self.n_shards
+        self._lock = threading.Lock()
+        self._requisicao = 0
+        self._consultas = 0
+        self._parciais = 0
+        self._reinicios = 0
+        for posicao in range(self.n_shards):
+            self._iniciar(posicao)
+
+    @staticmethod
+    def shard(url, shards) -> int:
+        """
+        Devolve o shard de uma URL.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL do documento.
+        \n\t`shards (int)`: O número de shards.
+
+        Retorno:
+        \n\t`int`: O número do shard, entre 0 e `shards - 1`.
+        """
+        return zlib.crc32(url.encode('utf-8')) % shards
+
+    @staticmethod
+    def caminho_shard(diretorio, posicao) -> str:
+        """
+        Devolve o subdiretório de um shard.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório do índice particionado.
+        \n\t`posicao (int)`: O número do shard.
+
+        Retorno:
+        \n\t`str`: O caminho do subdiretório do shard.
+        """
+        return os.path.join(diretorio, f"shard-{posicao:03d}")
+
+    @staticmethod
+    def eh_particionado(diretorio) -> bool:
+        """
+        Verifica se um diretório contém um índice particionado.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório.
+
+        Retorno:
+        \n\t`bool`: Retorna True se o diretório tiver um manifesto de shards.
+        """
+        return os.path.isfile(os.path.join(diretorio, CoordenadorShards.MANIFESTO))
+
+    @staticmethod
+    def escrever(diretorio, inverted_index, shards) -> None:
+        """
+        Grava um índice invertido particionado em shards.
+
+        Os postings de cada termo são divididos pelo shard das suas URLs e cada shard é gravado como um índice binário. Os valores de F e n_i dos postings não são alterados: eles continuam sendo as estatísticas globais do termo, calculadas sobre toda a coleção. Chaves cujos valores não são postings no formato `[f, F, n_i, w_ij]` são ignoradas.
+
+        Depois que o manifesto é gravado, os arquivos de um índice binário não particionado no mesmo diretório (veja `IndiceBinario.apagar`) e os shards excedentes de uma partição anterior com mais shards são apagados.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório onde o índice será gravado.
+        \n\t`inverted_index (dict)`: O índice invertido no formato `{termo: {url: [f, F, n_i, w_ij]}}`, com as estatísticas globais.
+        \n\t`shards (int)`: O número de shards.
+
+        Retorno:
+        \n\t`None`
+        """
+        if shards < 1:
+            raise ValueError(f"Número de shards inválido: {shards}")
+        particoes = [{} for _ in range(shards)]
+        destinos = {}
+        for termo, postings in inverted_index.items():
+            if not postings_validos(postings):
+                continue
+            for url, valores in postings.items():
+                posicao = destinos.get(url)
+                if posicao is None:
+                    posicao = destinos[url] = CoordenadorShards.shard(
+                        url, shards)
+                particoes[posicao].setdefault(termo, {})[url] = valores
+        os.makedirs(diretorio, exist_ok=True)
+        for posicao, particao in enumerate(particoes):
+            IndiceBinario.escrever(
+                CoordenadorShards.caminho_shard(diretorio, posicao), particao)
+        caminho = os.path.join(diretorio, CoordenadorShards.MANIFESTO)
+        with open(caminho + '.tmp', 'w') as file:
+            json.dump({'shards': shards, 'particao': 'crc32',
+                      'documentos': len(destinos)}, file, indent=4)
+        os.replace(caminho + '.tmp', caminho)
+        IndiceBinario.apagar(diretorio)
+        CoordenadorShards._remover_shards(diretorio, shards)
+
+    @staticmethod
+    def apagar(diretorio) -> None:
+        """
+        Apaga o manifesto e os shards de um índice particionado, quando o diretório passa a guardar um índice binário não particionado.
+
+        O manifesto é apagado primeiro, de modo que o diretório deixa de ser reconhecido como particionado antes que os shards sejam apagados.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório do índice.
+
+        Retorno:
+        \n\t`None`
+        """
+        manifesto = os.path.join(diretorio, CoordenadorShards.MANIFESTO)
+        if os.path.exists(manifesto):
+            os.remove(manifesto)
+        CoordenadorShards._remover_shards(diretorio, 0)
+
+    @staticmethod
+    def _remover_shards(diretorio, inicio) -> None:
+        """
+        Apaga os subdiretórios dos shards a partir do shard `inicio`.
+        """
+        if not os.path.isdir(diretorio):
+            return
+        for nome in os.listdir(diretorio):
+            encontrado = CoordenadorShards._SHARD.match(nome)
+            if encontrado is not None and int(encontrado.group(1)) >= inicio:
+                shutil.rmtree(os.path.join(diretorio, nome),
+                              ignore_errors=True)
+
+    def _iniciar(self, posicao) -> None:
+        """
+        Inicia o processo trabalhador de um shard.
+
+        Parâmetros:
+        \n\t`posicao (int)`: O número do shard.
+
+        Retorno:
+        \n\t`None`
+        """
+        conexao, conexao_trabalhador = self._contexto.Pipe()
+        processo = self._contexto.Process(
+            target=_servir_shard, daemon=True,
+            args=(self.caminho_shard(self.diretorio, posicao), conexao_trabalhador))
+        processo.start()
+        conexao_trabalhador.close()
+        self._trabalhadores[posicao] = (processo, conexao)
+
+    def _descartar(self, posicao) -> None:
+        """
+        Encerra o processo trabalhador de um shard, que será reiniciado na próxima consulta.
+
+        Parâmetros:
+        \n\t`posicao (int)`: O número do shard.
+
+        Retorno:
+        \n\t`None`
+        """
+        trabalhador = self._trabalhadores[posicao]
+        self._trabalhadores[posicao] = None
+        if trabalhador is not None:
+            processo, conexao = trabalhador
+            conexao.close()
+            if processo.is_alive():
+                processo.terminate()
+            processo.join(0.1)
+
+    def _distribuir(self, metodo, argumentos) -> tuple:
+        """
+        Envia uma requisição a todos os shards e aguarda as respostas até o fim do prazo.
+
+        Cada requisição recebe um identificador, e as respostas atrasadas de requisições anteriores são descartadas.
+
+        Parâmetros:
+        \n\t`metodo (str)`: O método do `Buscador` a executar nos shards.
+        \n\t`argumentos (tuple)`: Os argumentos do método.
+
+        Retorno:
+        \n\t`tuple`: A lista das respostas recebidas e a lista, em ordem crescente, dos shards que não responderam.
+        """
+        with self._lock:
+            self._requisicao += 1
+            requisicao = self._requisicao
+            pendentes = {}
+            falhas = []
+            for posicao in range(self.n_shards):
+                trabalhador = self._trabalhadores[posicao]
+                if trabalhador is None or not trabalhador[0].is_alive():
+                    self._descartar(posicao)
+                    self._iniciar(posicao)
+                    self._reinicios += 1
+                conexao = self._trabalhadores[posicao][1]
+                try:
+                    conexao.send((requisicao, metodo, argumentos))
+                except OSError:
+                    self._descartar(posicao)
+                    falhas.append(posicao)
+                    continue
+                pendentes[conexao] = posicao
+
+            respostas = []
+            prazo = time.monotonic() + self.timeout
+            while pendentes:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                for conexao in wait(list(pendentes), restante):
+                    try:
+                        identificador, sucesso, valor = conexao.recv()
+                    except (EOFError, OSError):
+                        # O trabalhador terminou durante a consulta
+                        posicao = pendentes.pop(conexao)
+                        self._descartar(posicao)
+                        falhas.append(posicao)
+                        continue
+                    if identificador != requisicao:
+                        continue
+                    posicao = pendentes.pop(conexao)
+                    if sucesso:
+                        respostas.append(valor)
+                    else:
+                        print(f"Falha no shard {posicao}: {valor}")
+                        falhas.append(posicao)
+            falhas.extend(pendentes.values())
+            return respostas, sorted(falhas)
+
+    def buscar(self, query, k=10, modo='ou') -> dict:
+        """
+        Ranqueia os documentos em todos os shards e combina os resultados.
+
+        Como cada documento pertence a um único shard, a interseção dos postings de uma consulta com `modo='e'` pode ser feita separadamente em cada shard. Os shards não guardam posições, e as consultas por frase falham em todos eles.
+
+        Parâmetros:
+        \n\t`query (str)`: A consulta de pesquisa.
+        \n\t`k (int or None)`: O número de documentos a devolver. Se None, devolve o ranqueamento completo. O valor padrão é 10.
+        \n\t`modo (str)`: O modo de consulta (veja `Buscador.rank`). O valor padrão é 'ou'.
+
+        Retorno:
+        \n\t`dict`: Os `resultados` (uma lista de tuplas (URL, pontuação) em ordem decrescente de pontuação), os shards `sem_resposta` e o indicador `parcial`.
+        """
+        respostas, falhas = self._distribuir('rank', (query, k, modo))
+        return self._resultado(respostas, falhas, k)
+
+    def rank(self, query, k=10, modo='ou') -> list:
+        """
+        Ranqueia os documentos em todos os shards e devolve os k melhores.
+
+        Com todos os shards respondendo, o resultado é igual ao de `Buscador.rank` sobre o índice não particionado.
+
+        Parâmetros:
+        \n\t`query (str)`: A consulta de pesquisa.
+        \n\t`k (int or None)`: O número de documentos a devolver. Se None, devolve o ranqueamento completo. O valor padrão é 10.
+        \n\t`modo (str)`: O modo de consulta (veja `Buscador.rank`). O valor padrão é 'ou'.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas (URL, pontuação) classificadas em ordem decrescente de pontuação.
+        """
+        return self.buscar(query, k, modo)['resultados']
+
+    def rank_many(self, queries, k=10) -> list:
+        """
+        Ranqueia um lote de consultas, enviando o lote inteiro a cada shard em uma única requisição (veja `Buscador.rank_many`).
+
+        Parâmetros:
+        \n\t`queries (list)`: As consultas de pesquisa.
+        \n\t`k (int or None)`: O número de documentos a devolver por consulta. O valor padrão é 10.
+
+        Retorno:
+        \n\t`list`: Uma lista com o resultado de `buscar` para cada consulta, na mesma ordem das consultas.
+        """
+        respostas, falhas = self._distribuir('rank_many', (list(queries), k))
+        return [self._resultado([resposta[posicao] for resposta in respostas], falhas, k)
+                for posicao in range(len(queries))]
+
+    def _resultado(self, respostas, falhas, k) -> dict:
+        """
+        Combina os top-k parciais dos shards em um top-k global.
+
+        Cada documento pertence a um único shard e o top-k global está contido na união dos top-k dos shards, pois todos usam o mesmo critério de ordenação.
+
+        Parâmetros:
+        \n\t`respostas (list)`: Os resultados de cada shard que respondeu.
+        \n\t`falhas (list)`: Os shards que não responderam.
+        \n\t`k (int or None)`: O número de documentos a devolver.
+
+        Retorno:
+        \n\t`dict`: Os resultados combinados, os shards sem resposta e o indicador de resultado parcial.
+        """
+        self._consultas += 1
+        if falhas:
+            self._parciais += 1
+        candidatos = chain.from_iterable(respostas)
+        if k is None:
+            resultados = sorted(candidatos, key=lambda x: (-x[1], x[0]))
+        else:
+            resultados = heapq.nsmallest(
+                k, candidatos, key=lambda x: (-x[1], x[0]))
+        return {'resultados': resultados, 'sem_resposta': falhas, 'parcial': bool(falhas)}
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas do coordenador.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: O número de shards, de consultas, de respostas parciais e de reinícios de trabalhadores.
+        """
+        return {
+            'shards': self.n_shards,
+            'consultas': self._consultas,
+            'respostas_parciais': self._parciais,
+            'reinicios': self._reinicios,
+        }
+
+    def fechar(self) -> None:
+        """
+        Encerra os processos trabalhadores.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        with self._lock:
+            for trabalhador in self._trabalhadores:
+                if trabalhador is not None:
+                    try:
+                        trabalhador[1].send(None)
+                    except OSError:
+                        pass
+            for trabalhador in self._trabalhadores:
+                if trabalhador is not None:
+                    trabalhador[0].join(1.0)
+            for posicao in range(self.n_shards):
+                self._descartar(posicao)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.fechar()
+
+
+def _servir_shard(caminho, conexao) -> None:
+    """
+    Laço do processo trabalhador de um shard: responde às requisições do coordenador com um `Buscador` sobre o shard.
+
+    Parâmetros:
+    \n\t`caminho (str)`: O diretório do shard.
+    \n\t`conexao (multiprocessing.connection.Connection)`: A conexão com o coordenador.
+
+    Retorno:
+    \n\t`None`
+    """
+    buscador = Buscador(caminho)
+    while True:
+        try:
+            mensagem = conexao.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if mensagem is None:
+            return
+        requisicao, metodo, argumentos = mensagem
+        try:
+            conexao.send((requisicao, True, getattr(
+                buscador, metodo)(*argumentos)))
+        except Exception as erro:
+            conexao.send((requisicao, False, repr(erro)))
@@ -0,0 +1,237 @@
+########## Duplicatas.py ##########
+import hashlib
+from array import array
+from functools import lru_cache
+from Tokenizador import Tokenizador
+
+
+class Duplicatas:
+    """
+    A classe Duplicatas detecta páginas quase duplicadas (espelhos, a mesma notícia em várias URLs) antes da indexação, com assinaturas MinHash e um índice LSH por bandas.
+
+    A semelhança entre duas páginas é a semelhança de Jaccard entre os conjuntos dos seus tokens (título, subtítulos e parágrafos, sem as stop words). A assinatura MinHash de uma página estima essa semelhança: a fração de posições iguais nas assinaturas de duas páginas é, em média, a semelhança de Jaccard entre elas. As assinaturas são calculadas com um único hash por token (one permutation hashing): o hash escolhe uma das `permutacoes` posições da assinatura, e cada posição guarda o menor hash que recebeu. As posições vazias são preenchidas pela posição seguinte não vazia (densificação por rotação).
+
+    As assinaturas são divididas em `bandas` bandas, e cada banda indexa as páginas em um dicionário. Duas páginas são comparadas apenas se alguma banda das suas assinaturas for idêntica, o que acontece com probabilidade `1 - (1 - J ** linhas) ** bandas` para páginas com semelhança J: quase certa para páginas quase iguais e rara para páginas diferentes. Assim, cada página nova é comparada com poucas candidatas, em vez de todas as páginas já vistas. Uma candidata é considerada duplicada quando a semelhança estimada é pelo menos `limiar`.
+
+    A primeira página de cada grupo é mantida, e as demais são descartadas e registradas no grupo da original. O `Indexador` (com o parâmetro `duplicatas`) e o `Pipeline` descartam as páginas duplicadas antes de adicioná-las ao índice, e `estatisticas` informa quantos postings e tokens deixaram de ser indexados.
+
+    Atributos:
+    \n\t`limiar (float)`: A menor semelhança estimada entre duas páginas duplicadas.
+    \n\t`permutacoes (int)`: O número de posições de uma assinatura.
+    \n\t`bandas (int)`: O número de bandas do índice LSH. Deve dividir `permutacoes`.
+    \n\t`minimo (int)`: O número mínimo de tokens distintos de uma página para que ela seja comparada. Páginas menores são sempre mantidas, pois poucas palavras não bastam para identificar um texto.
+    \n\t`grupos (dict)`: Um dicionário `{url_original: [urls_duplicadas]}`.
+
+    Métodos:
+    \n\t`assinatura(textos, permutacoes=64, minimo=1) -> array or None`: Calcula a assinatura MinHash dos textos de uma página.
+    \n\t`textos(objeto) -> list`: Devolve o título, os subtítulos e os parágrafos de uma página.
+    \n\t`verificar(url, assinatura, tokens=None) -> str or None`: Devolve a URL original se a página for duplicada, ou registra a página e devolve None.
+    \n\t`duplicata(objeto, tokens=None) -> str or None`: Calcula a assinatura de uma página (objeto Url) e a verifica.
+    \n\t`filtrar(paginas, stop_words=None)`: Gera apenas as páginas que não são duplicadas.
+    \n\t`estatisticas(bytes_por_posting=None) -> dict`: Devolve o número de páginas, de duplicatas e de postings e tokens economizados.
+
+    Exemplo:
+    >>> duplicatas = Duplicatas(limiar=0.8)
+    >>> indexer = Indexador(coletor, duplicatas=duplicatas)
+    >>> indexer.inverted_index_generator()
+    >>> duplicatas.estatisticas()
+    {'paginas': 128, 'duplicatas': 9, 'grupos': 4, 'postings_economizados': 412, 'tokens_economizados': 530}
+    """
+
+    MASCARA = 0xFFFFFFFF
+    # O incremento somado aos valores copiados na densificação, a cada posição de distância
+    ROTACAO = 0x9E3779B1
+
+    def __init__(self, limiar=0.8, permutacoes=64, bandas=16, minimo=5) -> None:
+        """
+        O construtor da classe Duplicatas.
+
+        Parâmetros:
+        \n\t`limiar (float)`: A menor semelhança estimada entre duas páginas duplicadas. O valor padrão é 0.8.
+        \n\t`permutacoes (int)`: O número de posições de uma assinatura. O valor padrão é 64.
+        \n\t`bandas (int)`: O número de bandas do índice LSH. Deve dividir `permutacoes`. O valor padrão é 16 (bandas de 4 posições).
+        \n\t`minimo (int)`: O número mínimo de tokens distintos de uma página para que ela seja comparada. O valor padrão é 5.
+
+        Retorno:
+        \n\t`None`
+        """
+        if permutacoes % bandas:
+            raise ValueError(
+                f"O número de bandas ({bandas}) deve dividir o número de permutações ({permutacoes})")
+        self.limiar = limiar
+        self.permutacoes = permutacoes
+        self.bandas = bandas
+        self.minimo = minimo
+        self.grupos = {}
+        self._linhas = permutacoes // bandas
+        self._indices = [{} for _ in range(bandas)]
+        self._paginas = 0
+        self._duplicatas = 0
+        self._postings = 0
+        self._tokens = 0
+
+    @staticmethod
+    def assinatura(textos, permutacoes=64, minimo=1):
+        """
+        Calcula a assinatura MinHash dos textos de uma página, com um único hash por token distinto.
+
+        Parâmetros:
+        \n\t`textos (iterable)`: Os textos da página.
+        \n\t`permutacoes (int)`: O número de posições da assinatura. O valor padrão é 64.
+        \n\t`minimo (int)`: O número mínimo de tokens distintos. O valor padrão é 1.
+
+        Retorno:
+        \n\t`array or None`: A assinatura (um `array('I')` com `permutacoes` valores de 32 bits), ou None se a página tiver menos de `minimo` tokens distintos.
+        """
+        tokens = set(Tokenizador.documento(textos))
+        if not tokens or len(tokens) < minimo:
+            return None
+        valores = [None] * permutacoes
+        for token in tokens:
+            valor, posicao = divmod(_hash(token), permutacoes)
+            valor &= Duplicatas.MASCARA
+            atual = valores[posicao]
+            if atual is None or valor < atual:
+                valores[posicao] = valor
+        originais = valores[:]
+        for posicao, valor in enumerate(originais):
+            if valor is None:
+                distancia = 1
+                while originais[(posicao + distancia) % permutacoes] is None:
+                    distancia += 1
+                valores[posicao] = (originais[(posicao + distancia) % permutacoes]
+                                    + distancia * Duplicatas.ROTACAO) & Duplicatas.MASCARA
+        return array('I', valores)
+
+    @staticmethod
+    def textos(objeto) -> list:
+        """
+        Devolve o título, os subtítulos e os parágrafos de uma página (objeto Url), os textos usados na assinatura.
+
+        Parâmetros:
+        \n\t`objeto (Url)`: A página.
+
+        Retorno:
+        \n\t`list`: Os textos da página.
+        """
+        textos = list(objeto.titles)
+        textos.extend(getattr(objeto, 'paragrafos', ()))
+        page = getattr(objeto, 'page', None)
+        if page:
+            textos.append(page)
+        return textos
+
+    def verificar(self, url, assinatura, tokens=None):
+        """
+        Verifica se uma página é duplicada de uma página já vista.
+
+        Se for, a página é registrada no grupo da original e os seus tokens são contabilizados como economizados. Caso contrário, a página é inserida no índice LSH e passa a ser a original do seu grupo.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página.
+        \n\t`assinatura (array or None)`: A assinatura da página (veja `assinatura`). Se None, a página é mantida.
+        \n\t`tokens (list or None)`: Os tokens que seriam indexados, usados para contabilizar os postings economizados.
+
+        Retorno:
+        \n\t`str or None`: A URL da página original, ou None se a página não for duplicada.
+        """
+        self._paginas += 1
+        if assinatura is None:
+            return None
+        linhas = self._linhas
+        chaves = [assinatura[inicio:inicio + linhas].tobytes()
+                  for inicio in range(0, self.permutacoes, linhas)]
+        minimo_iguais = self.limiar * self.permutacoes
+        comparadas = set()
+        for indice, chave in zip(self._indices, chaves):
+            for candidata, original in indice.get(chave, ()):
+                if original in comparadas:
+                    continue
+                comparadas.add(original)
+                iguais = sum(a == b for a, b in zip(assinatura, candidata))
+                if iguais >= minimo_iguais:
+                    self.grupos.setdefault(original, []).append(url)
+                    self._duplicatas += 1
+                    if tokens is not None:
+                        self._contabilizar(tokens)
+                    return original
+        for indice, chave in zip(self._indices, chaves):
+            indice.setdefault(chave, []).append((assinatura, url))
+        return None
+
+    def duplicata(self, objeto, tokens=None):
+        """
+        Calcula a assinatura de uma página (objeto Url) e a verifica (veja `verificar`).
+
+        Parâmetros:
+        \n\t`objeto (Url)`: A página.
+        \n\t`tokens (list or None)`: Os tokens que seriam indexados.
+
+        Retorno:
+        \n\t`str or None`: A URL da página original, ou None se a página não for duplicada.
+        """
+        assinatura = Duplicatas.assinatura(
+            Duplicatas.textos(objeto), self.permutacoes, self.minimo)
+        return self.verificar(objeto.url, assinatura, tokens)
+
+    def filtrar(self, paginas, stop_words=None):
+        """
+        Gera apenas as páginas que não são duplicadas, na ordem original.
+
+        Os tokens das páginas descartadas são calculados apenas para contabilizar os postings economizados.
+
+        Parâmetros:
+        \n\t`paginas (iterable)`: As páginas (objetos Url).
+        \n\t`stop_words (set or None)`: As stop words usadas na indexação. Se None, usa as stop words do `Tokenizador`.
+
+        Retorno:
+        \n\t`generator`: As páginas que não são duplicadas.
+        """
+        if stop_words is None:
+            stop_words = Tokenizador.STOP_WORDS
+        for objeto in paginas:
+            if self.duplicata(objeto) is None:
+                yield objeto
+            else:
+                self._contabilizar(Tokenizador.documento(
+                    objeto.titles, stop_words))
+
+    def _contabilizar(self, tokens) -> None:
+        """
+        Contabiliza os postings e os tokens de uma página descartada.
+        """
+        self._postings += len(set(tokens))
+        self._tokens += len(tokens)
+
+    def estatisticas(self, bytes_por_posting=None) -> dict:
+        """
+        Devolve as estatísticas das páginas verificadas.
+
+        Parâmetros:
+        \n\t`bytes_por_posting (float or None)`: O tamanho médio de um posting no índice gravado (veja `IndiceBinario.estatisticas`). Se informado, o resultado também estima os bytes economizados.
+
+        Retorno:
+        \n\t`dict`: O número de páginas verificadas (`paginas`), de duplicatas descartadas (`duplicatas`), de grupos com duplicatas (`grupos`) e de postings e tokens que deixaram de ser indexados (`postings_economizados`, `tokens_economizados`).
+        """
+        estatisticas = {
+            'paginas': self._paginas,
+            'duplicatas': self._duplicatas,
+            'grupos': len(self.grupos),
+            'postings_economizados': self._postings,
+            'tokens_economizados': self._tokens,
+        }
+        if bytes_por_posting is not None:
+            estatisticas['bytes_economizados'] = round(
+                self._postings * bytes_por_posting)
+        return estatisticas
+
+    def __len__(self) -> int:
+        return self._duplicatas
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash(token) -> int:
+    """
+    Devolve o hash de 64 bits de um token, estável entre processos e execuções. O resultado é guardado em cache.
+    """
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
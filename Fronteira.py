@@ -0,0 +1,263 @@
+import time
+from collections import deque
+from urllib.parse import urldefrag, urlparse
+from ConjuntoVistos import ConjuntoVistos
+from NormalizadorUrl import NormalizadorUrl
+
+
+class Fronteira:
+    """
+    A classe Fronteira é a fronteira de coleta: o conjunto de URLs descobertas que ainda serão coletadas.
+
+    As URLs pendentes ficam em filas FIFO separadas por host, e os hosts com URLs pendentes são atendidos em rodízio, de modo que um único host não monopoliza a coleta. Um host pode ser adiado (por exemplo, pelo `Crawl-delay` do seu robots.txt); enquanto ele estiver em espera, o rodízio dá preferência aos demais hosts. Cada URL guarda a sua profundidade (0 para as URLs iniciais). Inserir e retirar uma URL custam O(1) (enquanto nenhum host está em espera), e cada URL é inserida no máximo uma vez.
+
+    Cada URL é identificada pela sua forma normalizada (veja `NormalizadorUrl`), de modo que formas trivialmente diferentes do mesmo endereço (fragmento, maiúsculas no host, porta padrão, parâmetros de rastreamento, barra final) são inseridas uma única vez. A forma normalizada é usada apenas como chave do conjunto de URLs vistas, no escopo e no host da fila: a URL inserida, coletada e gravada no índice é a URL original, sem o fragmento, pois um servidor pode distinguir o que a normalização considera equivalente (por exemplo, a ordem de parâmetros repetidos). As URLs vistas ficam em um `ConjuntoVistos`, que guarda poucos bytes por URL em vez da URL inteira. A fronteira também guarda o estado da coleta: as URLs pendentes estão nas filas, e `concluir` registra as URLs coletadas e as que falharam.
+
+    Atributos:
+    \n\t`hosts_permitidos (set or None)`: Os hosts aceitos pela fronteira. Se None, todos os hosts são aceitos.
+    \n\t`filtro (callable or None)`: Uma função que recebe a URL e devolve se ela deve ser aceita.
+    \n\t`vistos (ConjuntoVistos)`: As chaves (veja `NormalizadorUrl.chave`) das URLs que já foram inseridas na fronteira.
+    \n\t`coletadas (int)`: O número de URLs coletadas com sucesso.
+    \n\t`falhas (int)`: O número de URLs que não puderam ser coletadas.
+
+    Métodos:
+    \n\t`adicionar(url, profundidade=0) -> bool`: Insere uma URL na fila do seu host, se a sua forma normalizada ainda não foi vista e está no escopo.
+    \n\t`retirar() -> tuple or None`: Retira a próxima URL, alternando entre os hosts.
+    \n\t`retirar_lote(tamanho) -> list`: Retira até `tamanho` URLs.
+    \n\t`retirar_todos() -> list`: Retira todas as URLs pendentes.
+    \n\t`no_escopo(url) -> bool`: Verifica se a URL está no escopo da fronteira.
+    \n\t`adiar(url, segundos) -> None`: Impede que o host da URL seja atendido antes de `segundos` segundos.
+    \n\t`espera(url) -> float`: Devolve quantos segundos faltam para o host da URL poder ser atendido.
+    \n\t`concluir(url, sucesso=True) -> None`: Registra uma URL retirada como coletada ou como falha.
+    \n\t`hosts_pendentes() -> set`: Devolve os hosts que têm URLs pendentes.
+    \n\t`estatisticas() -> dict`: Devolve o número de URLs vistas, pendentes, coletadas e com falha e as estatísticas do conjunto de URLs vistas.
+    \n\t`fechar() -> None`: Fecha o armazenamento em disco do conjunto de URLs vistas.
+
+    Exemplo:
+    >>> fronteira = Fronteira(hosts_permitidos={"www.ifmg.edu.br"})
+    >>> fronteira.adicionar("https://www.ifmg.edu.br")
+    True
+    >>> fronteira.adicionar("https://WWW.IFMG.edu.br:443/#topo")
+    False
+    >>> fronteira.adicionar("https://g1.globo.com")
+    False
+    >>> fronteira.retirar()
+    ('https://www.ifmg.edu.br', 0)
+    """
+
+    def __init__(self, hosts_permitidos=None, filtro=None, vistos=None) -> None:
+        """
+        O construtor da classe Fronteira.
+
+        Parâmetros:
+        \n\t`hosts_permitidos (set or None)`: Os hosts aceitos pela fronteira. Se None, todos os hosts são aceitos.
+        \n\t`filtro (callable or None)`: Uma função que recebe a URL normalizada e devolve se ela deve ser aceita. O valor padrão é None.
+        \n\t`vistos (ConjuntoVistos or None)`: O conjunto de URLs vistas. O valor padrão é None (um `ConjuntoVistos` apenas na memória).
+
+        Retorno:
+        \n\t`None`
+        """
+        self.hosts_permitidos = hosts_permitidos
+        self.filtro = filtro
+        self.vistos = vistos if vistos is not None else ConjuntoVistos()
+        self.coletadas = 0
+        self.falhas = 0
+        self._filas = {}
+        self._rodizio = deque()
+        self._pendentes = 0
+        self._disponivel = {}
+
+    def no_escopo(self, url) -> bool:
+        """
+        Verifica se a URL está no escopo da fronteira.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+
+        Retorno:
+        \n\t`bool`: Retorna True se o host da URL for permitido e a URL passar pelo filtro.
+        """
+        if self.hosts_permitidos is not None and urlparse(url).netloc not in self.hosts_permitidos:
+            return False
+        return self.filtro is None or self.filtro(url)
+
+    def adicionar(self, url, profundidade=0) -> bool:
+        """
+        Insere uma URL, sem o fragmento, no fim da fila do seu host. O escopo, o host e a chave no conjunto de URLs vistas são calculados a partir da URL normalizada (veja `NormalizadorUrl.normalizar`).
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+        \n\t`profundidade (int)`: A profundidade da URL. O valor padrão é 0.
+
+        Retorno:
+        \n\t`bool`: Retorna True se a URL foi inserida, ou False se ela já foi vista ou está fora do escopo.
+        """
+        normalizada = NormalizadorUrl.normalizar(url)
+        if not self.no_escopo(normalizada) or not self.vistos.adicionar(NormalizadorUrl.chave(normalizada)):
+            return False
+        host = urlparse(normalizada).netloc
+        fila = self._filas.get(host)
+        if fila is None:
+            fila = self._filas[host] = deque()
+        if not fila:
+            self._rodizio.append(host)
+        fila.append((urldefrag(url.strip()).url, profundidade))
+        self._pendentes += 1
+        return True
+
+    def retirar(self):
+        """
+        Retira a próxima URL, alternando entre os hosts que têm URLs pendentes.
+
+        Os hosts em espera (veja `adiar`) são pulados enquanto houver outro host disponível. Se todos estiverem em espera, o próximo host do rodízio é atendido e cabe a quem coleta aguardar `espera(url)`.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`tuple or None`: A tupla `(url, profundidade)`, ou None se a fronteira estiver vazia.
+        """
+        if not self._rodizio:
+            return None
+        if self._disponivel:
+            agora = time.monotonic()
+            for _ in range(len(self._rodizio)):
+                if self._disponivel.get(self._rodizio[0], 0) <= agora:
+                    break
+                self._rodizio.rotate(-1)
+        host = self._rodizio.popleft()
+        fila = self._filas[host]
+        item = fila.popleft()
+        if fila:
+            self._rodizio.append(host)
+        else:
+            del self._filas[host]
+        self._pendentes -= 1
+        return item
+
+    def retirar_lote(self, tamanho) -> list:
+        """
+        Retira até `tamanho` URLs, alternando entre os hosts.
+
+        Parâmetros:
+        \n\t`tamanho (int)`: O número máximo de URLs.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(url, profundidade)`.
+        """
+        lote = []
+        while len(lote) < tamanho and self._rodizio:
+            lote.append(self.retirar())
+        return lote
+
+    def retirar_todos(self) -> list:
+        """
+        Retira todas as URLs pendentes, alternando entre os hosts.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(url, profundidade)`.
+        """
+        return self.retirar_lote(self._pendentes)
+
+    def adiar(self, url, segundos) -> None:
+        """
+        Impede que o host da URL seja atendido antes de `segundos` segundos a partir de agora.
+
+        Parâmetros:
+        \n\t`url (str)`: Uma URL do host.
+        \n\t`segundos (float)`: O intervalo de espera.
+
+        Retorno:
+        \n\t`None`
+        """
+        self._disponivel[Fronteira._host(url)] = time.monotonic() + segundos
+
+    def espera(self, url) -> float:
+        """
+        Devolve quantos segundos faltam para o host da URL poder ser atendido.
+
+        Parâmetros:
+        \n\t`url (str)`: Uma URL do host.
+
+        Retorno:
+        \n\t`float`: O tempo de espera restante (0 se o host estiver disponível).
+        """
+        disponivel = self._disponivel.get(Fronteira._host(url))
+        if disponivel is None:
+            return 0.0
+        return max(0.0, disponivel - time.monotonic())
+
+    @staticmethod
+    def _host(url) -> str:
+        """
+        Devolve o host normalizado de uma URL, usado como chave das filas e das esperas.
+        """
+        return urlparse(NormalizadorUrl.normalizar(url)).netloc
+
+    def concluir(self, url, sucesso=True) -> None:
+        """
+        Registra uma URL retirada da fronteira como coletada ou como falha.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL retirada.
+        \n\t`sucesso (bool)`: Se True, a URL foi coletada; caso contrário, a coleta falhou. O valor padrão é True.
+
+        Retorno:
+        \n\t`None`
+        """
+        if sucesso:
+            self.coletadas += 1
+        else:
+            self.falhas += 1
+
+    def hosts_pendentes(self) -> set:
+        """
+        Devolve os hosts que têm URLs pendentes.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`set`: Os hosts (normalizados) das URLs pendentes.
+        """
+        return set(self._filas)
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas da fronteira.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: O número de URLs vistas (`vistas`), pendentes (`pendentes`), coletadas (`coletadas`) e com falha (`falhas`), o número de hosts com URLs pendentes (`hosts`) e as estatísticas do conjunto de URLs vistas (`conjunto`).
+        """
+        return {
+            'vistas': len(self.vistos),
+            'pendentes': self._pendentes,
+            'coletadas': self.coletadas,
+            'falhas': self.falhas,
+            'hosts': len(self._filas),
+            'conjunto': self.vistos.estatisticas(),
+        }
+
+    def fechar(self) -> None:
+        """
+        Fecha o armazenamento em disco do conjunto de URLs vistas (veja `ConjuntoVistos.fechar`).
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        self.vistos.fechar()
+
+    def __len__(self) -> int:
+        return self._pendentes
+
+    def __contains__(self, url) -> bool:
+        return NormalizadorUrl.chave(NormalizadorUrl.normalizar(url)) in self.vistos
@@ -1,12 +1,17 @@
 ########## Indexador.py ##########
+from ArmazemDocumentos import ArmazemDocumentos
+from Buscador import Buscador
 from Expressoes import Expressoes
+from CoordenadorShards import CoordenadorShards
+from IndexadorSPIMI import IndexadorSPIMI
+from IndiceBinario import IndiceBinario, limite_superior
+from IndiceSegmentado import IndiceSegmentado
+from Metricas import METRICAS
 import json
-import nltk  # natural language tokenize
-from bs4 import BeautifulSoup, element
-# stop words
-from nltk.corpus import stopwords
-nltk.download('stopwords')
-nltk.download('punkt')
+import os
+import multiprocessing
+from functools import partial
+from Tokenizador import Tokenizador
 
 
 class Indexador:
@@ -20,14 +25,24 @@ class Indexador:
     \n\t`stop_words (set)`: Um conjunto de palavras de parada.
     \n\t`inverted_index (dict)`: O índice invertido gerado.
     \n\t`F (dict)`: Um dicionário que armazena a frequência de cada token.
+    \n\t`limites (dict)`: Um dicionário que armazena, para cada token, o maior peso `wiq` entre os seus postings (limite superior usado no ranqueamento top-k).
+    \n\t`spimi (IndexadorSPIMI or None)`: O construtor de índice por blocos usado quando um limite de memória é informado. Nesse modo, `inverted_index` permanece vazio e o índice é gravado diretamente no formato binário.
+    \n\t`duplicatas (Duplicatas or None)`: O detector de páginas quase duplicadas. Se informado, as páginas duplicadas de páginas já indexadas são descartadas antes da indexação.
+    \n\t`posicoes (dict or None)`: As posições de cada token em cada página, no formato `{token: {url: [posicoes]}}`, registradas com `posicional=True` e usadas nas consultas por frase do `Buscador`. None se as posições não forem registradas.
+    \n\t`urls_indexadas (set)`: As URLs das páginas indexadas por este Indexador (passadas a `adicionar_documento` ou a `indexar_paralelo`), inclusive as páginas sem nenhum termo. No formato segmentado, as versões anteriores dessas URLs são apagadas.
+    \n\t`atributos (dict)`: Os atributos das páginas, no formato `{url: registro}`, com os registros comprimidos por `add_attr_inverted_index` e gravados por `save_index` no armazém de documentos (veja `ArmazemDocumentos`), fora do índice invertido.
 
     Métodos:
-    \n\t`__init__(self, coletor: Coletor)`: Inicializa um objeto Indexador com o Coletor especificado.
+    \n\t`__init__(self, coletor: Coletor, memoria=None, duplicatas=None, posicional=False)`: Inicializa um objeto Indexador com o Coletor especificado.
     \n\t`inverted_index_generator(self) -> None`: Gera o índice invertido.
+    \n\t`tokenizar(textos, stop_words) -> list`: Tokeniza os textos de uma página.
+    \n\t`adicionar_documento(self, url, tokenized_titles) -> None`: Adiciona uma página já tokenizada ao índice invertido.
+    \n\t`indexar_paralelo(self, processos=None, paginas=None, tamanho_lote=256) -> None`: Gera o índice invertido tokenizando as páginas em um pool de processos.
+    \n\t`mesclar_parcial(self, parcial) -> None`: Combina um índice parcial com o índice invertido.
     \n\t`update_F(self) -> None`: Atualiza a frequência de cada token no índice invertido.
-    \n\t`save_index(self) -> None`: Salva o índice invertido em um arquivo JSON.
+    \n\t`save_index(self, formato='binario', matriz=False, shards=None) -> None`: Salva o índice invertido no formato binário (opcionalmente particionado em shards), segmentado ou em um arquivo JSON e, opcionalmente, a matriz CSR de pesos.
     \n\t`weight_tokenize(self) -> None`: Calcula o peso de cada token no índice invertido.
-    \n\t`add_attr_inverted_index(self, params=None) -> None`: Adiciona atributos ao índice invertido.
+    \n\t`add_attr_inverted_index(self, params=None) -> None`: Comprime os atributos das páginas para o armazém de documentos, separado do índice invertido.
     \n\t`remove_key_stop_word(self) -> None`: Remove as palavras de parada do índice invertido.
 
     Exemplo:
@@ -41,10 +56,10 @@ class Indexador:
     >>> indexer.update_index()
     >>> indexer.remove_key_stop_words()
     >>> indexer.save_index()
-    index-Root.json = 128
+    index-Root = 128
     """
 
-    def __init__(self, coletor) -> None:
+    def __init__(self, coletor, memoria=None, duplicatas=None, posicional=False) -> None:
         """
         O construtor da classe Indexador.
 
@@ -52,20 +67,34 @@ class Indexador:
 
         Parâmetros:
         \n\t`coletor (Coletor)`: Um objeto da classe Coletor.
+        \n\t`memoria (int or None)`: Se informado, o índice é construído por blocos (SPIMI) com esse limite de memória, em bytes, e gravado no diretório "index-{codigo}" (veja `IndexadorSPIMI`). O valor padrão é None (índice em memória).
+        \n\t`duplicatas (Duplicatas or None)`: Se informado, as páginas quase duplicadas de páginas já indexadas são descartadas antes da indexação (veja `Duplicatas`). O valor padrão é None.
+        \n\t`posicional (bool)`: Se True, registra também as posições de cada token em cada página, gravadas com o índice binário ou JSON e usadas por `Buscador.rank` com `modo='frase'`. A posição é a ordem do token entre os tokens indexados da página (sem as stop words). O valor padrão é False.
 
         Retorno:
         \n\t`None`
         """
         self.coletor = coletor
-        self.stop_words = set(stopwords.words('portuguese'))
+        self.stop_words = set(Tokenizador.STOP_WORDS)
         self.inverted_index = {}
         self.F = {}
+        self.limites = {}
+        self.spimi = None
+        self.duplicatas = duplicatas
+        self.posicoes = {} if posicional else None
+        self.urls_indexadas = set()
+        self.atributos = {}
+        if memoria is not None:
+            if posicional:
+                raise ValueError(
+                    "O índice construído por blocos (SPIMI) não registra as posições dos tokens")
+            self.spimi = IndexadorSPIMI(f"index-{coletor.codigo}", memoria)
 
     def inverted_index_generator(self) -> None:
         """
         Gera o índice invertido.
 
-        Este método percorre cada objeto Url na lista de objetos Url do coletor. Para cada título no objeto Url, ele tokeniza o texto do título, converte cada token para minúsculas, e adiciona o token à lista self.tokenized_titles se o token for alfanumérico e não for uma stop word. Em seguida, para cada token na lista self.tokenized_titles, ele adiciona o token ao índice invertido, apontando para a URL do objeto Url.
+        Este método percorre cada objeto Url na lista de objetos Url do coletor. Para cada título no objeto Url, ele tokeniza o texto do título, converte cada token para minúsculas, e adiciona o token à lista self.tokenized_titles se o token for alfanumérico e não for uma stop word. Em seguida, para cada token na lista self.tokenized_titles, ele adiciona o token ao índice invertido, apontando para a URL do objeto Url. Com um detector de duplicatas (veja `__init__`), as páginas quase duplicadas de páginas já indexadas são descartadas.
 
         Parâmetros:
         \n\t`None`
@@ -74,36 +103,132 @@ class Indexador:
         \n\t`None`
         """
         for object in self.coletor.objects_url:
-            tokenized_titles = []  # cria uma lista para cada objeto Url
-            for title in object.titles:
-                tokens = [token.lower() for token in nltk.word_tokenize(
-                    title.text) if token.isalnum() and token.lower() not in self.stop_words]
-                tokenized_titles.extend(tokens)
-
-            f = {}
-            for token in tokenized_titles:
-                # lista de frequência
-                if token not in f:
-                    f[token] = 1
-                    if token not in self.F:
-                        self.F[token] = 0
+            with METRICAS.cronometro('indexador_etapa_segundos', etapa='tokenizacao'):
+                tokens = Indexador.tokenizar(object.titles, self.stop_words)
+            if self.duplicatas is not None and self.duplicatas.duplicata(object, tokens) is not None:
+                continue
+            with METRICAS.cronometro('indexador_etapa_segundos', etapa='insercao'):
+                self.adicionar_documento(object.url, tokens)
+
+    def indexar_paralelo(self, processos=None, paginas=None, tamanho_lote=256) -> None:
+        """
+        Gera o índice invertido distribuindo a tokenização das páginas entre vários processos.
+
+        As páginas são divididas em lotes de `tamanho_lote` páginas. Cada processo tokeniza um lote e constrói um índice parcial, com as frequências locais de cada termo. Os índices parciais são combinados na ordem dos lotes (veja `mesclar_parcial`), de modo que o resultado é igual ao de `inverted_index_generator`. F, n e wij globais são calculados depois, por `update_F` (chamado por `save_index`). No modo SPIMI e com as posições registradas, os processos devolvem as páginas tokenizadas, que são repassadas ao construtor por blocos ou a `adicionar_documento`. Com um detector de duplicatas, as páginas duplicadas são descartadas no processo atual, antes da divisão em lotes.
+
+        Parâmetros:
+        \n\t`processos (int or None)`: O número de processos. Se None, usa o número de CPUs.
+        \n\t`paginas (iterable or None)`: As páginas (objetos Url) a indexar. Se None, usa `self.coletor.objects_url`.
+        \n\t`tamanho_lote (int)`: O número de páginas enviadas a um processo por vez. O valor padrão é 256.
+
+        Retorno:
+        \n\t`None`
+        """
+        if paginas is None:
+            paginas = self.coletor.objects_url
+        if self.duplicatas is not None:
+            paginas = self.duplicatas.filtrar(paginas, self.stop_words)
+        documentos = self.spimi is not None or self.posicoes is not None
+        tarefa = partial(_indexar_lote, stop_words=self.stop_words,
+                         documentos=documentos)
+        def registrar(lotes):
+            # As páginas sem nenhum termo não aparecem nos índices parciais
+            for lote in lotes:
+                self.urls_indexadas.update(url for url, _ in lote)
+                yield lote
+
+        with multiprocessing.Pool(processos) as pool:
+            for parcial in pool.imap(tarefa, registrar(_lotes(paginas, tamanho_lote))):
+                if documentos:
+                    for url, tokens in parcial:
+                        self.adicionar_documento(url, tokens)
                 else:
-                    f[token] += 1
+                    self.mesclar_parcial(parcial)
 
-            for token in tokenized_titles:
-                # tokens passaram a apontar para a url
-                self.inverted_index.setdefault(
-                    token, {}).update({object.url: [f[token], self.F[token], 0, 0]})  # f, F, n, wij
+    def mesclar_parcial(self, parcial) -> None:
+        """
+        Combina um índice parcial com o índice invertido.
 
-            for token in self.inverted_index.keys():
-                if token in f:
-                    self.F[token] += f[token]
+        Os postings do índice parcial substituem os postings da mesma URL (a coleta mais recente prevalece, como em `adicionar_documento`), e as frequências locais são somadas a F.
+
+        Parâmetros:
+        \n\t`parcial (dict)`: Um índice parcial no formato `{token: [F_parcial, {url: f}]}`.
+
+        Retorno:
+        \n\t`None`
+        """
+        for token, (F_parcial, postings) in parcial.items():
+            indice = self.inverted_index.setdefault(token, {})
+            for url, f in postings.items():
+                indice[url] = [f, 0, 0, 0]  # f, F, n, wij
+            self.F[token] = self.F.get(token, 0) + F_parcial
+
+    @staticmethod
+    def tokenizar(textos, stop_words) -> list:
+        """
+        Tokeniza os textos de uma página.
+
+        Cada texto é dividido em tokens alfanuméricos normalizados e os tokens que não são stop words são mantidos (veja `Tokenizador.documento`). A mesma normalização é aplicada às consultas pelo `Buscador`.
+
+        Parâmetros:
+        \n\t`textos (iterable)`: Os textos da página (por exemplo, os subtítulos de um objeto Url).
+        \n\t`stop_words (set)`: O conjunto de stop words.
+
+        Retorno:
+        \n\t`list`: Os tokens da página, na ordem em que aparecem.
+        """
+        return Tokenizador.documento(textos, stop_words)
+
+    def adicionar_documento(self, url, tokenized_titles) -> None:
+        """
+        Adiciona uma página já tokenizada ao índice invertido.
+
+        Este método permite indexar as páginas uma a uma, à medida que são coletadas (veja `Pipeline`). O custo é linear no número de tokens da página. Os valores de F, n e wij são atualizados por `update_F`. No modo SPIMI, a página é repassada ao construtor por blocos. Com `posicional=True`, as posições de cada token na página também são registradas.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página.
+        \n\t`tokenized_titles (list)`: Os tokens da página (veja `tokenizar`).
+
+        Retorno:
+        \n\t`None`
+        """
+        if METRICAS.ativo:
+            METRICAS.contar('indexador_documentos_total')
+            METRICAS.contar('indexador_tokens_total', len(tokenized_titles))
+        self.urls_indexadas.add(url)
+        if self.spimi is not None:
+            self.spimi.adicionar_documento(url, tokenized_titles)
+            return
+        f = {}
+        for token in tokenized_titles:
+            # lista de frequência
+            if token not in f:
+                f[token] = 1
+                if token not in self.F:
+                    self.F[token] = 0
+            else:
+                f[token] += 1
+
+        for token in tokenized_titles:
+            # tokens passaram a apontar para a url
+            self.inverted_index.setdefault(
+                token, {}).update({url: [f[token], self.F[token], 0, 0]})  # f, F, n, wij
+
+        for token, frequencia in f.items():
+            self.F[token] += frequencia
+
+        if self.posicoes is not None:
+            posicoes = {}
+            for posicao, token in enumerate(tokenized_titles):
+                posicoes.setdefault(token, []).append(posicao)
+            for token, lista in posicoes.items():
+                self.posicoes.setdefault(token, {})[url] = lista
 
     def update_F(self) -> None:
         """
         Atualiza a frequência de cada token no índice invertido.
 
-        Este método percorre cada token no índice invertido e, para cada URL associada ao token, atualiza a frequência do token (F), o número de URLs em que o token ocorre (n) e o peso do token na URL (wij).
+        Este método percorre cada token no índice invertido e, para cada URL associada ao token, atualiza a frequência do token (F), o número de URLs em que o token ocorre (n) e o peso do token na URL (wij). Ele também calcula o limite superior de pontuação de cada token (o maior `wiq` entre os seus postings), usado pelo `Buscador` para descartar documentos que não podem entrar no top-k.
 
         Parâmetros:
         Nenhum
@@ -111,37 +236,209 @@ class Indexador:
         Retorno:
         Nenhum
         """
-        for token in self.inverted_index.keys():
-            for object_url in self.inverted_index[token].keys():
-                self.inverted_index[token][object_url][1] = self.F[token]
-                self.inverted_index[token][object_url][2] = len(
-                    self.inverted_index[token].keys())
+        with METRICAS.cronometro('indexador_etapa_segundos', etapa='update_F'):
+            for token, postings in self.inverted_index.items():
+                if token not in self.F:
+                    continue
+                F = self.F[token]
+                n = len(postings)
+                for valores in postings.values():
+                    valores[1] = F
+                    valores[2] = n
+                    valores[3] = Expressoes.calcular_wij(valores[0], F, n)
+                self.limites[token] = limite_superior(postings)
+
+    def save_index(self, formato='binario', matriz=False, shards=None):
+        """
+        Salva o índice invertido no formato binário, no formato segmentado ou em um arquivo JSON.
+
+        No formato binário (padrão), este método grava o índice no diretório "index-{codigo}", onde {codigo} é o código do coletor, com um dicionário de termos ordenado, um arquivo de postings e uma tabela de documentos (veja `IndiceBinario`). No formato JSON, ele grava o arquivo "index-{codigo}.json". Em seguida, ele imprime o nome do arquivo e o número de chaves no índice invertido.
+
+        No formato segmentado, as páginas indexadas são acrescentadas como um segmento novo ao índice segmentado do diretório "index-{codigo}" (veja `IndiceSegmentado`), substituindo as versões anteriores das mesmas URLs, sem regravar o restante do índice. Desse modo, uma recoleta parcial pode ser indexada por um Indexador novo, apenas com as páginas recoletadas. Se a atualização disparar uma intercalação de segmentos, ela continua em segundo plano e este método não espera por ela (veja `IndiceSegmentado.fechar`).
+
+        No modo SPIMI (veja `__init__`), os blocos são intercalados e o índice é gravado diretamente no diretório binário, com F, n e wij calculados durante a intercalação.
+
+        Com `shards=N`, o índice binário é particionado em N shards pelo hash das URLs, com as estatísticas globais de cada termo em todos os shards, para ser consultado por um `CoordenadorShards`. Os arquivos de um índice binário não particionado no mesmo diretório são apagados e, inversamente, gravar o índice binário (ou SPIMI) sem shards apaga os shards de uma gravação anterior.
+
+        Com um detector de duplicatas (veja `__init__`), ele também imprime o número de páginas duplicadas descartadas e os postings e bytes economizados.
 
-        for token in self.inverted_index.keys():
-            for object_url in self.inverted_index[token].keys():
-                self.inverted_index[token][object_url][3] = Expressoes.calcular_wij(
-                    self.inverted_index[token][object_url][0],
-                    self.inverted_index[token][object_url][1],
-                    self.inverted_index[token][object_url][2],
-                )
+        Com as posições registradas (veja `__init__`), elas são gravadas no arquivo de posições do índice binário ou, no formato JSON, no arquivo "index-{codigo}.posicoes.json" (veja `Buscador.arquivo_posicoes`). Os formatos segmentado e em shards não guardam posições.
 
-    def save_index(self):
+        Com os atributos das páginas comprimidos por `add_attr_inverted_index`, eles são gravados no armazém de documentos do índice (veja `ArmazemDocumentos.arquivo`), e não no índice invertido. No formato segmentado, os registros das páginas indexadas são acrescentados ao armazém existente, e os registros anteriores das páginas substituídas ou removidas são descartados; nos demais formatos, o armazém é regravado, e o armazém de um índice anterior é apagado se nenhum atributo tiver sido comprimido.
+
+        Com `matriz=True`, ele também grava a matriz termo×documento CSR com os pesos `w_ij`, os mapas de termos e de documentos e as normas dos documentos (veja `MatrizCSR`), usada por `Buscador.rank_csr`. Com `matriz=False`, a matriz gravada com um índice anterior é apagada, pois não corresponde mais ao índice. No formato segmentado, a matriz não é gravada, pois muda a cada atualização, e o `Buscador` a constrói sob demanda.
+
+        Parâmetros:
+        \n\t`formato (str)`: 'binario', 'segmentado' ou 'json'. O valor padrão é 'binario'.
+        \n\t`matriz (bool)`: Se True, grava também a matriz CSR (requer NumPy). O valor padrão é False.
+        \n\t`shards (int or None)`: O número de shards do índice binário. O valor padrão é None (índice não particionado).
+
+        Retorno:
+        \n\t`None`
+        """
+        filename = self.coletor.codigo
+        if self.posicoes is not None and (formato == 'segmentado' or shards is not None):
+            raise ValueError(
+                "As posições dos tokens só podem ser gravadas nos formatos binário e JSON")
+        if shards is not None and (formato != 'binario' or matriz or self.spimi is not None):
+            raise ValueError(
+                "Apenas o índice binário em memória, sem a matriz CSR, pode ser particionado em shards")
+        if self.spimi is not None:
+            if formato != 'binario':
+                raise ValueError(
+                    "O índice construído por blocos (SPIMI) só pode ser gravado no formato binário")
+            index_file = self.spimi.diretorio
+            with METRICAS.cronometro('indexador_etapa_segundos', etapa='gravacao', formato='spimi'):
+                termos = self.spimi.fechar()
+            CoordenadorShards.apagar(index_file)
+            self._salvar_atributos(index_file)
+            if matriz:
+                from MatrizCSR import MatrizCSR
+                with IndiceBinario(index_file) as indice:
+                    MatrizCSR.de_indice(indice).salvar(
+                        MatrizCSR.arquivo(index_file))
+            else:
+                Indexador._remover_matriz(index_file)
+            print(f"{index_file} = {termos}")
+            self._relatar_duplicatas(index_file)
+            return
+        self.update_F()
+        if formato == 'segmentado':
+            index_file = f"index-{filename}"
+            if os.path.isfile(os.path.join(index_file, IndiceBinario.ARQUIVO_TERMOS)) \
+                    or CoordenadorShards.eh_particionado(index_file):
+                raise ValueError(
+                    f"{index_file} contém um índice binário, e não um índice segmentado")
+            # As páginas indexadas pelo Pipeline não ficam em `objects_url`
+            urls = self.urls_indexadas.union(
+                objeto.url for objeto in self.coletor.objects_url)
+            with IndiceSegmentado(index_file) as indice:
+                with METRICAS.cronometro('indexador_etapa_segundos', etapa='gravacao', formato='segmentado'):
+                    indice.adicionar_indice(self.inverted_index, urls)
+                print(f"{index_file} = {len(indice)}")
+            # Os registros das versões anteriores das páginas são substituídos ou descartados
+            self._salvar_atributos(index_file, acrescentar=True, remover=urls)
+            self._relatar_duplicatas(index_file)
+            return
+        if formato == 'json':
+            index_file = f"index-{filename}.json"
+            # O arquivo é substituído atomicamente, sem truncar o índice lido por um servidor de busca
+            with METRICAS.cronometro('indexador_etapa_segundos', etapa='gravacao', formato='json'):
+                # As posições são gravadas antes do índice, que é substituído por último
+                arquivo_posicoes = Buscador.arquivo_posicoes(index_file)
+                if self.posicoes is not None:
+                    with open(arquivo_posicoes + '.tmp', 'w') as file:
+                        json.dump(self.posicoes, file)
+                    os.replace(arquivo_posicoes + '.tmp', arquivo_posicoes)
+                elif os.path.exists(arquivo_posicoes):
+                    os.remove(arquivo_posicoes)
+                with open(index_file + '.tmp', 'w') as file:
+                    json.dump(self.inverted_index, file, indent=4)
+                os.replace(index_file + '.tmp', index_file)
+            self._salvar_atributos(index_file)
+            if METRICAS.ativo:
+                METRICAS.contar('indice_postings_gravados_total', sum(
+                    len(postings) for postings in self.inverted_index.values()), formato='json')
+        elif formato == 'binario':
+            index_file = f"index-{filename}"
+            if IndiceSegmentado.eh_segmentado(index_file):
+                raise ValueError(
+                    f"{index_file} contém um índice segmentado, use formato='segmentado'")
+            with METRICAS.cronometro('indexador_etapa_segundos', etapa='gravacao', formato='binario'):
+                if shards is not None:
+                    CoordenadorShards.escrever(
+                        index_file, self.inverted_index, shards)
+                else:
+                    IndiceBinario.escrever(
+                        index_file, self.inverted_index, self.limites, self.posicoes)
+                    CoordenadorShards.apagar(index_file)
+            self._salvar_atributos(index_file)
+            if shards is not None:
+                Indexador._remover_matriz(index_file)
+                print(f"{index_file} = {shards} shards")
+                self._relatar_duplicatas(index_file)
+                return
+        else:
+            raise ValueError(f"Formato de índice desconhecido: {formato}")
+        if matriz:
+            # O NumPy só é necessário quando a matriz é gravada
+            from MatrizCSR import MatrizCSR
+            MatrizCSR.de_indice(self.inverted_index).salvar(
+                MatrizCSR.arquivo(index_file))
+        else:
+            Indexador._remover_matriz(index_file)
+        print(f"{index_file} = {len(self.inverted_index.keys())}")
+        self._relatar_duplicatas(index_file)
+
+    @staticmethod
+    def _remover_matriz(index_file) -> None:
         """
-        Salva o índice invertido em um arquivo JSON.
+        Apaga a matriz CSR gravada com um índice anterior, que não corresponde mais ao índice gravado.
 
-        Este método salva o índice invertido em um arquivo JSON com o nome "index-{codigo}.json", onde {codigo} é o código do coletor. Em seguida, ele imprime o nome do arquivo e o número de chaves no índice invertido.
+        Sem o NumPy, o nome do arquivo não é calculado e a matriz é mantida; de todo modo, o `Buscador` não carrega uma matriz mais antiga que o índice (veja `Buscador.matriz_csr`).
 
         Parâmetros:
+        \n\t`index_file (str)`: O diretório do índice ou o arquivo do índice JSON.
+
+        Retorno:
         \n\t`None`
+        """
+        try:
+            from MatrizCSR import MatrizCSR
+        except ImportError:
+            return
+        arquivo = MatrizCSR.arquivo(index_file)
+        if os.path.exists(arquivo):
+            os.remove(arquivo)
+
+    def _salvar_atributos(self, index_file, acrescentar=False, remover=()) -> None:
+        """
+        Grava os atributos comprimidos das páginas no armazém de documentos do índice.
+
+        Sem atributos, o armazém de um índice anterior é apagado, exceto no formato segmentado (`acrescentar=True`), em que ele continua descrevendo as páginas dos outros segmentos e só é regravado para descartar os registros de `remover`.
+
+        Parâmetros:
+        \n\t`index_file (str)`: O diretório do índice ou o arquivo do índice JSON.
+        \n\t`acrescentar (bool)`: Se True, mantém os registros das demais páginas do armazém existente. O valor padrão é False.
+        \n\t`remover (iterable)`: As URLs cujos registros anteriores são descartados, quando `acrescentar` é True (veja `ArmazemDocumentos.escrever`). O valor padrão é uma tupla vazia.
 
         Retorno:
         \n\t`None`
         """
-        self.update_F()
-        filename = self.coletor.codigo
-        with open(f"index-{filename}.json", 'w') as file:
-            json.dump(self.inverted_index, file, indent=4)
-        print(f"index-{filename}.json = {len(self.inverted_index.keys())}")
+        arquivo = ArmazemDocumentos.arquivo(index_file)
+        if self.atributos or (acrescentar and remover and os.path.exists(arquivo)):
+            with METRICAS.cronometro('indexador_etapa_segundos', etapa='gravacao', formato='armazem'):
+                ArmazemDocumentos.escrever(
+                    arquivo, self.atributos, acrescentar, remover)
+        elif not acrescentar and os.path.exists(arquivo):
+            os.remove(arquivo)
+
+    def _relatar_duplicatas(self, index_file) -> None:
+        """
+        Imprime o número de páginas duplicadas descartadas e os postings economizados, com uma estimativa dos bytes economizados pelo tamanho médio dos postings do índice gravado.
+
+        Parâmetros:
+        \n\t`index_file (str)`: O arquivo JSON ou o diretório do índice gravado.
+
+        Retorno:
+        \n\t`None`
+        """
+        if self.duplicatas is None:
+            return
+        bytes_por_posting = None
+        if os.path.isfile(os.path.join(index_file, IndiceBinario.ARQUIVO_TERMOS)):
+            with IndiceBinario(index_file) as indice:
+                bytes_por_posting = indice.estatisticas()['bytes_por_posting']
+        elif os.path.isfile(index_file):
+            postings = sum(len(postings)
+                           for postings in self.inverted_index.values())
+            if postings:
+                bytes_por_posting = os.path.getsize(index_file) / postings
+        estatisticas = self.duplicatas.estatisticas(bytes_por_posting)
+        economia = f"{estatisticas['postings_economizados']} postings"
+        if 'bytes_economizados' in estatisticas:
+            economia += f" (~{estatisticas['bytes_economizados']} bytes)"
+        print(f"{index_file}: {estatisticas['duplicatas']} páginas duplicadas descartadas, {economia} a menos")
 
     def weight_tokenize(self) -> None:
         """
@@ -163,28 +460,19 @@ class Indexador:
 
     def add_attr_inverted_index(self, params=None) -> None:
         """
-        Adiciona um ou mais atributos da Url ao índice invertido.
+        Comprime um ou mais atributos da Url de cada página para o armazém de documentos.
 
-        Este método percorre cada objeto Url na lista de objetos Url do coletor. Para cada objeto Url, ele adiciona os atributos especificados em `params` ao índice invertido, apontando para a URL do objeto Url.
+        Este método percorre cada objeto Url na lista de objetos Url do coletor e comprime os atributos especificados em `params` em um registro (veja `ArmazemDocumentos.comprimir`), guardado em `atributos`. Os registros são gravados por `save_index` no armazém de documentos do índice, e não no índice invertido: os textos das páginas não são carregados pelo `Buscador` para o ranqueamento, nem aparecem como termos do vocabulário em `deep_search` e `width_search`. Eles são lidos sob demanda para exibir os resultados (veja `Buscador.documento` e `Buscador.trecho`).
 
         Parâmetros:
-        \n\t`params (list or None)`: Uma lista de atributos da Url a serem adicionados ao índice invertido. Se None, adiciona todos os atributos.
+        \n\t`params (list or None)`: Uma lista de atributos da Url a serem guardados. Se None, guarda todos os atributos.
 
         Retorno:
         \n\t`None`
         """
-        if params is None:
-            params = ['page', 'titles', 'links', 'paragrafos',
-                      'imagens', 'listas', 'tabelas']
-
         for object in self.coletor.objects_url:
-            for attr in params:
-                attribute = getattr(object, attr, None)
-                if attribute is not None:
-                    if isinstance(attribute, (element.Tag, element.ResultSet, element.NavigableString)):
-                        attribute = [str(item) for item in attribute]
-                    self.inverted_index.setdefault(
-                        attr, {}).update({object.url: attribute})
+            self.atributos[object.url] = ArmazemDocumentos.comprimir(
+                object, params)
 
     def update_index(self, new_data) -> None:
         """
@@ -219,6 +507,8 @@ class Indexador:
         for stop_word in self.stop_words:
             if stop_word in self.inverted_index:
                 del self.inverted_index[stop_word]
+            if self.posicoes is not None:
+                self.posicoes.pop(stop_word, None)
 
     # Teste a função com alguns valores
     # i = 2
@@ -226,3 +516,52 @@ class Indexador:
     # ni = 3
     # print(
     #     f"O resultado da expressão para i={i}, n={n}, e ni={ni} é {Expressoes.calcular_wij(i, n, ni)}")
+
+
+def _lotes(paginas, tamanho_lote):
+    """
+    Divide as páginas em lotes com a URL e os subtítulos de cada página.
+
+    Parâmetros:
+    \n\t`paginas (iterable)`: As páginas (objetos Url).
+    \n\t`tamanho_lote (int)`: O número de páginas por lote.
+
+    Retorno:
+    \n\t`generator`: Gera listas de tuplas `(url, titles)`.
+    """
+    lote = []
+    for pagina in paginas:
+        lote.append((pagina.url, pagina.titles))
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _indexar_lote(lote, stop_words, documentos=False):
+    """
+    Tokeniza um lote de páginas e constrói o seu índice parcial (executado nos processos de `Indexador.indexar_paralelo`).
+
+    Parâmetros:
+    \n\t`lote (list)`: Uma lista de tuplas `(url, titles)`.
+    \n\t`stop_words (set)`: O conjunto de stop words.
+    \n\t`documentos (bool)`: Se True, devolve as páginas tokenizadas em vez do índice parcial.
+
+    Retorno:
+    \n\t`dict or list`: O índice parcial `{token: [F_parcial, {url: f}]}`, ou uma lista de tuplas `(url, tokens)`.
+    """
+    if documentos:
+        return [(url, Indexador.tokenizar(titles, stop_words)) for url, titles in lote]
+    parcial = {}
+    for url, titles in lote:
+        f = {}
+        for token in Indexador.tokenizar(titles, stop_words):
+            f[token] = f.get(token, 0) + 1
+        for token, frequencia in f.items():
+            entrada = parcial.get(token)
+            if entrada is None:
+                entrada = parcial[token] = [0, {}]
+            entrada[0] += frequencia
+            entrada[1][url] = frequencia
+    return parcial
@@ -0,0 +1,209 @@
+import heapq
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from itertools import groupby
+from Expressoes import Expressoes
+from IndiceBinario import EscritorIndiceBinario
+
+
+class IndexadorSPIMI:
+    """
+    A classe IndexadorSPIMI constrói um índice binário com o algoritmo SPIMI (single-pass in-memory indexing), em tempo linear no número de tokens.
+
+    Os postings `(documento, f)` de cada termo são acumulados em um bloco em memória. Quando a memória estimada do bloco passa de `memoria` bytes, os termos do bloco são ordenados e o bloco é gravado em um arquivo temporário. No fechamento, os blocos são intercalados (k-way merge) em uma única passagem, e a frequência total do termo (F), o número de documentos (n_i) e o peso `w_ij` de cada posting são calculados durante a intercalação e gravados diretamente no índice binário (veja `EscritorIndiceBinario`).
+
+    Cada termo novo em um bloco recebe um número de sequência crescente entre todos os blocos, gravado com o termo. Na intercalação, o menor número de um termo indica a sua primeira ocorrência, e os termos são gravados com essa ordem de inserção (veja `IndiceBinario.ordem_original`).
+
+    O resultado é igual ao do `Indexador` em memória: F soma as frequências de todas as coletas de uma URL, e se uma URL for indexada mais de uma vez, o posting de cada termo guarda a frequência da última coleta.
+
+    Atributos:
+    \n\t`diretorio (str)`: O diretório do índice binário.
+    \n\t`memoria (int)`: O limite de memória estimada, em bytes, de um bloco.
+    \n\t`blocos (list)`: Os arquivos temporários dos blocos já gravados.
+    \n\t`documentos (dict)`: Um dicionário que mapeia cada URL para o seu identificador de documento.
+
+    Métodos:
+    \n\t`adicionar_documento(url, tokenized_titles) -> None`: Adiciona os tokens de uma página ao bloco em memória.
+    \n\t`fechar() -> int`: Intercala os blocos, grava o índice e devolve o número de termos.
+
+    Exemplo:
+    >>> spimi = IndexadorSPIMI("index-Root", memoria=16 * 1024 * 1024)
+    >>> spimi.adicionar_documento("https://www.ifmg.edu.br", ["ifmg", "campus", "ifmg"])
+    >>> spimi.fechar()
+    2
+    """
+
+    # Estimativas do custo em memória de um posting e de um termo novo no bloco
+    BYTES_POSTING = 8
+    BYTES_TERMO = 160
+    # tamanho do termo, número de inteiros dos postings, ordem de inserção do termo
+    TAMANHO = struct.Struct('<IIQ')
+
+    def __init__(self, diretorio, memoria=64 * 1024 * 1024, temporario=None) -> None:
+        """
+        O construtor da classe IndexadorSPIMI.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório onde o índice binário será gravado.
+        \n\t`memoria (int)`: O limite de memória estimada de um bloco, em bytes. O valor padrão é 64 MiB.
+        \n\t`temporario (str or None)`: O diretório onde os blocos temporários são criados. Se None, usa o diretório temporário do sistema.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.diretorio = diretorio
+        self.memoria = memoria
+        self.temporario = temporario
+        self.blocos = []
+        self.documentos = {}
+        self._bloco = {}
+        self._ordens = {}
+        self._sequencia = 0
+        self._usado = 0
+        self._pasta = None
+
+    def adicionar_documento(self, url, tokenized_titles) -> None:
+        """
+        Adiciona os tokens de uma página ao bloco em memória, gravando o bloco em disco se ele passar do limite de memória.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página.
+        \n\t`tokenized_titles (list)`: Os tokens da página.
+
+        Retorno:
+        \n\t`None`
+        """
+        doc_id = self.documentos.setdefault(url, len(self.documentos))
+        f = {}
+        for token in tokenized_titles:
+            f[token] = f.get(token, 0) + 1
+        bloco = self._bloco
+        for token, frequencia in f.items():
+            postings = bloco.get(token)
+            if postings is None:
+                postings = bloco[token] = array('I')
+                self._ordens[token] = self._sequencia
+                self._sequencia += 1
+                self._usado += self.BYTES_TERMO + len(token)
+            postings.append(doc_id)
+            postings.append(frequencia)
+        self._usado += self.BYTES_POSTING * len(f)
+        if self._usado >= self.memoria:
+            self._gravar_bloco()
+
+    def _ordenado(self) -> list:
+        """
+        Devolve os termos do bloco em memória ordenados pelos seus bytes UTF-8.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(termo_bytes, postings, ordem)`.
+        """
+        ordens = self._ordens
+        return sorted((termo.encode('utf-8'), postings, ordens[termo]) for termo, postings in self._bloco.items())
+
+    def _gravar_bloco(self) -> None:
+        """
+        Grava o bloco em memória, com os termos ordenados, em um arquivo temporário e esvazia o bloco.
+
+        Cada termo é gravado como o tamanho do termo, o número de inteiros dos postings e a ordem de inserção do termo, seguidos dos bytes do termo e dos pares `(documento, f)`.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if not self._bloco:
+            return
+        if self._pasta is None:
+            self._pasta = tempfile.mkdtemp(
+                prefix='spimi-', dir=self.temporario)
+        caminho = os.path.join(self._pasta, f"bloco-{len(self.blocos)}.bin")
+        with open(caminho, 'wb') as file:
+            for termo, postings, ordem in self._ordenado():
+                file.write(self.TAMANHO.pack(len(termo), len(postings), ordem))
+                file.write(termo)
+                postings.tofile(file)
+        self.blocos.append(caminho)
+        self._bloco = {}
+        self._ordens = {}
+        self._usado = 0
+
+    def _ler_bloco(self, caminho):
+        """
+        Lê sequencialmente os termos de um bloco gravado.
+
+        Parâmetros:
+        \n\t`caminho (str)`: O arquivo do bloco.
+
+        Retorno:
+        \n\t`generator`: Gera tuplas `(termo_bytes, postings, ordem)` em ordem crescente de termo.
+        """
+        with open(caminho, 'rb') as file:
+            while True:
+                cabecalho = file.read(self.TAMANHO.size)
+                if not cabecalho:
+                    return
+                tamanho, quantidade, ordem = self.TAMANHO.unpack(cabecalho)
+                termo = file.read(tamanho)
+                postings = array('I')
+                postings.fromfile(file, quantidade)
+                yield termo, postings, ordem
+
+    def fechar(self) -> int:
+        """
+        Intercala os blocos e grava o índice binário.
+
+        Os blocos gravados e o bloco que ainda está em memória são intercalados por termo. Para cada termo, F é a soma das frequências de todos os postings, n_i é o número de URLs distintas, `w_ij` é calculado com `Expressoes.calcular_wij`, e a ordem de inserção é a do bloco em que o termo apareceu primeiro. Os arquivos temporários são removidos ao final. O índice existente no diretório só é substituído se a intercalação terminar; caso contrário, os arquivos parciais são descartados e o erro é propagado.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`int`: O número de termos gravados.
+        """
+        fontes = [self._ler_bloco(caminho) for caminho in self.blocos]
+        fontes.append(iter(self._ordenado()))
+        urls = list(self.documentos.keys())
+        escritor = EscritorIndiceBinario(self.diretorio)
+        for url in urls:
+            escritor.documento(url)
+        termos = 0
+        try:
+            # heapq.merge é estável: para o mesmo termo, os blocos mais antigos vêm primeiro
+            for termo, grupo in groupby(heapq.merge(*fontes, key=lambda item: item[0]), key=lambda item: item[0]):
+                F = 0
+                frequencias = {}
+                primeira = None
+                for _, postings, ordem in grupo:
+                    if primeira is None:
+                        primeira = ordem
+                    for i in range(0, len(postings), 2):
+                        F += postings[i + 1]
+                        frequencias[postings[i]] = postings[i + 1]
+                n_i = len(frequencias)
+                escritor.adicionar_termo(termo.decode('utf-8'), {
+                    urls[doc_id]: [f, F, n_i, Expressoes.calcular_wij(f, F, n_i)]
+                    for doc_id, f in frequencias.items()}, ordem=primeira)
+                termos += 1
+            escritor.fechar()
+        except BaseException:
+            # Uma intercalação interrompida não substitui o índice existente
+            escritor.abortar()
+            raise
+        finally:
+            if self._pasta is not None:
+                shutil.rmtree(self._pasta, ignore_errors=True)
+            self.blocos = []
+            self._bloco = {}
+            self._ordens = {}
+            self._sequencia = 0
+            self._usado = 0
+            self._pasta = None
+        return termos
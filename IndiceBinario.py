@@ -0,0 +1,917 @@
+########## IndiceBinario.py ##########
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import accumulate
+from Expressoes import Expressoes
+from Metricas import METRICAS
+
+
+class IndiceBinario(Mapping):
+    """
+    A classe IndiceBinario representa um índice invertido armazenado em formato binário e aberto com `mmap`.
+
+    O índice fica em um diretório com três arquivos: um dicionário de termos ordenado (`termos.bin`), um arquivo de postings (`postings.bin`) e uma tabela de documentos (`documentos.bin`). Apenas os postings dos termos consultados são decodificados, de modo que abrir o índice não exige carregar o arquivo inteiro em memória.
+
+    Cada URL é gravada uma única vez, na tabela de documentos, e os postings guardam apenas o seu identificador inteiro. As estatísticas do termo (F e n_i) ficam no cabeçalho do termo, no dicionário, e não se repetem em cada posting. Os postings de um termo são ordenados por identificador de documento e gravados como pares `(intervalo, f)` com codificação de bytes variável (varint): o intervalo é a diferença para o identificador anterior, de modo que listas longas ocupam, em geral, 2 bytes por posting. O peso `w_ij` é recalculado na leitura com `Expressoes.calcular_wij`.
+
+    A classe se comporta como um dicionário somente leitura no mesmo formato do índice JSON: `indice[termo]` devolve `{url: [f, F, n_i, w_ij]}`.
+
+    Opcionalmente, o índice tem um quarto arquivo com as posições de cada termo em cada documento (`posicoes.bin`), usado nas consultas por frase do `Buscador`. As posições de um termo formam um bloco com uma tabela de offsets (4 bytes por posting, na ordem dos postings) seguida, para cada posting, do número de posições e dos intervalos entre elas (varint). A tabela permite ler apenas as posições dos documentos candidatos. Os offsets dos blocos, na ordem do dicionário de termos, ficam no fim do arquivo.
+
+    O dicionário de termos é ordenado para a busca binária, mas a ordem em que os termos foram inseridos no índice original (a ordem das chaves do índice JSON) também é gravada, em uma tabela com a posição no dicionário de cada termo, na ordem de inserção (`ordem.bin`). O `Buscador` constrói o índice de k-gramas nessa ordem (veja `ordem_original`), de modo que `deep_search` devolve o mesmo termo que no índice JSON. Em um índice sem a tabela, a ordem original é a ordem do dicionário.
+
+    Atributos:
+    \n\t`diretorio (str)`: O diretório que contém os arquivos do índice.
+    \n\t`n_termos (int)`: O número de termos do dicionário.
+    \n\t`n_documentos (int)`: O número de documentos da tabela de documentos.
+    \n\t`posicional (bool)`: Indica se o índice tem o arquivo de posições.
+
+    Métodos:
+    \n\t`escrever(diretorio, inverted_index, limites=None) -> None`: Grava um índice invertido (dicionário) no formato binário.
+    \n\t`converter_json(arquivo_json, diretorio=None) -> str`: Converte um arquivo `index-<codigo>.json` para o formato binário.
+    \n\t`apagar(diretorio) -> None`: Apaga os arquivos de um índice binário de um diretório.
+    \n\t`registros(termo) -> list`: Decodifica os postings de um termo como tuplas `(doc_id, f, F, n_i, w_ij)`.
+    \n\t`colunas(termo) -> tuple or None`: Decodifica os postings de um termo como listas de identificadores de documento e de frequências.
+    \n\t`tamanho(termo) -> int`: Devolve o número de postings de um termo, sem decodificá-los.
+    \n\t`posicoes(termo, indices) -> list`: Devolve as posições do termo nos postings especificados.
+    \n\t`url(doc_id) -> str`: Devolve a URL associada a um identificador de documento.
+    \n\t`ordem_original() -> generator`: Gera os termos na ordem em que foram inseridos no índice original.
+    \n\t`limite(termo) -> float`: Devolve o maior peso `wiq` que o termo pode contribuir para um documento.
+    \n\t`estatisticas() -> dict`: Devolve o número de postings e o tamanho médio, em bytes, de um posting.
+    \n\t`fechar() -> None`: Libera os mapeamentos de memória.
+
+    Exemplo:
+    >>> IndiceBinario.converter_json("index-Root.json")
+    'index-Root'
+    >>> indice = IndiceBinario("index-Root")
+    >>> indice["lula"]
+    {'https://g1.globo.com': [1, 1, 1, 0.0]}
+    """
+
+    VERSAO = 3
+    MAGICO_TERMOS = b'SRIT'
+    MAGICO_DOCUMENTOS = b'SRID'
+    MAGICO_POSICOES = b'SRIP'
+    MAGICO_ORDEM = b'SRIO'
+
+    # magico, versao, quantidade
+    CABECALHO = struct.Struct('<4sII')
+    # offset do termo, tamanho do termo, offset dos postings, quantidade de postings, bytes dos postings, F, n_i, limite superior
+    ENTRADA = struct.Struct('<QIQIIQId')
+    OFFSET = struct.Struct('<Q')
+    OFFSET_POSICOES = struct.Struct('<I')
+    POSICAO_TERMO = struct.Struct('<I')
+
+    ARQUIVO_TERMOS = 'termos.bin'
+    ARQUIVO_POSTINGS = 'postings.bin'
+    ARQUIVO_DOCUMENTOS = 'documentos.bin'
+    ARQUIVO_POSICOES = 'posicoes.bin'
+    ARQUIVO_ORDEM = 'ordem.bin'
+
+    # O número de URLs decodificadas mantidas em cache por `url`
+    CACHE_URLS = 4096
+
+    def __init__(self, diretorio) -> None:
+        """
+        O construtor da classe IndiceBinario.
+
+        Este método abre os três arquivos do índice (e o arquivo de posições, se existir), mapeia cada um em memória e valida os cabeçalhos. Nenhum posting é decodificado neste momento.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório que contém os arquivos do índice.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.diretorio = diretorio
+        self._arquivos = []
+        self._termos = self._mapear(self.ARQUIVO_TERMOS)
+        self._postings = self._mapear(self.ARQUIVO_POSTINGS)
+        self._documentos = self._mapear(self.ARQUIVO_DOCUMENTOS)
+
+        self.n_termos = self._ler_cabecalho(
+            self._termos, self.MAGICO_TERMOS)
+        self.n_documentos = self._ler_cabecalho(
+            self._documentos, self.MAGICO_DOCUMENTOS)
+
+        self._inicio_entradas = self.CABECALHO.size
+        self._inicio_offsets = self.CABECALHO.size
+        self._inicio_urls = self._inicio_offsets + \
+            (self.n_documentos + 1) * self.OFFSET.size
+        self._urls = lru_cache(maxsize=self.CACHE_URLS)(self._decodificar_url)
+
+        self.posicional = os.path.isfile(
+            os.path.join(diretorio, self.ARQUIVO_POSICOES))
+        self._posicoes = b''
+        if self.posicional:
+            self._posicoes = self._mapear(self.ARQUIVO_POSICOES)
+            if self._ler_cabecalho(self._posicoes, self.MAGICO_POSICOES) != self.n_termos:
+                raise ValueError(
+                    f"O arquivo de posições não corresponde ao índice em {diretorio}")
+            self._inicio_blocos = len(self._posicoes) - \
+                (self.n_termos + 1) * self.OFFSET.size
+        self._ordem = b''
+        if os.path.isfile(os.path.join(diretorio, self.ARQUIVO_ORDEM)):
+            self._ordem = self._mapear(self.ARQUIVO_ORDEM)
+            if self._ler_cabecalho(self._ordem, self.MAGICO_ORDEM) != self.n_termos:
+                raise ValueError(
+                    f"A tabela de ordem dos termos não corresponde ao índice em {diretorio}")
+
+    def _mapear(self, nome):
+        """
+        Abre um arquivo do índice e o mapeia em memória somente para leitura.
+
+        Parâmetros:
+        \n\t`nome (str)`: O nome do arquivo dentro do diretório do índice.
+
+        Retorno:
+        \n\t`mmap.mmap or bytes`: O mapeamento do arquivo (ou `bytes` vazio, se o arquivo estiver vazio).
+        """
+        file = open(os.path.join(self.diretorio, nome), 'rb')
+        self._arquivos.append(file)
+        if os.fstat(file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _ler_cabecalho(self, dados, magico) -> int:
+        """
+        Valida o cabeçalho de um arquivo do índice e devolve a quantidade de registros.
+
+        Parâmetros:
+        \n\t`dados (mmap.mmap)`: O arquivo mapeado em memória.
+        \n\t`magico (bytes)`: A assinatura esperada no início do arquivo.
+
+        Retorno:
+        \n\t`int`: A quantidade de registros declarada no cabeçalho.
+        """
+        if len(dados) < self.CABECALHO.size:
+            raise ValueError(f"Arquivo de índice inválido em {self.diretorio}")
+        assinatura, versao, quantidade = self.CABECALHO.unpack_from(dados, 0)
+        if assinatura != magico:
+            raise ValueError(f"Arquivo de índice inválido em {self.diretorio}")
+        if versao != self.VERSAO:
+            raise ValueError(
+                f"Versão de índice {versao} não suportada em {self.diretorio}")
+        return quantidade
+
+    def _entrada(self, posicao):
+        """
+        Lê a entrada do dicionário de termos na posição especificada.
+
+        Parâmetros:
+        \n\t`posicao (int)`: A posição da entrada no dicionário ordenado.
+
+        Retorno:
+        \n\t`tuple`: A entrada `(offset_termo, tamanho_termo, offset_postings, n_postings, bytes_postings, F, n_i, limite)`.
+        """
+        return self.ENTRADA.unpack_from(
+            self._termos, self._inicio_entradas + posicao * self.ENTRADA.size)
+
+    def _termo_bytes(self, entrada) -> bytes:
+        """
+        Devolve os bytes UTF-8 do termo de uma entrada do dicionário.
+
+        Parâmetros:
+        \n\t`entrada (tuple)`: A entrada do dicionário de termos.
+
+        Retorno:
+        \n\t`bytes`: O termo codificado em UTF-8.
+        """
+        return self._termos[entrada[0]:entrada[0] + entrada[1]]
+
+    def _localizar(self, termo):
+        """
+        Localiza um termo no dicionário por busca binária.
+
+        Os termos são ordenados pelos seus bytes UTF-8, o que coincide com a ordem dos pontos de código.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`tuple or None`: A tupla `(posicao, entrada)` do termo no dicionário, ou None se o termo não existir.
+        """
+        if not isinstance(termo, str):
+            return None
+        chave = termo.encode('utf-8')
+        inicio, fim = 0, self.n_termos
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            entrada = self._entrada(meio)
+            atual = self._termo_bytes(entrada)
+            if atual < chave:
+                inicio = meio + 1
+            elif atual > chave:
+                fim = meio
+            else:
+                return meio, entrada
+        return None
+
+    def _buscar(self, termo):
+        """
+        Localiza um termo no dicionário (veja `_localizar`).
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`tuple or None`: A entrada do termo, ou None se o termo não existir.
+        """
+        localizado = self._localizar(termo)
+        return None if localizado is None else localizado[1]
+
+    def url(self, doc_id) -> str:
+        """
+        Devolve a URL associada a um identificador de documento.
+
+        As últimas `CACHE_URLS` URLs decodificadas são mantidas em um cache LRU, de modo que a memória usada não cresce com o número de documentos consultados.
+
+        Parâmetros:
+        \n\t`doc_id (int)`: O identificador do documento.
+
+        Retorno:
+        \n\t`str`: A URL do documento.
+        """
+        return self._urls(doc_id)
+
+    def _decodificar_url(self, doc_id) -> str:
+        """
+        Lê e decodifica a URL de um documento na tabela de documentos.
+        """
+        inicio, fim = struct.unpack_from(
+            '<QQ', self._documentos, self._inicio_offsets + doc_id * self.OFFSET.size)
+        return self._documentos[self._inicio_urls +
+                                inicio:self._inicio_urls + fim].decode('utf-8')
+
+    def ordem_original(self):
+        """
+        Gera os termos na ordem em que foram inseridos no índice original, lida da tabela de ordem (veja `EscritorIndiceBinario.adicionar_termo`).
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`generator`: Gera os termos na ordem de inserção, ou na ordem do dicionário se o índice não tiver a tabela de ordem.
+        """
+        if not self._ordem:
+            yield from self
+            return
+        for (posicao,) in self.POSICAO_TERMO.iter_unpack(self._ordem[self.CABECALHO.size:]):
+            yield self._termo_bytes(self._entrada(posicao)).decode('utf-8')
+
+    def limite(self, termo) -> float:
+        """
+        Devolve o limite superior de pontuação de um termo.
+
+        O limite é o maior valor de `Expressoes.calcular_wiq` entre os postings do termo, calculado pelo `Indexador` quando o índice é salvo.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`float`: O limite superior do termo, ou 0.0 se o termo não existir.
+        """
+        entrada = self._buscar(termo)
+        if entrada is None:
+            return 0.0
+        return entrada[7]
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve o tamanho dos postings do índice.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: O número de termos, de documentos e de postings, o tamanho do arquivo de postings e o número médio de bytes por posting.
+        """
+        postings = sum(self._entrada(posicao)[3]
+                       for posicao in range(self.n_termos))
+        tamanho = len(self._postings)
+        return {
+            'termos': self.n_termos,
+            'documentos': self.n_documentos,
+            'postings': postings,
+            'bytes_postings': tamanho,
+            'bytes_por_posting': tamanho / postings if postings else 0.0,
+        }
+
+    def __getitem__(self, termo) -> dict:
+        """
+        Decodifica os postings de um termo.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`dict`: Um dicionário `{url: [f, F, n_i, w_ij]}`.
+        """
+        entrada = self._buscar(termo)
+        if entrada is None:
+            raise KeyError(termo)
+        return {self.url(doc_id): [f, F, n_i, w_ij]
+                for doc_id, f, F, n_i, w_ij in self._decodificar(entrada)}
+
+    def registros(self, termo) -> list:
+        """
+        Decodifica os postings de um termo sem converter os identificadores de documento em URLs.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(doc_id, f, F, n_i, w_ij)` em ordem crescente de `doc_id`, ou uma lista vazia se o termo não existir.
+        """
+        entrada = self._buscar(termo)
+        if entrada is None:
+            return []
+        return self._decodificar(entrada)
+
+    def tamanho(self, termo) -> int:
+        """
+        Devolve o número de postings de um termo, lido do dicionário sem decodificar os postings.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`int`: O número de postings do termo, ou 0 se o termo não existir.
+        """
+        entrada = self._buscar(termo)
+        return 0 if entrada is None else entrada[3]
+
+    def colunas(self, termo):
+        """
+        Decodifica os postings de um termo como colunas, sem criar uma tupla por posting.
+
+        Os identificadores de documento são reconstruídos com `itertools.accumulate`, de modo que a lista ordenada pode ser percorrida por busca binária (veja `Buscador.rank` com `modo='e'`) sem que cada posting seja processado em Python.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`tuple or None`: A tupla `(doc_ids, frequencias, F, n_i)`, com os identificadores de documento em ordem crescente e as frequências na mesma ordem, ou None se o termo não existir.
+        """
+        entrada = self._buscar(termo)
+        if entrada is None:
+            return None
+        inicio = entrada[2]
+        valores = decodificar_varint(
+            self._postings[inicio:inicio + entrada[4]])
+        return list(accumulate(valores[0::2])), valores[1::2], entrada[5], entrada[6]
+
+    def posicoes(self, termo, indices) -> list:
+        """
+        Devolve as posições de um termo em alguns dos seus postings.
+
+        Apenas as posições dos postings pedidos são decodificadas, pela tabela de offsets do bloco do termo.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+        \n\t`indices (iterable)`: As posições dos postings na lista do termo, em ordem crescente de `doc_id` (como em `colunas`).
+
+        Retorno:
+        \n\t`list`: Uma lista com as posições (em ordem crescente) do termo em cada posting pedido, na mesma ordem de `indices`.
+        """
+        if not self.posicional:
+            raise ValueError(f"O índice em {self.diretorio} não tem posições")
+        localizado = self._localizar(termo)
+        if localizado is None:
+            raise KeyError(termo)
+        dados = self._posicoes
+        bloco = self.OFFSET.unpack_from(
+            dados, self._inicio_blocos + localizado[0] * self.OFFSET.size)[0]
+        resultado = []
+        for indice in indices:
+            offset = self.OFFSET_POSICOES.unpack_from(
+                dados, bloco + indice * self.OFFSET_POSICOES.size)[0]
+            resultado.append(_ler_posicoes(dados, bloco + offset))
+        return resultado
+
+    def _decodificar(self, entrada) -> list:
+        """
+        Decodifica os postings de uma entrada do dicionário de termos.
+
+        Os identificadores de documento são reconstruídos pela soma acumulada dos intervalos, e o peso `w_ij` é calculado uma vez para cada frequência distinta do termo.
+
+        Parâmetros:
+        \n\t`entrada (tuple)`: A entrada do termo.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(doc_id, f, F, n_i, w_ij)`.
+        """
+        inicio = entrada[2]
+        valores = decodificar_varint(
+            self._postings[inicio:inicio + entrada[4]])
+        F, n_i = entrada[5], entrada[6]
+        pesos = {}
+        registros = []
+        for doc_id, f in zip(accumulate(valores[0::2]), valores[1::2]):
+            w_ij = pesos.get(f)
+            if w_ij is None:
+                w_ij = pesos[f] = float(Expressoes.calcular_wij(f, F, n_i))
+            registros.append((doc_id, f, F, n_i, w_ij))
+        return registros
+
+    def __contains__(self, termo) -> bool:
+        return self._buscar(termo) is not None
+
+    def __iter__(self):
+        for posicao in range(self.n_termos):
+            yield self._termo_bytes(self._entrada(posicao)).decode('utf-8')
+
+    def __len__(self) -> int:
+        return self.n_termos
+
+    def fechar(self) -> None:
+        """
+        Libera os mapeamentos de memória e fecha os arquivos do índice.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        for dados in (self._termos, self._postings, self._documentos, self._posicoes, self._ordem):
+            if isinstance(dados, mmap.mmap):
+                dados.close()
+        for file in self._arquivos:
+            file.close()
+        self._arquivos = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.fechar()
+
+    @staticmethod
+    def escrever(diretorio, inverted_index, limites=None, posicoes=None) -> None:
+        """
+        Grava um índice invertido no formato binário.
+
+        Este método atribui um identificador inteiro a cada URL, na ordem em que as URLs aparecem no índice, grava o dicionário de termos ordenado, os postings de cada termo ordenados por identificador de documento e comprimidos, a tabela de documentos e a ordem das chaves do índice (veja `ordem_original`). Chaves cujos valores não são postings no formato `[f, F, n_i, w_ij]` são ignoradas.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório onde o índice será gravado.
+        \n\t`inverted_index (dict)`: O índice invertido no formato `{termo: {url: [f, F, n_i, w_ij]}}`.
+        \n\t`limites (dict or None)`: Os limites superiores de pontuação de cada termo. Se None, são calculados a partir dos postings.
+        \n\t`posicoes (dict or None)`: As posições de cada termo em cada documento, no formato `{termo: {url: [posicoes]}}`. Se informado, o arquivo de posições também é gravado.
+
+        Retorno:
+        \n\t`None`
+        """
+        if limites is None:
+            limites = {}
+        escritor = EscritorIndiceBinario(
+            diretorio, posicional=posicoes is not None)
+        termos = [termo for termo in inverted_index.keys()
+                  if postings_validos(inverted_index[termo])]
+        for termo in termos:
+            for url in inverted_index[termo].keys():
+                escritor.documento(url)
+        ordem = {termo: posicao for posicao, termo in enumerate(termos)}
+        for termo in sorted(termos, key=lambda termo: termo.encode('utf-8')):
+            escritor.adicionar_termo(
+                termo, inverted_index[termo], limites.get(termo),
+                None if posicoes is None else posicoes.get(termo, {}), ordem[termo])
+        escritor.fechar()
+
+    @staticmethod
+    def apagar(diretorio) -> None:
+        """
+        Apaga os arquivos de um índice binário de um diretório, quando ele passa a guardar o índice em outro formato (por exemplo, particionado em shards).
+
+        O dicionário de termos é apagado primeiro, de modo que o diretório deixa de ser reconhecido como um índice binário antes que os demais arquivos sejam apagados.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório do índice.
+
+        Retorno:
+        \n\t`None`
+        """
+        for nome in (IndiceBinario.ARQUIVO_TERMOS, IndiceBinario.ARQUIVO_POSTINGS,
+                     IndiceBinario.ARQUIVO_DOCUMENTOS, IndiceBinario.ARQUIVO_POSICOES,
+                     IndiceBinario.ARQUIVO_ORDEM):
+            arquivo = os.path.join(diretorio, nome)
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+
+    @staticmethod
+    def converter_json(arquivo_json, diretorio=None) -> str:
+        """
+        Converte um arquivo `index-<codigo>.json` para o formato binário.
+
+        Parâmetros:
+        \n\t`arquivo_json (str)`: O caminho do índice JSON existente.
+        \n\t`diretorio (str or None)`: O diretório de destino. Se None, usa o nome do arquivo JSON sem a extensão.
+
+        Retorno:
+        \n\t`str`: O diretório onde o índice binário foi gravado.
+        """
+        if diretorio is None:
+            diretorio = os.path.splitext(arquivo_json)[0]
+        with open(arquivo_json, 'r') as file:
+            inverted_index = json.load(file)
+        IndiceBinario.escrever(diretorio, inverted_index)
+        return diretorio
+
+
+class EscritorIndiceBinario:
+    """
+    A classe EscritorIndiceBinario grava um índice binário de forma incremental.
+
+    Os termos devem ser adicionados em ordem crescente dos seus bytes UTF-8. Os postings são comprimidos (veja `IndiceBinario`) e gravados em disco à medida que os termos chegam; apenas as entradas do dicionário e a tabela de documentos permanecem em memória até o fechamento. Com `posicional=True`, as posições de cada termo também são gravadas no arquivo de posições.
+
+    Atributos:
+    \n\t`diretorio (str)`: O diretório onde o índice está sendo gravado.
+    \n\t`documentos (dict)`: Um dicionário que mapeia cada URL para o seu identificador de documento.
+    \n\t`posicional (bool)`: Indica se o arquivo de posições é gravado.
+
+    Métodos:
+    \n\t`documento(url) -> int`: Devolve (ou atribui) o identificador de documento de uma URL.
+    \n\t`adicionar_termo(termo, postings, limite=None, posicoes=None, ordem=None) -> None`: Grava os postings (e as posições) de um termo.
+    \n\t`fechar() -> None`: Grava o dicionário de termos, a tabela de documentos e a tabela de ordem dos termos.
+    \n\t`abortar() -> None`: Descarta os arquivos temporários, sem alterar o índice existente no diretório.
+    """
+
+    def __init__(self, diretorio, posicional=False) -> None:
+        """
+        O construtor da classe EscritorIndiceBinario.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório onde o índice será gravado. É criado se não existir.
+        \n\t`posicional (bool)`: Se True, grava também o arquivo de posições. O valor padrão é False.
+
+        Retorno:
+        \n\t`None`
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.documentos = {}
+        self._entradas = []
+        self._ordens = []
+        self._termos = bytearray()
+        self._offset_postings = 0
+        self._ultimo = None
+        self._postings = open(self._temporario(
+            IndiceBinario.ARQUIVO_POSTINGS), 'wb')
+        self.posicional = posicional
+        self._posicoes = None
+        self._blocos = []
+        if posicional:
+            self._posicoes = open(self._temporario(
+                IndiceBinario.ARQUIVO_POSICOES), 'wb')
+            # O cabeçalho é regravado em `fechar`, com o número de termos
+            self._posicoes.write(IndiceBinario.CABECALHO.pack(
+                IndiceBinario.MAGICO_POSICOES, IndiceBinario.VERSAO, 0))
+            self._offset_posicoes = IndiceBinario.CABECALHO.size
+
+    def _temporario(self, nome) -> str:
+        """
+        Devolve o caminho temporário de um arquivo do índice, substituído pelo arquivo definitivo em `fechar`.
+
+        Parâmetros:
+        \n\t`nome (str)`: O nome do arquivo do índice.
+
+        Retorno:
+        \n\t`str`: O caminho do arquivo temporário.
+        """
+        return os.path.join(self.diretorio, nome + '.tmp')
+
+    def documento(self, url) -> int:
+        """
+        Devolve o identificador de documento de uma URL, atribuindo um novo se necessário.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL do documento.
+
+        Retorno:
+        \n\t`int`: O identificador do documento.
+        """
+        doc_id = self.documentos.get(url)
+        if doc_id is None:
+            doc_id = len(self.documentos)
+            self.documentos[url] = doc_id
+        return doc_id
+
+    def adicionar_termo(self, termo, postings, limite=None, posicoes=None, ordem=None) -> None:
+        """
+        Grava os postings de um termo.
+
+        F e n_i são lidos do primeiro posting e gravados uma única vez, no cabeçalho do termo: o `Indexador` grava os mesmos valores em todos os postings de um termo.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo. Deve ser maior que o termo adicionado anteriormente.
+        \n\t`postings (dict)`: Um dicionário `{url: [f, F, n_i, w_ij]}`.
+        \n\t`limite (float or None)`: O limite superior de pontuação do termo. Se None, é calculado a partir dos postings.
+        \n\t`posicoes (dict or None)`: As posições do termo em cada documento, `{url: [posicoes]}`, gravadas se o escritor for posicional. Os documentos ausentes ficam sem posições.
+        \n\t`ordem (int or None)`: A posição do termo na ordem de inserção do índice original (veja `IndiceBinario.ordem_original`); os termos são listados em ordem crescente desse valor. Se None, o termo fica na posição em que foi adicionado ao escritor.
+
+        Retorno:
+        \n\t`None`
+        """
+        chave = termo.encode('utf-8')
+        if self._ultimo is not None and chave <= self._ultimo:
+            raise ValueError(
+                f"Os termos devem ser adicionados em ordem: {termo}")
+        self._ultimo = chave
+
+        registros = sorted((self.documento(url), int(valores[0]))
+                           for url, valores in postings.items())
+        F, n_i = 0, 0
+        for valores in postings.values():
+            F, n_i = int(valores[1]), int(valores[2])
+            break
+        if limite is None:
+            limite = limite_superior(postings)
+        dados = bytearray()
+        anterior = 0
+        for doc_id, f in registros:
+            codificar_varint(doc_id - anterior, dados)
+            codificar_varint(f, dados)
+            anterior = doc_id
+        self._entradas.append((len(self._termos), len(chave), self._offset_postings,
+                               len(registros), len(dados), F, n_i, limite))
+        self._ordens.append(len(self._ordens) if ordem is None else ordem)
+        self._termos += chave
+        self._postings.write(dados)
+        self._offset_postings += len(dados)
+        if self._posicoes is not None:
+            self._gravar_posicoes(
+                sorted(postings, key=self.documento), posicoes or {})
+
+    def _gravar_posicoes(self, urls, posicoes) -> None:
+        """
+        Grava o bloco de posições de um termo: a tabela de offsets dos postings, seguida do número de posições e dos intervalos entre as posições de cada posting.
+
+        Parâmetros:
+        \n\t`urls (list)`: As URLs dos postings do termo, em ordem crescente de identificador de documento.
+        \n\t`posicoes (dict)`: As posições do termo em cada documento.
+
+        Retorno:
+        \n\t`None`
+        """
+        tabela = bytearray()
+        dados = bytearray()
+        inicio = len(urls) * IndiceBinario.OFFSET_POSICOES.size
+        for url in urls:
+            tabela += IndiceBinario.OFFSET_POSICOES.pack(inicio + len(dados))
+            lista = posicoes.get(url, ())
+            codificar_varint(len(lista), dados)
+            anterior = 0
+            for posicao in lista:
+                codificar_varint(posicao - anterior, dados)
+                anterior = posicao
+        self._blocos.append(self._offset_posicoes)
+        self._posicoes.write(tabela)
+        self._posicoes.write(dados)
+        self._offset_posicoes += len(tabela) + len(dados)
+
+    def fechar(self) -> None:
+        """
+        Grava o dicionário de termos, a tabela de documentos e a tabela de ordem dos termos e fecha o arquivo de postings.
+
+        Os arquivos são gravados com nomes temporários e renomeados ao final, o dicionário de termos por último. Assim, um índice aberto por outro processo (por exemplo, o `ServidorBusca`) continua lendo os arquivos antigos, que não são truncados, até abrir o índice novo. Um escritor sem posições apaga o arquivo de posições de um índice anterior no mesmo diretório.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        self._postings.close()
+        if self._posicoes is not None:
+            for offset in self._blocos + [self._offset_posicoes]:
+                self._posicoes.write(IndiceBinario.OFFSET.pack(offset))
+            self._posicoes.seek(0)
+            self._posicoes.write(IndiceBinario.CABECALHO.pack(
+                IndiceBinario.MAGICO_POSICOES, IndiceBinario.VERSAO, len(self._entradas)))
+            self._posicoes.close()
+
+        inicio_termos = IndiceBinario.CABECALHO.size + \
+            len(self._entradas) * IndiceBinario.ENTRADA.size
+        with open(self._temporario(IndiceBinario.ARQUIVO_TERMOS), 'wb') as file:
+            file.write(IndiceBinario.CABECALHO.pack(
+                IndiceBinario.MAGICO_TERMOS, IndiceBinario.VERSAO, len(self._entradas)))
+            for offset_termo, *entrada in self._entradas:
+                file.write(IndiceBinario.ENTRADA.pack(
+                    inicio_termos + offset_termo, *entrada))
+            file.write(self._termos)
+
+        urls = [url.encode('utf-8') for url in self.documentos.keys()]
+        with open(self._temporario(IndiceBinario.ARQUIVO_DOCUMENTOS), 'wb') as file:
+            file.write(IndiceBinario.CABECALHO.pack(
+                IndiceBinario.MAGICO_DOCUMENTOS, IndiceBinario.VERSAO, len(urls)))
+            offset = 0
+            file.write(IndiceBinario.OFFSET.pack(offset))
+            for url in urls:
+                offset += len(url)
+                file.write(IndiceBinario.OFFSET.pack(offset))
+            for url in urls:
+                file.write(url)
+
+        with open(self._temporario(IndiceBinario.ARQUIVO_ORDEM), 'wb') as file:
+            file.write(IndiceBinario.CABECALHO.pack(
+                IndiceBinario.MAGICO_ORDEM, IndiceBinario.VERSAO, len(self._entradas)))
+            for posicao in sorted(range(len(self._ordens)), key=self._ordens.__getitem__):
+                file.write(IndiceBinario.POSICAO_TERMO.pack(posicao))
+
+        nomes = [IndiceBinario.ARQUIVO_POSTINGS, IndiceBinario.ARQUIVO_DOCUMENTOS,
+                 IndiceBinario.ARQUIVO_ORDEM]
+        if self._posicoes is not None:
+            nomes.append(IndiceBinario.ARQUIVO_POSICOES)
+        else:
+            arquivo_posicoes = os.path.join(
+                self.diretorio, IndiceBinario.ARQUIVO_POSICOES)
+            if os.path.exists(arquivo_posicoes):
+                os.remove(arquivo_posicoes)
+        for nome in nomes + [IndiceBinario.ARQUIVO_TERMOS]:
+            os.replace(self._temporario(nome),
+                       os.path.join(self.diretorio, nome))
+        if METRICAS.ativo:
+            METRICAS.contar('indice_postings_gravados_total', sum(
+                entrada[3] for entrada in self._entradas), formato='binario')
+            METRICAS.contar('indice_bytes_postings_total',
+                            self._offset_postings, formato='binario')
+
+    def abortar(self) -> None:
+        """
+        Fecha e apaga os arquivos temporários de uma gravação interrompida.
+
+        O índice existente no diretório não é alterado, pois os arquivos definitivos só são substituídos em `fechar`.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        self._postings.close()
+        nomes = [IndiceBinario.ARQUIVO_POSTINGS, IndiceBinario.ARQUIVO_DOCUMENTOS,
+                 IndiceBinario.ARQUIVO_ORDEM, IndiceBinario.ARQUIVO_TERMOS]
+        if self._posicoes is not None:
+            self._posicoes.close()
+            nomes.append(IndiceBinario.ARQUIVO_POSICOES)
+        for nome in nomes:
+            temporario = self._temporario(nome)
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+
+def codificar_varint(valor, dados) -> None:
+    """
+    Acrescenta um inteiro não negativo a um buffer com codificação de bytes variável (varint).
+
+    Cada byte guarda 7 bits do valor, do menos significativo para o mais significativo, e o bit mais alto indica se há mais bytes.
+
+    Parâmetros:
+    \n\t`valor (int)`: O inteiro a codificar.
+    \n\t`dados (bytearray)`: O buffer de destino.
+
+    Retorno:
+    \n\t`None`
+    """
+    while valor >= 0x80:
+        dados.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    dados.append(valor)
+
+
+def decodificar_varint(dados) -> list:
+    """
+    Decodifica uma sequência de inteiros com codificação de bytes variável (varint).
+
+    Parâmetros:
+    \n\t`dados (bytes)`: Os bytes codificados.
+
+    Retorno:
+    \n\t`list`: Os inteiros decodificados.
+    """
+    # Caso comum: todos os valores são menores que 128 e ocupam um byte cada
+    if not dados or max(dados) < 0x80:
+        return list(dados)
+    valores = []
+    valor = 0
+    deslocamento = 0
+    for byte in dados:
+        if byte < 0x80:
+            valores.append(valor | (byte << deslocamento))
+            valor = 0
+            deslocamento = 0
+        else:
+            valor |= (byte & 0x7F) << deslocamento
+            deslocamento += 7
+    return valores
+
+
+def _ler_posicoes(dados, inicio) -> list:
+    """
+    Decodifica as posições de um posting no arquivo de posições: o número de posições e os intervalos entre elas (varint).
+
+    Parâmetros:
+    \n\t`dados (mmap.mmap)`: O arquivo de posições.
+    \n\t`inicio (int)`: O offset das posições do posting.
+
+    Retorno:
+    \n\t`list`: As posições, em ordem crescente.
+    """
+    valores = []
+    quantidade = None
+    valor = 0
+    deslocamento = 0
+    posicao = inicio
+    while quantidade is None or len(valores) < quantidade:
+        byte = dados[posicao]
+        posicao += 1
+        if byte < 0x80:
+            valor |= byte << deslocamento
+            if quantidade is None:
+                quantidade = valor
+            else:
+                valores.append(valor)
+            valor = 0
+            deslocamento = 0
+        else:
+            valor |= (byte & 0x7F) << deslocamento
+            deslocamento += 7
+    return list(accumulate(valores))
+
+
+def galopar(lista, alvo, inicio=0) -> int:
+    """
+    Localiza, por busca galopante (exponencial), a primeira posição a partir de `inicio` cujo valor é maior ou igual a `alvo` em uma lista ordenada.
+
+    O intervalo de busca dobra a cada passo a partir de `inicio` e, depois, é refinado por busca binária. O custo é O(log d), em que d é a distância até a posição encontrada, de modo que percorrer uma lista longa em passos crescentes (como na interseção de postings) custa muito menos que percorrê-la inteira.
+
+    Parâmetros:
+    \n\t`lista (list)`: A lista ordenada.
+    \n\t`alvo (int)`: O valor procurado.
+    \n\t`inicio (int)`: A primeira posição considerada. O valor padrão é 0.
+
+    Retorno:
+    \n\t`int`: A posição encontrada, ou `len(lista)` se todos os valores forem menores que `alvo`.
+    """
+    tamanho = len(lista)
+    passo = 1
+    fim = inicio
+    while fim < tamanho and lista[fim] < alvo:
+        inicio = fim + 1
+        fim = inicio + passo
+        passo <<= 1
+    return bisect_left(lista, alvo, inicio, min(fim, tamanho))
+
+
+def limite_superior(postings) -> float:
+    """
+    Calcula o limite superior de pontuação de um termo a partir dos seus postings.
+
+    Parâmetros:
+    \n\t`postings (dict)`: Um dicionário `{url: [f, F, n_i, w_ij]}`.
+
+    Retorno:
+    \n\t`float`: O maior valor de `Expressoes.calcular_wiq(f, F, n_i)` entre os postings.
+    """
+    return max((Expressoes.calcular_wiq(valores[0], valores[1], valores[2])
+                for valores in postings.values()), default=0.0)
+
+
+def postings_validos(postings) -> bool:
+    """
+    Verifica se o valor de uma chave do índice contém postings no formato `[f, F, n_i, w_ij]`.
+
+    Parâmetros:
+    \n\t`postings`: O valor associado a uma chave do índice invertido.
+
+    Retorno:
+    \n\t`bool`: Retorna True se todos os valores forem listas numéricas de quatro elementos.
+    """
+    if not isinstance(postings, dict):
+        return False
+    for valores in postings.values():
+        if not isinstance(valores, (list, tuple)) or len(valores) != 4:
+            return False
+        if not all(isinstance(valor, (int, float)) for valor in valores):
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    # Converte índices JSON existentes: python IndiceBinario.py index-Root.json
+    for arquivo in sys.argv[1:]:
+        diretorio = IndiceBinario.converter_json(arquivo)
+        with open(arquivo, 'r') as file:
+            original = os.fstat(file.fileno()).st_size
+        with IndiceBinario(diretorio) as indice:
+            estatisticas = indice.estatisticas()
+        postings = estatisticas['postings'] or 1
+        print(f"{arquivo} -> {diretorio}: {estatisticas['postings']} postings, "
+              f"{original / postings:.1f} -> {estatisticas['bytes_por_posting']:.1f} bytes por posting")
@@ -0,0 +1,111 @@
+########## IndiceKgram.py ##########
+class IndiceKgram:
+    """
+    A classe IndiceKgram é um índice de k-gramas sobre o vocabulário de um índice invertido.
+
+    Cada termo do vocabulário recebe um identificador na ordem em que aparece no índice invertido. Para cada substring de tamanho 1 até k de cada termo, o índice guarda a lista crescente dos identificadores dos termos que a contêm. Assim, encontrar os termos que contêm um token (`token in termo`) exige percorrer apenas a menor lista de k-gramas do token, em vez de todo o vocabulário.
+
+    Atributos:
+    \n\t`k (int)`: O tamanho máximo dos k-gramas.
+    \n\t`termos (list)`: Os termos do vocabulário, na ordem do índice invertido.
+    \n\t`gramas (dict)`: Um dicionário que mapeia cada k-grama para a lista crescente dos identificadores dos termos que o contêm.
+
+    Métodos:
+    \n\t`candidatos(token) -> list`: Devolve, em ordem crescente, os identificadores dos termos que contêm o token.
+    \n\t`primeiro(token) -> int or None`: Devolve o identificador do primeiro termo que contém o token.
+
+    Exemplo:
+    >>> kgramas = IndiceKgram(["prefeitura", "feira", "neves"])
+    >>> [kgramas.termos[i] for i in kgramas.candidatos("feir")]
+    ['prefeitura', 'feira']
+    >>> kgramas.primeiro("eve")
+    2
+    """
+
+    def __init__(self, termos, k=3) -> None:
+        """
+        O construtor da classe IndiceKgram.
+
+        Parâmetros:
+        \n\t`termos (iterable)`: Os termos do vocabulário, na ordem do índice invertido.
+        \n\t`k (int)`: O tamanho máximo dos k-gramas. O valor padrão é 3.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.k = k
+        self.termos = list(termos)
+        self.gramas = {}
+        for termo_id, termo in enumerate(self.termos):
+            for grama in self._gramas(termo):
+                self.gramas.setdefault(grama, []).append(termo_id)
+
+    def _gramas(self, texto) -> set:
+        """
+        Gera todas as substrings distintas de tamanho 1 até k do texto.
+
+        Parâmetros:
+        \n\t`texto (str)`: O texto.
+
+        Retorno:
+        \n\t`set`: As substrings distintas.
+        """
+        return {texto[inicio:inicio + tamanho]
+                for tamanho in range(1, self.k + 1)
+                for inicio in range(len(texto) - tamanho + 1)}
+
+    def _lista_base(self, token):
+        """
+        Devolve a menor lista de identificadores que contém todos os termos candidatos para o token.
+
+        Se o token tiver até k caracteres, a lista do próprio token é exata. Caso contrário, usa-se a menor lista entre os k-gramas do token, que ainda precisa ser verificada.
+
+        Parâmetros:
+        \n\t`token (str)`: O token da consulta.
+
+        Retorno:
+        \n\t`tuple`: A lista de identificadores e um booleano que indica se ela precisa de verificação.
+        """
+        if not token:
+            return range(len(self.termos)), False
+        if len(token) <= self.k:
+            return self.gramas.get(token, []), False
+        base = None
+        for inicio in range(len(token) - self.k + 1):
+            lista = self.gramas.get(token[inicio:inicio + self.k])
+            if lista is None:
+                return [], False
+            if base is None or len(lista) < len(base):
+                base = lista
+        return base, True
+
+    def candidatos(self, token) -> list:
+        """
+        Devolve os identificadores dos termos que contêm o token.
+
+        Parâmetros:
+        \n\t`token (str)`: O token da consulta.
+
+        Retorno:
+        \n\t`list`: Os identificadores, em ordem crescente, dos termos que contêm o token.
+        """
+        base, verificar = self._lista_base(token)
+        if not verificar:
+            return list(base)
+        return [termo_id for termo_id in base if token in self.termos[termo_id]]
+
+    def primeiro(self, token):
+        """
+        Devolve o identificador do primeiro termo, na ordem do índice invertido, que contém o token.
+
+        Parâmetros:
+        \n\t`token (str)`: O token da consulta.
+
+        Retorno:
+        \n\t`int or None`: O identificador do termo, ou None se nenhum termo contiver o token.
+        """
+        base, verificar = self._lista_base(token)
+        for termo_id in base:
+            if not verificar or token in self.termos[termo_id]:
+                return termo_id
+        return None
@@ -0,0 +1,617 @@
+import heapq
+import json
+import math
+import os
+import shutil
+import threading
+from collections.abc import Mapping
+from itertools import groupby
+from ArmazemDocumentos import ArmazemDocumentos
+from Expressoes import Expressoes
+from IndiceBinario import IndiceBinario, EscritorIndiceBinario, postings_validos
+
+
+class IndiceSegmentado(Mapping):
+    """
+    A classe IndiceSegmentado é um índice invertido formado por vários segmentos imutáveis, que permite atualizações e remoções incrementais.
+
+    Cada segmento é um índice binário (veja `IndiceBinario`) em um subdiretório. Páginas novas ou alteradas são gravadas em um segmento novo e pequeno, e as versões antigas dessas URLs são marcadas como apagadas no mapa de bits de remoções (tombstones) do seu segmento. A lista de segmentos fica no arquivo `manifesto.json`, regravado atomicamente a cada alteração.
+
+    As estatísticas globais de cada termo são calculadas na consulta, a partir dos postings vivos de todos os segmentos: F é a soma das frequências, n_i é o número de documentos e `w_ij` é recalculado com `Expressoes.calcular_wij`. Assim, os valores são iguais aos de um índice reconstruído do zero com as páginas vivas.
+
+    Os termos cujos postings foram todos apagados deixam de fazer parte do vocabulário (`in`, iteração e `len`) antes mesmo da compactação. Apenas os termos dos segmentos com documentos apagados precisam ser verificados, e o número de termos vivos é guardado até a próxima alteração do manifesto.
+
+    Uma política de intercalação em camadas compacta os segmentos em segundo plano: quando uma camada (segmentos com número de documentos vivos da mesma ordem de grandeza na base `fator`) acumula `fator` segmentos, eles são intercalados em um só, e segmentos com mais da metade dos documentos apagados são reescritos. Quem grava o índice não espera a compactação: `fechar` retorna imediatamente, e os segmentos são fechados pela própria thread de compactação quando ela termina. A thread não é um daemon, de modo que o processo só termina depois da compactação em andamento.
+
+    Atributos:
+    \n\t`diretorio (str)`: O diretório do índice.
+    \n\t`fator (int)`: O número de segmentos de uma camada que dispara a intercalação.
+    \n\t`compactacao_automatica (bool)`: Se True, a compactação é iniciada em segundo plano após cada alteração.
+    \n\t`geracao (int)`: O número de alterações já gravadas no manifesto.
+
+    Métodos:
+    \n\t`adicionar_indice(inverted_index, urls=()) -> str or None`: Grava um índice invertido como um segmento novo, substituindo as versões anteriores das suas URLs.
+    \n\t`remover(urls) -> int`: Marca as URLs como apagadas e descarta os seus registros do armazém de documentos.
+    \n\t`compactar(forcar=False) -> int`: Intercala os segmentos de acordo com a política de camadas (ou todos, com `forcar=True`).
+    \n\t`atualizar() -> bool`: Recarrega o manifesto se ele foi alterado por outro processo.
+    \n\t`documentos() -> int`: Devolve o número de documentos vivos.
+    \n\t`segmentos() -> list`: Devolve o nome, o número de documentos e o número de documentos apagados de cada segmento.
+    \n\t`aguardar() -> None`: Aguarda o fim da compactação em segundo plano.
+    \n\t`fechar(aguardar=False) -> None`: Fecha os segmentos, sem esperar pela compactação em segundo plano (a menos que `aguardar` seja True).
+
+    Exemplo:
+    >>> indice = IndiceSegmentado("index-Root")
+    >>> indice.adicionar_indice(indexer.inverted_index)
+    'seg-000001'
+    >>> indice.remover(["https://www.ifmg.edu.br/antiga"])
+    1
+    >>> buscador = Buscador("index-Root")
+    """
+
+    MANIFESTO = 'manifesto.json'
+    APAGADOS = 'apagados.bin'
+
+    def __init__(self, diretorio, fator=10, compactacao_automatica=True) -> None:
+        """
+        O construtor da classe IndiceSegmentado.
+
+        Este método cria o diretório e um manifesto vazio, se necessário, abre os segmentos listados no manifesto e carrega os seus mapas de remoções.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório do índice.
+        \n\t`fator (int)`: O número de segmentos de uma camada que dispara a intercalação. O valor padrão é 10.
+        \n\t`compactacao_automatica (bool)`: Se True, compacta os segmentos em segundo plano após cada alteração. O valor padrão é True.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.diretorio = diretorio
+        self.fator = fator
+        self.compactacao_automatica = compactacao_automatica
+        self._escrita = threading.RLock()
+        # Protege o estado da thread de compactação e o pedido de fechamento
+        self._estado = threading.Lock()
+        self._compactacao = None
+        self._compactando = False
+        self._fechado = False
+        self._assinatura = None
+        self._segmentos = []
+        self._localizacao = {}
+        # O número de termos vivos e o estado do manifesto em que ele foi contado
+        self._n_termos = None
+        self._assinatura_termos = None
+        os.makedirs(diretorio, exist_ok=True)
+        if not IndiceSegmentado.eh_segmentado(diretorio):
+            self.geracao = 0
+            self._proximo = 1
+            self._gravar_manifesto()
+        self._carregar()
+
+    @staticmethod
+    def eh_segmentado(diretorio) -> bool:
+        """
+        Verifica se um diretório contém um índice segmentado.
+
+        Parâmetros:
+        \n\t`diretorio (str)`: O diretório.
+
+        Retorno:
+        \n\t`bool`: Retorna True se o diretório tiver um manifesto de segmentos.
+        """
+        return os.path.isfile(os.path.join(diretorio, IndiceSegmentado.MANIFESTO))
+
+    def _carregar(self) -> None:
+        """
+        Lê o manifesto, abre os segmentos e reconstrói o mapa das URLs vivas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        caminho = os.path.join(self.diretorio, self.MANIFESTO)
+        with open(caminho, 'r') as file:
+            manifesto = json.load(file)
+        self._assinatura = self._estado_manifesto()
+        self.geracao = manifesto['geracao']
+        self._proximo = manifesto['proximo']
+        abertos = {segmento.nome: segmento for segmento in self._segmentos}
+        segmentos = []
+        localizacao = {}
+        for nome in manifesto['segmentos']:
+            segmento = abertos.get(nome)
+            if segmento is None:
+                segmento = _Segmento(self.diretorio, nome)
+            else:
+                segmento.ler_apagados()
+            segmentos.append(segmento)
+            for doc_id in range(segmento.indice.n_documentos):
+                if not segmento.apagado(doc_id):
+                    localizacao[segmento.indice.url(doc_id)] = (
+                        segmento, doc_id)
+        self._segmentos = segmentos
+        self._localizacao = localizacao
+
+    def _estado_manifesto(self):
+        """
+        Devolve o inode, o tamanho e a data de modificação do manifesto.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`tuple or None`: O estado do arquivo, ou None se ele não existir.
+        """
+        try:
+            stat = os.stat(os.path.join(self.diretorio, self.MANIFESTO))
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _gravar_manifesto(self) -> None:
+        """
+        Grava o manifesto com os segmentos abertos atomicamente (em um arquivo temporário renomeado em seguida) e incrementa a geração.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        nomes = [segmento.nome for segmento in self._segmentos]
+        self.geracao += 1
+        caminho = os.path.join(self.diretorio, self.MANIFESTO)
+        with open(caminho + '.tmp', 'w') as file:
+            json.dump({'geracao': self.geracao, 'proximo': self._proximo,
+                      'segmentos': nomes}, file, indent=4)
+        os.replace(caminho + '.tmp', caminho)
+        self._assinatura = self._estado_manifesto()
+
+    def atualizar(self) -> bool:
+        """
+        Recarrega o manifesto se ele foi alterado por outro processo.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`bool`: Retorna True se o índice foi recarregado.
+        """
+        if self._estado_manifesto() == self._assinatura:
+            return False
+        with self._escrita:
+            if self._estado_manifesto() == self._assinatura:
+                return False
+            self._carregar()
+            return True
+
+    def adicionar_indice(self, inverted_index, urls=()):
+        """
+        Grava um índice invertido como um segmento novo.
+
+        As versões anteriores das URLs do índice (e das URLs de `urls`, por exemplo as páginas recoletadas que não têm mais nenhum termo) são marcadas como apagadas nos segmentos antigos. Chaves cujos valores não são postings no formato `[f, F, n_i, w_ij]` são ignoradas.
+
+        Parâmetros:
+        \n\t`inverted_index (dict)`: O índice invertido das páginas novas ou alteradas, no formato `{termo: {url: [f, F, n_i, w_ij]}}`.
+        \n\t`urls (iterable)`: Outras URLs cujas versões anteriores devem ser apagadas. O valor padrão é uma tupla vazia.
+
+        Retorno:
+        \n\t`str or None`: O nome do segmento criado, ou None se o índice não tinha postings.
+        """
+        termos = {termo: postings for termo, postings in inverted_index.items()
+                  if postings_validos(postings) and postings}
+        substituidas = set(urls)
+        for postings in termos.values():
+            substituidas.update(postings.keys())
+        with self._escrita:
+            self.atualizar()
+            self._apagar(substituidas)
+            nome = None
+            if termos:
+                nome = self._novo_nome()
+                IndiceBinario.escrever(
+                    os.path.join(self.diretorio, nome), termos)
+                segmento = _Segmento(self.diretorio, nome)
+                for doc_id in range(segmento.indice.n_documentos):
+                    self._localizacao[segmento.indice.url(doc_id)] = (
+                        segmento, doc_id)
+                self._segmentos = self._segmentos + [segmento]
+            self._gravar_manifesto()
+        self._agendar_compactacao()
+        return nome
+
+    def remover(self, urls) -> int:
+        """
+        Marca as URLs como apagadas nos mapas de remoções dos seus segmentos e descarta os seus registros do armazém de documentos do índice, se houver um (veja `ArmazemDocumentos`).
+
+        Parâmetros:
+        \n\t`urls (iterable)`: As URLs a remover.
+
+        Retorno:
+        \n\t`int`: O número de URLs que estavam no índice e foram removidas.
+        """
+        urls = set(urls)
+        with self._escrita:
+            self.atualizar()
+            removidas = self._apagar(urls)
+            if removidas:
+                self._gravar_manifesto()
+                arquivo = ArmazemDocumentos.arquivo(self.diretorio)
+                if os.path.exists(arquivo):
+                    ArmazemDocumentos.escrever(
+                        arquivo, {}, acrescentar=True, remover=urls)
+        if removidas:
+            self._agendar_compactacao()
+        return removidas
+
+    def _apagar(self, urls) -> int:
+        """
+        Marca as URLs como apagadas e grava os mapas de remoções alterados.
+
+        Parâmetros:
+        \n\t`urls (iterable)`: As URLs a apagar.
+
+        Retorno:
+        \n\t`int`: O número de URLs apagadas.
+        """
+        alterados = set()
+        apagadas = 0
+        for url in urls:
+            local = self._localizacao.pop(url, None)
+            if local is not None:
+                segmento, doc_id = local
+                segmento.apagar(doc_id)
+                alterados.add(segmento)
+                apagadas += 1
+        for segmento in alterados:
+            segmento.gravar_apagados()
+        return apagadas
+
+    def _novo_nome(self) -> str:
+        """
+        Reserva o nome do próximo segmento.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`str`: O nome do segmento.
+        """
+        nome = f"seg-{self._proximo:06d}"
+        self._proximo += 1
+        return nome
+
+    def compactar(self, forcar=False) -> int:
+        """
+        Intercala os segmentos de acordo com a política de camadas.
+
+        Os segmentos são agrupados pela ordem de grandeza do número de documentos vivos na base `fator`. Uma camada com `fator` ou mais segmentos é intercalada em um único segmento, e um segmento com mais da metade dos documentos apagados é reescrito sem eles. O processo se repete até que nenhuma camada precise de intercalação. Os segmentos sem documentos vivos são descartados.
+
+        Parâmetros:
+        \n\t`forcar (bool)`: Se True, intercala todos os segmentos em um só. O valor padrão é False.
+
+        Retorno:
+        \n\t`int`: O número de intercalações realizadas.
+        """
+        intercalacoes = 0
+        with self._escrita:
+            self.atualizar()
+            while True:
+                grupo = self._escolher(forcar)
+                if not grupo:
+                    break
+                self._intercalar(grupo)
+                intercalacoes += 1
+                forcar = False
+        return intercalacoes
+
+    def _escolher(self, forcar) -> list:
+        """
+        Escolhe os segmentos da próxima intercalação.
+
+        Parâmetros:
+        \n\t`forcar (bool)`: Se True, escolhe todos os segmentos.
+
+        Retorno:
+        \n\t`list`: Os segmentos a intercalar (vazia se nenhuma intercalação for necessária).
+        """
+        segmentos = self._segmentos
+        if forcar:
+            if len(segmentos) > 1 or any(segmento.n_apagados for segmento in segmentos):
+                return list(segmentos)
+            return []
+        for segmento in segmentos:
+            if segmento.vivos() == 0 or segmento.n_apagados * 2 > segmento.indice.n_documentos:
+                return [segmento]
+        camadas = {}
+        for segmento in segmentos:
+            camada = int(math.log(max(segmento.vivos(), 1), self.fator))
+            camadas.setdefault(camada, []).append(segmento)
+        for camada in sorted(camadas):
+            if len(camadas[camada]) >= self.fator:
+                return camadas[camada]
+        return []
+
+    def _intercalar(self, grupo) -> None:
+        """
+        Intercala os postings vivos de um grupo de segmentos em um segmento novo e atualiza o manifesto.
+
+        O segmento novo ocupa a posição do primeiro segmento do grupo na lista de segmentos. Os segmentos antigos são fechados e os seus diretórios, removidos.
+
+        Parâmetros:
+        \n\t`grupo (list)`: Os segmentos a intercalar.
+
+        Retorno:
+        \n\t`None`
+        """
+        novo = None
+        if any(segmento.vivos() for segmento in grupo):
+            nome = self._novo_nome()
+            escritor = EscritorIndiceBinario(
+                os.path.join(self.diretorio, nome))
+            termos = heapq.merge(*(iter(segmento.indice)
+                                 for segmento in grupo))
+            for termo, _ in groupby(termos):
+                frequencias = {}
+                for segmento in grupo:
+                    frequencias.update(segmento.frequencias(termo))
+                if not frequencias:
+                    continue
+                F = sum(frequencias.values())
+                n_i = len(frequencias)
+                escritor.adicionar_termo(termo, {url: [f, F, n_i, Expressoes.calcular_wij(f, F, n_i)]
+                                                 for url, f in frequencias.items()})
+            escritor.fechar()
+            novo = _Segmento(self.diretorio, nome)
+
+        removidos = set(grupo)
+        segmentos = []
+        for segmento in self._segmentos:
+            if segmento not in removidos:
+                segmentos.append(segmento)
+            elif novo is not None and segmento is grupo[0]:
+                segmentos.append(novo)
+        if novo is not None:
+            for doc_id in range(novo.indice.n_documentos):
+                self._localizacao[novo.indice.url(doc_id)] = (novo, doc_id)
+        self._segmentos = segmentos
+        self._gravar_manifesto()
+        for segmento in grupo:
+            # Os leitores de outros processos que ainda usam o segmento mantêm o próprio mapeamento aberto até liberá-lo
+            segmento.indice.fechar()
+            shutil.rmtree(os.path.join(self.diretorio,
+                          segmento.nome), ignore_errors=True)
+
+    def _agendar_compactacao(self) -> None:
+        """
+        Inicia a compactação em uma thread de segundo plano, se ela estiver ativada e ainda não estiver em execução.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if not self.compactacao_automatica:
+            return
+        with self._estado:
+            if self._compactando or self._fechado:
+                return
+            self._compactando = True
+            self._compactacao = threading.Thread(
+                target=self._compactar_em_segundo_plano)
+            self._compactacao.start()
+
+    def _compactar_em_segundo_plano(self) -> None:
+        """
+        Compacta os segmentos na thread de segundo plano e, se o índice foi fechado enquanto isso, fecha os segmentos ao final.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        try:
+            self.compactar()
+        finally:
+            with self._estado:
+                self._compactando = False
+                fechado = self._fechado
+            if fechado:
+                self._fechar_segmentos()
+
+    def aguardar(self) -> None:
+        """
+        Aguarda o fim da compactação em segundo plano.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if self._compactacao is not None:
+            self._compactacao.join()
+
+    def documentos(self) -> int:
+        """
+        Devolve o número de documentos vivos do índice.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`int`: O número de URLs vivas.
+        """
+        self.atualizar()
+        return len(self._localizacao)
+
+    def segmentos(self) -> list:
+        """
+        Devolve a situação de cada segmento.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(nome, documentos, apagados)`.
+        """
+        self.atualizar()
+        return [(segmento.nome, segmento.indice.n_documentos, segmento.n_apagados)
+                for segmento in self._segmentos]
+
+    def __getitem__(self, termo) -> dict:
+        """
+        Devolve os postings vivos de um termo em todos os segmentos, com as estatísticas globais.
+
+        Parâmetros:
+        \n\t`termo (str)`: O termo procurado.
+
+        Retorno:
+        \n\t`dict`: Um dicionário `{url: [f, F, n_i, w_ij]}`, onde F, n_i e `w_ij` são calculados sobre os documentos vivos de todos os segmentos. Um termo sem postings vivos provoca `KeyError`, como um termo inexistente.
+        """
+        self.atualizar()
+        frequencias = {}
+        for segmento in self._segmentos:
+            if termo in segmento.indice:
+                frequencias.update(segmento.frequencias(termo))
+        if not frequencias:
+            raise KeyError(termo)
+        F = sum(frequencias.values())
+        n_i = len(frequencias)
+        return {url: [f, F, n_i, Expressoes.calcular_wij(f, F, n_i)]
+                for url, f in frequencias.items()}
+
+    def _vivo(self, termo) -> bool:
+        """
+        Verifica se um termo tem algum posting vivo em algum segmento.
+        """
+        return any(segmento.vivo(termo) for segmento in self._segmentos)
+
+    def __contains__(self, termo) -> bool:
+        self.atualizar()
+        return self._vivo(termo)
+
+    def __iter__(self):
+        self.atualizar()
+        segmentos = self._segmentos
+        termos = heapq.merge(*(iter(segmento.indice)
+                             for segmento in segmentos))
+        verificar = any(segmento.n_apagados for segmento in segmentos)
+        for termo, _ in groupby(termos):
+            if not verificar or any(segmento.vivo(termo) for segmento in segmentos):
+                yield termo
+
+    def __len__(self) -> int:
+        self.atualizar()
+        with self._escrita:
+            assinatura = self._assinatura
+            if self._assinatura_termos != assinatura:
+                self._n_termos = sum(1 for _ in self)
+                self._assinatura_termos = assinatura
+            return self._n_termos
+
+    def fechar(self, aguardar=False) -> None:
+        """
+        Fecha os segmentos do índice.
+
+        Se uma compactação estiver em andamento, o método retorna sem esperar por ela, e os segmentos são fechados pela thread de compactação quando ela termina. Assim, gravar uma atualização pequena que dispara uma intercalação não custa a intercalação inteira.
+
+        Parâmetros:
+        \n\t`aguardar (bool)`: Se True, aguarda o fim da compactação antes de fechar os segmentos. O valor padrão é False.
+
+        Retorno:
+        \n\t`None`
+        """
+        if aguardar:
+            self.aguardar()
+        with self._estado:
+            self._fechado = True
+            if self._compactando:
+                return
+        self._fechar_segmentos()
+
+    def _fechar_segmentos(self) -> None:
+        """
+        Fecha os índices dos segmentos abertos e esvazia a lista de segmentos.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        with self._escrita:
+            for segmento in self._segmentos:
+                segmento.indice.fechar()
+            self._segmentos = []
+            self._localizacao = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.fechar()
+
+
+class _Segmento:
+    """
+    Um segmento do índice: um índice binário e o seu mapa de bits de documentos apagados.
+    """
+
+    def __init__(self, diretorio, nome) -> None:
+        self.nome = nome
+        self.caminho = os.path.join(diretorio, nome)
+        self.indice = IndiceBinario(self.caminho)
+        self.ler_apagados()
+
+    def ler_apagados(self) -> None:
+        """
+        Lê o mapa de bits de documentos apagados do segmento (vazio se o arquivo não existir).
+        """
+        tamanho = (self.indice.n_documentos + 7) // 8
+        try:
+            with open(os.path.join(self.caminho, IndiceSegmentado.APAGADOS), 'rb') as file:
+                self.apagados = bytearray(file.read().ljust(tamanho, b'\0'))
+        except FileNotFoundError:
+            self.apagados = bytearray(tamanho)
+        self.n_apagados = sum(bin(byte).count('1') for byte in self.apagados)
+
+    def gravar_apagados(self) -> None:
+        """
+        Grava o mapa de bits de documentos apagados atomicamente.
+        """
+        caminho = os.path.join(self.caminho, IndiceSegmentado.APAGADOS)
+        with open(caminho + '.tmp', 'wb') as file:
+            file.write(self.apagados)
+        os.replace(caminho + '.tmp', caminho)
+
+    def apagado(self, doc_id) -> bool:
+        return bool(self.apagados[doc_id >> 3] & (1 << (doc_id & 7)))
+
+    def apagar(self, doc_id) -> None:
+        if not self.apagado(doc_id):
+            self.apagados[doc_id >> 3] |= 1 << (doc_id & 7)
+            self.n_apagados += 1
+
+    def vivos(self) -> int:
+        return self.indice.n_documentos - self.n_apagados
+
+    def vivo(self, termo) -> bool:
+        """
+        Verifica se o termo tem algum posting vivo no segmento, sem decodificar os postings se nenhum documento foi apagado.
+        """
+        if not self.n_apagados:
+            return termo in self.indice
+        colunas = self.indice.colunas(termo)
+        return colunas is not None and not all(map(self.apagado, colunas[0]))
+
+    def frequencias(self, termo) -> dict:
+        """
+        Devolve a frequência do termo em cada documento vivo do segmento.
+        """
+        return {self.indice.url(doc_id): f
+                for doc_id, f, _, _, _ in self.indice.registros(termo)
+                if not self.apagado(doc_id)}
@@ -0,0 +1,225 @@
+import os
+import numpy as np
+from Expressoes import Expressoes
+from IndiceBinario import postings_validos
+
+
+class MatrizCSR:
+    """
+    A classe MatrizCSR armazena o índice invertido como uma matriz esparsa termo×documento no formato CSR (Compressed Sparse Row).
+
+    Cada linha da matriz corresponde a um termo e cada coluna a um documento. O valor da célula é o peso `w_ij` do termo no documento, calculado com `Expressoes.calcular_wij`. Uma consulta é transformada em um vetor esparso sobre os termos e todos os documentos são pontuados com um único produto esparso vetorizado.
+
+    Atributos:
+    \n\t`indptr (numpy.ndarray)`: O início dos valores de cada termo em `indices` e `data` (tamanho n_termos + 1).
+    \n\t`indices (numpy.ndarray)`: O identificador do documento de cada valor.
+    \n\t`data (numpy.ndarray)`: O peso `w_ij` de cada valor.
+    \n\t`termos (dict)`: Um dicionário que mapeia cada termo para o seu identificador (linha da matriz).
+    \n\t`urls (list)`: A URL de cada identificador de documento (coluna da matriz).
+    \n\t`normas (numpy.ndarray)`: A norma euclidiana do vetor de pesos de cada documento.
+
+    Métodos:
+    \n\t`de_indice(inverted_index) -> MatrizCSR`: Constrói a matriz a partir de um índice invertido.
+    \n\t`arquivo(index_file) -> str`: Devolve o caminho do arquivo da matriz associado a um índice.
+    \n\t`salvar(arquivo) -> None`: Salva a matriz em um arquivo `.npz`.
+    \n\t`carregar(arquivo) -> MatrizCSR`: Carrega a matriz de um arquivo `.npz`.
+    \n\t`pontuar(tokens, cosseno=False) -> tuple`: Pontua todos os documentos para os tokens da consulta.
+    \n\t`top_k(tokens, k=10, cosseno=False) -> list`: Devolve os k documentos mais bem pontuados.
+
+    Exemplo:
+    >>> matriz = MatrizCSR.de_indice(indexer.inverted_index)
+    >>> matriz.top_k(["lula", "conta"], k=2)
+    [('https://g1.globo.com', 0.0), ('https://band.uol.com.br', 0.0)]
+    """
+
+    def __init__(self, indptr, indices, data, termos, urls) -> None:
+        """
+        O construtor da classe MatrizCSR.
+
+        Parâmetros:
+        \n\t`indptr (numpy.ndarray)`: O início dos valores de cada termo.
+        \n\t`indices (numpy.ndarray)`: O identificador do documento de cada valor.
+        \n\t`data (numpy.ndarray)`: O peso `w_ij` de cada valor.
+        \n\t`termos (list)`: Os termos, na ordem das linhas da matriz.
+        \n\t`urls (list)`: As URLs, na ordem das colunas da matriz.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.termos = {termo: termo_id for termo_id, termo in enumerate(termos)}
+        self.urls = list(urls)
+        self.normas = np.sqrt(np.bincount(
+            self.indices, weights=self.data ** 2, minlength=len(self.urls)))
+
+    @staticmethod
+    def de_indice(inverted_index):
+        """
+        Constrói a matriz a partir de um índice invertido.
+
+        Os identificadores de documento são atribuídos na ordem em que as URLs aparecem no índice. Chaves cujos valores não são postings no formato `[f, F, n_i, w_ij]` são ignoradas.
+
+        Parâmetros:
+        \n\t`inverted_index (dict or IndiceBinario)`: O índice invertido no formato `{termo: {url: [f, F, n_i, w_ij]}}`.
+
+        Retorno:
+        \n\t`MatrizCSR`: A matriz construída.
+        """
+        documentos = {}
+        termos = []
+        indptr = [0]
+        indices = []
+        data = []
+        for termo in inverted_index.keys():
+            postings = inverted_index[termo]
+            if not postings_validos(postings):
+                continue
+            termos.append(termo)
+            for url, valores in postings.items():
+                doc_id = documentos.setdefault(url, len(documentos))
+                indices.append(doc_id)
+                data.append(Expressoes.calcular_wij(
+                    valores[0], valores[1], valores[2]))
+            indptr.append(len(indices))
+        return MatrizCSR(indptr, indices, data, termos, documentos.keys())
+
+    @staticmethod
+    def arquivo(index_file) -> str:
+        """
+        Devolve o caminho do arquivo da matriz associado a um índice.
+
+        Para um índice binário, a matriz fica no arquivo `matriz.npz` dentro do diretório do índice. Para um índice JSON, ela fica ao lado do arquivo, com a extensão `.npz`.
+
+        Parâmetros:
+        \n\t`index_file (str)`: O diretório do índice binário ou o arquivo do índice JSON.
+
+        Retorno:
+        \n\t`str`: O caminho do arquivo da matriz.
+        """
+        if os.path.isdir(index_file):
+            return os.path.join(index_file, 'matriz.npz')
+        return os.path.splitext(index_file)[0] + '.npz'
+
+    def salvar(self, arquivo) -> None:
+        """
+        Salva a matriz, o mapa de termos e o mapa de documentos em um arquivo `.npz`.
+
+        Parâmetros:
+        \n\t`arquivo (str)`: O caminho do arquivo.
+
+        Retorno:
+        \n\t`None`
+        """
+        termos, termos_offsets = _empacotar(self.termos.keys())
+        urls, urls_offsets = _empacotar(self.urls)
+        with open(arquivo, 'wb') as file:
+            np.savez(file, indptr=self.indptr, indices=self.indices, data=self.data,
+                     termos=termos, termos_offsets=termos_offsets,
+                     urls=urls, urls_offsets=urls_offsets)
+
+    @staticmethod
+    def carregar(arquivo):
+        """
+        Carrega a matriz de um arquivo `.npz` gravado por `salvar`.
+
+        Parâmetros:
+        \n\t`arquivo (str)`: O caminho do arquivo.
+
+        Retorno:
+        \n\t`MatrizCSR`: A matriz carregada.
+        """
+        with np.load(arquivo) as dados:
+            return MatrizCSR(dados['indptr'], dados['indices'], dados['data'],
+                             _desempacotar(
+                                 dados['termos'], dados['termos_offsets']),
+                             _desempacotar(dados['urls'], dados['urls_offsets']))
+
+    def pontuar(self, tokens, cosseno=False) -> tuple:
+        """
+        Pontua todos os documentos para os tokens da consulta.
+
+        A consulta é transformada em um vetor esparso com peso 1 para cada token distinto presente no vocabulário. A pontuação de cada documento é o produto desse vetor pela matriz, calculado de uma só vez com `numpy.bincount` sobre as linhas selecionadas. Com `cosseno=True`, as pontuações são divididas pelas normas dos documentos e da consulta.
+
+        Parâmetros:
+        \n\t`tokens (list)`: Os tokens da consulta.
+        \n\t`cosseno (bool)`: Se True, aplica a normalização do cosseno. O valor padrão é False.
+
+        Retorno:
+        \n\t`tuple`: Um vetor com a pontuação de cada documento e um vetor booleano que indica os documentos que contêm algum token da consulta.
+        """
+        linhas = [self.termos[token]
+                  for token in dict.fromkeys(tokens) if token in self.termos]
+        n_documentos = len(self.urls)
+        if not linhas:
+            return np.zeros(n_documentos), np.zeros(n_documentos, dtype=bool)
+
+        selecao = np.concatenate([np.arange(self.indptr[linha], self.indptr[linha + 1])
+                                  for linha in linhas])
+        colunas = self.indices[selecao]
+        scores = np.bincount(colunas, weights=self.data[selecao],
+                             minlength=n_documentos)
+        encontrados = np.bincount(colunas, minlength=n_documentos) > 0
+
+        if cosseno:
+            normas = self.normas * np.sqrt(len(linhas))
+            scores = np.divide(scores, normas, out=np.zeros_like(scores),
+                               where=normas > 0)
+        return scores, encontrados
+
+    def top_k(self, tokens, k=10, cosseno=False) -> list:
+        """
+        Devolve os k documentos mais bem pontuados para os tokens da consulta.
+
+        A seleção usa `numpy.argpartition`, sem ordenar todos os documentos. Apenas os documentos que contêm algum token da consulta são considerados e empates são desempatados pela URL.
+
+        Parâmetros:
+        \n\t`tokens (list)`: Os tokens da consulta.
+        \n\t`k (int or None)`: O número de documentos a devolver. Se None, devolve todos os documentos encontrados. O valor padrão é 10.
+        \n\t`cosseno (bool)`: Se True, aplica a normalização do cosseno. O valor padrão é False.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas (URL, pontuação) classificadas em ordem decrescente de pontuação.
+        """
+        scores, encontrados = self.pontuar(tokens, cosseno)
+        candidatos = np.flatnonzero(encontrados)
+        if k is not None and len(candidatos) > k:
+            valores = scores[candidatos]
+            limiar = valores[np.argpartition(-valores, k - 1)[k - 1]]
+            # mantém os empates no limiar para que o desempate pela URL seja exato
+            candidatos = candidatos[valores >= limiar]
+        ranked_urls = sorted(((self.urls[doc_id], float(scores[doc_id])) for doc_id in candidatos),
+                             key=lambda x: (-x[1], x[0]))
+        return ranked_urls if k is None else ranked_urls[:k]
+
+
+def _empacotar(textos) -> tuple:
+    """
+    Concatena uma sequência de textos em um vetor de bytes UTF-8 com offsets.
+
+    Parâmetros:
+    \n\t`textos (iterable)`: Os textos.
+
+    Retorno:
+    \n\t`tuple`: O vetor de bytes (`numpy.uint8`) e o vetor de offsets (`numpy.int64`).
+    """
+    codificados = [texto.encode('utf-8') for texto in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum([len(texto) for texto in codificados], out=offsets[1:])
+    return np.frombuffer(b''.join(codificados), dtype=np.uint8), offsets
+
+
+def _desempacotar(dados, offsets) -> list:
+    """
+    Reconstrói a sequência de textos gravada por `_empacotar`.
+
+    Parâmetros:
+    \n\t`dados (numpy.ndarray)`: O vetor de bytes UTF-8.
+    \n\t`offsets (numpy.ndarray)`: O vetor de offsets.
+
+    Retorno:
+    \n\t`list`: Os textos.
+    """
+    bruto = dados.tobytes()
+    return [bruto[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
@@ -0,0 +1,413 @@
+########## Metricas.py ##########
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+
+
+class Metricas:
+    """
+    A classe Metricas registra contadores e tempos das etapas do sistema (coleta, análise, tokenização, indexação, gravação e consultas) e, opcionalmente, amostra as pilhas de execução de cada etapa.
+
+    O `Coletor`, o `MotorAssincrono`, o `Indexador`, o `EscritorIndiceBinario` e o `Buscador` registram as suas métricas na instância global `METRICAS`, que começa desativada. Desativada, cada ponto de medição custa uma verificação de atributo: `cronometro` devolve um gerenciador de contexto vazio, compartilhado, e `contar` e `observar` retornam imediatamente. As métricas são mantidas por processo: as etapas executadas em outros processos (por exemplo, em `Indexador.indexar_paralelo` ou no `Pipeline` com processos) não são registradas.
+
+    Os tempos são registrados em histogramas com intervalos fixos, no formato dos histogramas do Prometheus. No modo de perfil, uma thread amostra periodicamente as pilhas das threads que estão dentro de um `cronometro` e acumula as pilhas no formato "colapsado" (uma linha `etapa;funcao;funcao... amostras` por pilha), lido por ferramentas de flame graph como o flamegraph.pl e o speedscope.
+
+    Atributos:
+    \n\t`ativo (bool)`: Se as métricas estão sendo registradas.
+    \n\t`LIMITES (tuple)`: Os limites superiores, em segundos, dos intervalos dos histogramas de tempo.
+
+    Métodos:
+    \n\t`ativar(perfil=False, intervalo=0.005) -> None`: Ativa o registro das métricas e, opcionalmente, o perfil por amostragem.
+    \n\t`desativar() -> None`: Desativa o registro das métricas e o perfil.
+    \n\t`zerar() -> None`: Descarta as métricas e as amostras registradas.
+    \n\t`contar(nome, valor=1, **rotulos) -> None`: Incrementa um contador.
+    \n\t`observar(nome, segundos, **rotulos) -> None`: Registra uma duração.
+    \n\t`cronometro(nome, **rotulos)`: Devolve um gerenciador de contexto que registra a duração do bloco.
+    \n\t`instantaneo() -> dict`: Devolve as métricas em um dicionário serializável em JSON.
+    \n\t`prometheus() -> str`: Devolve as métricas no formato de texto do Prometheus.
+    \n\t`perfil() -> dict`: Devolve as pilhas amostradas e o número de amostras de cada uma.
+    \n\t`salvar(arquivo) -> None`: Grava as métricas em JSON (".json") ou no formato do Prometheus (demais extensões).
+    \n\t`salvar_perfil(arquivo) -> None`: Grava as pilhas amostradas no formato colapsado.
+
+    Exemplo:
+    >>> METRICAS.ativar(perfil=True)
+    >>> coletor.extrair_em_profundidade(2, MotorAssincrono())
+    >>> indexer.inverted_index_generator()
+    >>> indexer.save_index()
+    >>> METRICAS.instantaneo()['contadores']['coletor_paginas_total']
+    [{'rotulos': {'host': 'www.ifmg.edu.br'}, 'valor': 87, 'por_s': 9.8}]
+    >>> METRICAS.salvar("metricas.prom")
+    >>> METRICAS.salvar_perfil("perfil.txt")
+    """
+
+    LIMITES = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+               0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self) -> None:
+        """
+        O construtor da classe Metricas. As métricas começam desativadas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        self.ativo = False
+        self._trava = threading.Lock()
+        self._contadores = {}
+        self._tempos = {}
+        self._amostras = {}
+        self._etapas = {}
+        self._perfilador = None
+        self._inicio = time.monotonic()
+        self._duracao = 0.0
+
+    def ativar(self, perfil=False, intervalo=0.005) -> None:
+        """
+        Ativa o registro das métricas.
+
+        Parâmetros:
+        \n\t`perfil (bool)`: Se True, também amostra as pilhas de execução das etapas. O valor padrão é False.
+        \n\t`intervalo (float)`: O intervalo, em segundos, entre duas amostras do perfil. O valor padrão é 0.005.
+
+        Retorno:
+        \n\t`None`
+        """
+        if not self.ativo:
+            self._inicio = time.monotonic()
+            self.ativo = True
+        if perfil and self._perfilador is None:
+            self._perfilador = _Perfilador(self, intervalo)
+            self._perfilador.start()
+
+    def desativar(self) -> None:
+        """
+        Desativa o registro das métricas e o perfil. As métricas registradas são mantidas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if self.ativo:
+            self._duracao += time.monotonic() - self._inicio
+            self.ativo = False
+        if self._perfilador is not None:
+            self._perfilador.parar()
+            self._perfilador = None
+            self._etapas.clear()
+
+    def zerar(self) -> None:
+        """
+        Descarta as métricas e as amostras registradas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        with self._trava:
+            self._contadores.clear()
+            self._tempos.clear()
+            self._amostras.clear()
+            self._inicio = time.monotonic()
+            self._duracao = 0.0
+
+    def contar(self, nome, valor=1, **rotulos) -> None:
+        """
+        Incrementa um contador.
+
+        Parâmetros:
+        \n\t`nome (str)`: O nome do contador, terminado em "_total" por convenção.
+        \n\t`valor (int or float)`: O incremento. O valor padrão é 1.
+        \n\t`**rotulos`: Os rótulos do contador (por exemplo, `host='www.ifmg.edu.br'`).
+
+        Retorno:
+        \n\t`None`
+        """
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, segundos, **rotulos) -> None:
+        """
+        Registra uma duração no histograma de tempos.
+
+        Parâmetros:
+        \n\t`nome (str)`: O nome do histograma, terminado em "_segundos" por convenção.
+        \n\t`segundos (float)`: A duração, em segundos.
+        \n\t`**rotulos`: Os rótulos do histograma.
+
+        Retorno:
+        \n\t`None`
+        """
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        intervalo = bisect.bisect_left(self.LIMITES, segundos)
+        with self._trava:
+            tempo = self._tempos.get(chave)
+            if tempo is None:
+                # quantidade, soma, máximo e a contagem de cada intervalo (o último é +Inf)
+                tempo = self._tempos[chave] = [
+                    0, 0.0, 0.0, [0] * (len(self.LIMITES) + 1)]
+            tempo[0] += 1
+            tempo[1] += segundos
+            tempo[2] = max(tempo[2], segundos)
+            tempo[3][intervalo] += 1
+
+    def cronometro(self, nome, **rotulos):
+        """
+        Devolve um gerenciador de contexto que registra a duração do bloco com `observar`.
+
+        No modo de perfil, o bloco também é a etapa a que são atribuídas as amostras da thread. O nome da etapa é o nome do histograma, sem o sufixo "_segundos", seguido do rótulo `etapa`, se houver.
+
+        Parâmetros:
+        \n\t`nome (str)`: O nome do histograma.
+        \n\t`**rotulos`: Os rótulos do histograma.
+
+        Retorno:
+        \n\t`Cronometro`: O gerenciador de contexto, ou um gerenciador vazio se as métricas estiverem desativadas.
+        """
+        if not self.ativo:
+            return _NULO
+        return _Cronometro(self, nome, rotulos)
+
+    def duracao(self) -> float:
+        """
+        Devolve o tempo, em segundos, durante o qual as métricas estiveram ativas.
+        """
+        if self.ativo:
+            return self._duracao + time.monotonic() - self._inicio
+        return self._duracao
+
+    def instantaneo(self) -> dict:
+        """
+        Devolve as métricas registradas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: Um dicionário com o tempo ativo (`duracao_s`), os contadores (`contadores`, com o valor e a taxa por segundo ativo de cada combinação de rótulos) e os tempos (`tempos`, com a quantidade, a soma, a média e o máximo).
+        """
+        duracao = self.duracao()
+        with self._trava:
+            contadores = sorted(self._contadores.items())
+            tempos = sorted((chave, (quantidade, soma, maximo))
+                            for chave, (quantidade, soma, maximo, _) in self._tempos.items())
+        resultado = {'ativo': self.ativo, 'duracao_s': round(duracao, 3),
+                     'contadores': {}, 'tempos': {}}
+        for (nome, rotulos), valor in contadores:
+            resultado['contadores'].setdefault(nome, []).append({
+                'rotulos': dict(rotulos),
+                'valor': valor,
+                'por_s': round(valor / duracao, 3) if duracao > 0 else 0.0,
+            })
+        for (nome, rotulos), (quantidade, soma, maximo) in tempos:
+            resultado['tempos'].setdefault(nome, []).append({
+                'rotulos': dict(rotulos),
+                'quantidade': quantidade,
+                'soma_s': round(soma, 6),
+                'media_ms': round(1000 * soma / quantidade, 3),
+                'max_ms': round(1000 * maximo, 3),
+            })
+        return resultado
+
+    def prometheus(self) -> str:
+        """
+        Devolve as métricas no formato de texto do Prometheus: os contadores como `counter` e os tempos como `histogram`.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`str`: O texto com as métricas.
+        """
+        with self._trava:
+            contadores = sorted(self._contadores.items())
+            tempos = sorted((chave, (quantidade, soma, list(intervalos)))
+                            for chave, (quantidade, soma, _, intervalos) in self._tempos.items())
+        linhas = []
+        anterior = None
+        for (nome, rotulos), valor in contadores:
+            if nome != anterior:
+                linhas.append(f"# TYPE {nome} counter")
+                anterior = nome
+            linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), (quantidade, soma, intervalos) in tempos:
+            if nome != anterior:
+                linhas.append(f"# TYPE {nome} histogram")
+                anterior = nome
+            acumulado = 0
+            for limite, contagem in zip(self.LIMITES + ('+Inf',), intervalos):
+                acumulado += contagem
+                linhas.append(
+                    f"{nome}_bucket{_rotulos(rotulos + (('le', str(limite)),))} {acumulado}")
+            linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma}")
+            linhas.append(f"{nome}_count{_rotulos(rotulos)} {quantidade}")
+        return "\n".join(linhas) + "\n"
+
+    def perfil(self) -> dict:
+        """
+        Devolve as pilhas amostradas pelo perfil.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: Um dicionário `{pilha: amostras}`, em que a pilha é a etapa seguida das funções, da mais externa para a mais interna, separadas por ";".
+        """
+        with self._trava:
+            return dict(self._amostras)
+
+    def salvar(self, arquivo) -> None:
+        """
+        Grava as métricas em JSON, se o nome do arquivo terminar em ".json", ou no formato de texto do Prometheus.
+
+        Parâmetros:
+        \n\t`arquivo (str)`: O nome do arquivo.
+
+        Retorno:
+        \n\t`None`
+        """
+        with open(arquivo, 'w') as file:
+            if arquivo.endswith('.json'):
+                json.dump(self.instantaneo(), file,
+                          indent=4, ensure_ascii=False)
+            else:
+                file.write(self.prometheus())
+
+    def salvar_perfil(self, arquivo) -> None:
+        """
+        Grava as pilhas amostradas no formato colapsado, uma linha `pilha amostras` por pilha, da mais amostrada para a menos amostrada.
+
+        Parâmetros:
+        \n\t`arquivo (str)`: O nome do arquivo.
+
+        Retorno:
+        \n\t`None`
+        """
+        with open(arquivo, 'w') as file:
+            for pilha, amostras in sorted(self.perfil().items(), key=lambda item: -item[1]):
+                file.write(f"{pilha} {amostras}\n")
+
+    def _entrar(self, etapa) -> None:
+        """
+        Empilha a etapa atual da thread, para o perfil.
+        """
+        self._etapas.setdefault(threading.get_ident(), []).append(etapa)
+
+    def _sair(self) -> None:
+        """
+        Desempilha a etapa atual da thread.
+        """
+        etapas = self._etapas.get(threading.get_ident())
+        if etapas:
+            etapas.pop()
+
+
+class _Cronometro:
+    """
+    Mede a duração de um bloco e a registra ao sair dele (veja `Metricas.cronometro`).
+    """
+
+    __slots__ = ('metricas', 'nome', 'rotulos', 'inicio', 'etapa')
+
+    def __init__(self, metricas, nome, rotulos) -> None:
+        self.metricas = metricas
+        self.nome = nome
+        self.rotulos = rotulos
+        self.etapa = None
+
+    def __enter__(self):
+        if self.metricas._perfilador is not None:
+            self.etapa = self.nome.removesuffix('_segundos')
+            if 'etapa' in self.rotulos:
+                self.etapa += f":{self.rotulos['etapa']}"
+            self.metricas._entrar(self.etapa)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao) -> None:
+        self.metricas.observar(
+            self.nome, time.perf_counter() - self.inicio, **self.rotulos)
+        if self.etapa is not None:
+            self.metricas._sair()
+
+
+class _CronometroNulo:
+    """
+    O gerenciador de contexto vazio devolvido por `Metricas.cronometro` quando as métricas estão desativadas.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao) -> None:
+        pass
+
+
+class _Perfilador(threading.Thread):
+    """
+    Amostra periodicamente as pilhas das threads que estão dentro de um `cronometro`.
+    """
+
+    def __init__(self, metricas, intervalo) -> None:
+        super().__init__(name="perfilador-metricas", daemon=True)
+        self.metricas = metricas
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+
+    def run(self) -> None:
+        metricas = self.metricas
+        while not self._parar.wait(self.intervalo):
+            pilhas = []
+            for ident, quadro in sys._current_frames().items():
+                etapas = metricas._etapas.get(ident)
+                if not etapas:
+                    continue
+                funcoes = []
+                while quadro is not None:
+                    codigo = quadro.f_code
+                    funcoes.append(
+                        f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                    quadro = quadro.f_back
+                funcoes.append(etapas[-1])
+                pilhas.append(";".join(reversed(funcoes)))
+            with metricas._trava:
+                for pilha in pilhas:
+                    metricas._amostras[pilha] = metricas._amostras.get(
+                        pilha, 0) + 1
+
+    def parar(self) -> None:
+        self._parar.set()
+        self.join()
+
+
+def _rotulos(rotulos) -> str:
+    """
+    Formata os rótulos de uma métrica no formato do Prometheus, como `{host="exemplo.com",le="0.1"}`.
+    """
+    if not rotulos:
+        return ""
+    valores = ",".join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for nome, valor in rotulos)
+    return "{" + valores + "}"
+
+
+_NULO = _CronometroNulo()
+
+# A instância global usada pelas classes do sistema
+METRICAS = Metricas()
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from Metricas import METRICAS
+
+
+class MotorAssincrono:
+    """
+    A classe MotorAssincrono coleta várias URLs ao mesmo tempo com `asyncio`.
+
+    O motor limita o número total de requisições simultâneas e o número de requisições simultâneas por host. O intervalo entre requisições (`atraso`, ou o `Crawl-delay` do host, se for maior) é aplicado separadamente a cada host, inclusive entre chamadas sucessivas de `coletar`, de modo que coletar hosts diferentes não espera pelos atrasos uns dos outros. As requisições usam o `requests` com tempos limite separados de conexão e de leitura e são executadas em um pool de threads controlado pelo laço de eventos.
+
+    Um objeto MotorAssincrono pode ser passado como `params_page` para `Coletor.extrair_informacoes` e `Coletor.extrair_em_profundidade`.
+
+    Atributos:
+    \n\t`concorrencia (int)`: O número máximo de requisições simultâneas.
+    \n\t`por_host (int)`: O número máximo de requisições simultâneas para o mesmo host.
+    \n\t`atraso (float)`: O intervalo mínimo, em segundos, entre o início de duas requisições para o mesmo host.
+    \n\t`timeout_conexao (float)`: O tempo limite, em segundos, para estabelecer a conexão.
+    \n\t`timeout_leitura (float)`: O tempo limite, em segundos, para ler a resposta.
+
+    Métodos:
+    \n\t`coletar(urls, permitido=None, sessoes=None, atraso_host=None) -> list`: Coleta as URLs e devolve o resultado de cada uma, na mesma ordem.
+
+    Exemplo:
+    >>> coletor = Coletor("Root")
+    >>> coletor.addUrl("https://g1.globo.com")
+    >>> coletor.addUrl("https://www.r7.com")
+    >>> coletor.extrair_informacoes(MotorAssincrono(concorrencia=8, por_host=2, atraso=1.0))
+    >>> print(len(coletor.objects_url))
+    2
+    """
+
+    def __init__(self, concorrencia=16, por_host=2, atraso=0.0, timeout_conexao=5.0, timeout_leitura=30.0) -> None:
+        """
+        O construtor da classe MotorAssincrono.
+
+        Parâmetros:
+        \n\t`concorrencia (int)`: O número máximo de requisições simultâneas. O valor padrão é 16.
+        \n\t`por_host (int)`: O número máximo de requisições simultâneas para o mesmo host. O valor padrão é 2.
+        \n\t`atraso (float)`: O intervalo mínimo, em segundos, entre requisições para o mesmo host. O valor padrão é 0.0.
+        \n\t`timeout_conexao (float)`: O tempo limite de conexão, em segundos. O valor padrão é 5.0.
+        \n\t`timeout_leitura (float)`: O tempo limite de leitura, em segundos. O valor padrão é 30.0.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.concorrencia = concorrencia
+        self.por_host = por_host
+        self.atraso = atraso
+        self.timeout_conexao = timeout_conexao
+        self.timeout_leitura = timeout_leitura
+        self._proxima = {}
+
+    def coletar(self, urls, permitido=None, sessoes=None, atraso_host=None) -> list:
+        """
+        Coleta as URLs concorrentemente.
+
+        Parâmetros:
+        \n\t`urls (list)`: As URLs a serem coletadas.
+        \n\t`permitido (callable or None)`: Uma função que recebe a URL e devolve se a coleta é permitida (por exemplo, `Coletor.can_fetch`). Ela também é executada fora do laço de eventos. Se None, todas as URLs são coletadas.
+        \n\t`sessoes (PoolSessoes or None)`: O pool de sessões persistentes usado nas requisições. Se None, usa `requests.get`.
+        \n\t`atraso_host (callable or None)`: Uma função que recebe a URL e devolve o `Crawl-delay` do host (ou None).
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(url, status, html)`, na mesma ordem das URLs. `status` é None quando a coleta foi proibida e 0 quando a requisição falhou; `html` só é preenchido quando `status` é 200.
+        """
+        if not urls:
+            return []
+        self._sessoes = sessoes
+        self._atraso_host = atraso_host
+        return asyncio.run(self._coletar_todas(list(urls), permitido))
+
+    async def _coletar_todas(self, urls, permitido) -> list:
+        """
+        Cria as tarefas de coleta de todas as URLs e aguarda o resultado de cada uma.
+
+        Parâmetros:
+        \n\t`urls (list)`: As URLs a serem coletadas.
+        \n\t`permitido (callable or None)`: A função que verifica se a coleta é permitida.
+
+        Retorno:
+        \n\t`list`: Os resultados, na mesma ordem das URLs.
+        """
+        self._global = asyncio.Semaphore(self.concorrencia)
+        self._hosts = {}
+        self._travas = {}
+        with ThreadPoolExecutor(max_workers=self.concorrencia) as executor:
+            self._executor = executor
+            return await asyncio.gather(*(self._coletar_url(url, permitido) for url in urls))
+
+    async def _coletar_url(self, url, permitido) -> tuple:
+        """
+        Coleta uma URL respeitando o limite global, o limite por host e o atraso do host.
+
+        A vaga do host é obtida e o atraso do host é aguardado antes da vaga global, que é ocupada apenas durante o download. Assim, as requisições que esperam pelo `Crawl-delay` de um host não ocupam as vagas globais dos demais hosts.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL a ser coletada.
+        \n\t`permitido (callable or None)`: A função que verifica se a coleta é permitida.
+
+        Retorno:
+        \n\t`tuple`: O resultado `(url, status, html)`.
+        """
+        loop = asyncio.get_running_loop()
+        host = urlparse(url).netloc
+        semaforo_host = self._hosts.setdefault(
+            host, asyncio.Semaphore(self.por_host))
+
+        async with semaforo_host:
+            if permitido is not None and not await loop.run_in_executor(self._executor, permitido, url):
+                return url, None, None
+            atraso = self.atraso
+            if self._atraso_host is not None:
+                atraso_host = await loop.run_in_executor(self._executor, self._atraso_host, url)
+                atraso = max(atraso, atraso_host or 0)
+            await self._aguardar_host(host, atraso)
+            async with self._global:
+                try:
+                    status, html = await loop.run_in_executor(self._executor, self._baixar, url)
+                except requests.RequestException:
+                    return url, 0, None
+        return url, status, html
+
+    async def _aguardar_host(self, host, atraso) -> None:
+        """
+        Aguarda até que o intervalo mínimo desde a última requisição ao host tenha passado.
+
+        Parâmetros:
+        \n\t`host (str)`: O host da URL.
+        \n\t`atraso (float)`: O intervalo mínimo entre requisições ao host.
+
+        Retorno:
+        \n\t`None`
+        """
+        if atraso <= 0:
+            return
+        async with self._travas.setdefault(host, asyncio.Lock()):
+            espera = self._proxima.get(host, 0) - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            self._proxima[host] = time.monotonic() + atraso
+
+    def _baixar(self, url) -> tuple:
+        """
+        Faz a requisição GET da URL (executado em uma thread do pool).
+
+        Parâmetros:
+        \n\t`url (str)`: A URL a ser coletada.
+
+        Retorno:
+        \n\t`tuple`: O código de status HTTP e o HTML da página (ou None, se o status não for 200).
+        """
+        timeout = (self.timeout_conexao, self.timeout_leitura)
+        host = urlparse(url).netloc
+        with METRICAS.cronometro('coletor_download_segundos', host=host):
+            if self._sessoes is not None:
+                response = self._sessoes.get(url, timeout=timeout)
+            else:
+                response = requests.get(url, timeout=timeout)
+        if METRICAS.ativo:
+            METRICAS.contar('coletor_bytes_total',
+                            len(response.content), host=host)
+        if response.status_code == 200:
+            return response.status_code, response.text
+        return response.status_code, None
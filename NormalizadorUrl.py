@@ -0,0 +1,141 @@
+########## NormalizadorUrl.py ##########
+import re
+from urllib.parse import urlsplit, urlunsplit, unquote_plus
+
+
+class NormalizadorUrl:
+    """
+    A classe NormalizadorUrl converte as URLs para uma forma canônica, de modo que formas trivialmente diferentes do mesmo endereço sejam reconhecidas como a mesma página pela `Fronteira`.
+
+    A normalização remove o fragmento, converte o esquema e o host para minúsculas (removendo o ponto final do host), remove a porta padrão do esquema (80 para HTTP e 443 para HTTPS), resolve os segmentos "." e ".." do caminho, usa "/" como caminho vazio, decodifica os caracteres não reservados codificados com "%" (e usa maiúsculas nos demais códigos), remove os parâmetros de rastreamento da consulta (`utm_*`, `gclid`, `fbclid`, ...) e ordena os parâmetros restantes pelo nome, mantendo a ordem relativa dos parâmetros repetidos, que alguns servidores tratam como uma lista ordenada.
+
+    A forma canônica identifica a página no conjunto de URLs vistas da `Fronteira`, mas não substitui a URL coletada, que é a URL original sem o fragmento.
+
+    A barra final do caminho não é removida da URL normalizada, apenas da chave usada no conjunto de URLs vistas (veja `chave`).
+
+    Atributos:
+    \n\t`PARAMETROS_RASTREAMENTO (frozenset)`: Os parâmetros de rastreamento removidos da consulta, além dos que começam com `utm_`.
+    \n\t`PORTAS_PADRAO (dict)`: A porta padrão de cada esquema.
+
+    Métodos:
+    \n\t`normalizar(url) -> str`: Devolve a forma canônica da URL.
+    \n\t`chave(url) -> str`: Devolve a chave de uma URL normalizada no conjunto de URLs vistas (a URL sem a barra final do caminho).
+
+    Exemplo:
+    >>> NormalizadorUrl.normalizar("HTTPS://WWW.IFMG.edu.br:443/a/./b/../c/?utm_source=x&q=1#topo")
+    'https://www.ifmg.edu.br/a/c/?q=1'
+    >>> NormalizadorUrl.chave('https://www.ifmg.edu.br/a/c/?q=1')
+    'https://www.ifmg.edu.br/a/c?q=1'
+    """
+
+    PARAMETROS_RASTREAMENTO = frozenset({
+        'gclid', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'igshid',
+        'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok',
+    })
+    PORTAS_PADRAO = {'http': 80, 'https': 443}
+
+    _CODIGO = re.compile(r'%([0-9A-Fa-f]{2})')
+    _NAO_RESERVADOS = frozenset(
+        'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+    @staticmethod
+    def normalizar(url) -> str:
+        """
+        Devolve a forma canônica da URL.
+
+        URLs que não podem ser analisadas (por exemplo, com uma porta inválida) são devolvidas apenas sem o fragmento.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+
+        Retorno:
+        \n\t`str`: A URL normalizada.
+        """
+        partes = urlsplit(url.strip())
+        esquema = partes.scheme.lower()
+        try:
+            porta = partes.port
+        except ValueError:
+            return urlunsplit(partes._replace(fragment=''))
+        host = (partes.hostname or '').rstrip('.')
+        if ':' in host:
+            host = f'[{host}]'
+        usuario, arroba, _ = partes.netloc.rpartition('@')
+        netloc = usuario + arroba + host
+        if porta is not None and porta != NormalizadorUrl.PORTAS_PADRAO.get(esquema):
+            netloc += f':{porta}'
+        caminho = NormalizadorUrl._caminho(partes.path) if netloc else partes.path
+        consulta = NormalizadorUrl._consulta(partes.query)
+        return urlunsplit((esquema, netloc, caminho, consulta, ''))
+
+    @staticmethod
+    def chave(url) -> str:
+        """
+        Devolve a chave de uma URL normalizada no conjunto de URLs vistas: a própria URL sem a barra final do caminho (exceto quando o caminho é "/").
+
+        Parâmetros:
+        \n\t`url (str)`: A URL normalizada (veja `normalizar`).
+
+        Retorno:
+        \n\t`str`: A chave da URL.
+        """
+        base, separador, consulta = url.partition('?')
+        # "esquema://host/" tem três barras; com mais, a barra final não é a raiz
+        if base.endswith('/') and base.count('/') > 3:
+            base = base.rstrip('/')
+        return base + separador + consulta
+
+    @staticmethod
+    def _codigos(texto) -> str:
+        """
+        Decodifica os caracteres não reservados codificados com "%" e usa maiúsculas nos demais códigos.
+        """
+        if '%' not in texto:
+            return texto
+
+        def substituir(codigo):
+            caractere = chr(int(codigo.group(1), 16))
+            if caractere in NormalizadorUrl._NAO_RESERVADOS:
+                return caractere
+            return codigo.group(0).upper()
+        return NormalizadorUrl._CODIGO.sub(substituir, texto)
+
+    @staticmethod
+    def _caminho(caminho) -> str:
+        """
+        Normaliza o caminho: resolve os segmentos "." e "..", usa "/" como caminho vazio e normaliza os códigos "%".
+        """
+        if not caminho:
+            return '/'
+        caminho = NormalizadorUrl._codigos(caminho)
+        if '/.' not in caminho:
+            return caminho
+        segmentos = []
+        partes = caminho.split('/')[1:]
+        for segmento in partes:
+            if segmento == '..':
+                if segmentos:
+                    segmentos.pop()
+            elif segmento != '.':
+                segmentos.append(segmento)
+        if partes[-1] in ('.', '..'):
+            segmentos.append('')
+        return '/' + '/'.join(segmentos)
+
+    @staticmethod
+    def _consulta(consulta) -> str:
+        """
+        Remove os parâmetros de rastreamento (e os separadores "&" repetidos) da consulta e ordena os demais parâmetros pelo nome. A ordenação é estável, de modo que os parâmetros repetidos mantêm a sua ordem.
+        """
+        if not consulta:
+            return ''
+        parametros = []
+        for parametro in consulta.split('&'):
+            if not parametro:
+                continue
+            nome = unquote_plus(parametro.partition('=')[0]).lower()
+            if nome.startswith('utm_') or nome in NormalizadorUrl.PARAMETROS_RASTREAMENTO:
+                continue
+            parametros.append(NormalizadorUrl._codigos(parametro))
+        parametros.sort(key=lambda parametro: parametro.partition('=')[0])
+        return '&'.join(parametros)
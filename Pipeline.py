@@ -0,0 +1,235 @@
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from Coletor import Coletor
+from Duplicatas import Duplicatas
+from Indexador import Indexador
+from Metricas import METRICAS
+from Url import Url
+
+_FIM = None
+
+
+class Pipeline:
+    """
+    A classe Pipeline coleta, analisa e indexa as páginas em fluxo contínuo, sem acumular a coleta inteira em `Coletor.objects_url`.
+
+    O trabalho é dividido em três estágios ligados por filas limitadas:
+
+    1. Coleta (thread que chama `executar`): retira as URLs da fronteira do coletor e baixa as páginas.
+    2. Análise (`analisadores` threads, ou processos com `processos=True`): extrai os campos de cada página (veja `Url.de_html`), tokeniza os subtítulos e encontra os links a seguir. Se o indexador tiver um detector de duplicatas, também calcula a assinatura MinHash da página (veja `Duplicatas`).
+    3. Indexação (uma thread): descarta as páginas quase duplicadas de páginas já indexadas, adiciona cada página tokenizada ao índice do indexador (veja `Indexador.adicionar_documento`) e devolve os links encontrados para a fronteira.
+
+    Quando uma fila está cheia, o estágio anterior aguarda (contrapressão), de modo que o número de páginas em memória é limitado por `tamanho_fila`, e não pelo tamanho da coleta.
+
+    Atributos:
+    \n\t`coletor (Coletor)`: O coletor que fornece a fronteira e baixa as páginas.
+    \n\t`indexador (Indexador)`: O indexador que recebe as páginas tokenizadas.
+    \n\t`tamanho_fila (int)`: O número máximo de páginas em cada fila entre os estágios.
+    \n\t`analisadores (int)`: O número de trabalhadores do estágio de análise.
+    \n\t`processos (bool)`: Se True, a análise é executada em processos separados.
+    \n\t`paginas (int)`: O número de páginas indexadas pela última execução.
+
+    Métodos:
+    \n\t`executar(profundidade=0, params=None, mesmo_dominio=True) -> int`: Coleta e indexa as páginas e devolve o número de páginas indexadas.
+
+    Exemplo:
+    >>> coletor = Coletor("Root")
+    >>> coletor.addUrl("https://www.ifmg.edu.br")
+    >>> indexer = Indexador(coletor)
+    >>> Pipeline(coletor, indexer, analisadores=2).executar(2, MotorAssincrono())
+    42
+    >>> indexer.save_index()
+    index-Root = 128
+    """
+
+    def __init__(self, coletor, indexador, tamanho_fila=64, analisadores=1, processos=False) -> None:
+        """
+        O construtor da classe Pipeline.
+
+        Parâmetros:
+        \n\t`coletor (Coletor)`: O coletor com as URLs iniciais.
+        \n\t`indexador (Indexador)`: O indexador que recebe as páginas.
+        \n\t`tamanho_fila (int)`: O número máximo de páginas em cada fila entre os estágios. O valor padrão é 64.
+        \n\t`analisadores (int)`: O número de trabalhadores do estágio de análise. O valor padrão é 1.
+        \n\t`processos (bool)`: Se True, a análise é executada em um pool de processos com `analisadores` processos. O valor padrão é False.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.coletor = coletor
+        self.indexador = indexador
+        self.tamanho_fila = tamanho_fila
+        self.analisadores = analisadores
+        self.processos = processos
+        self.paginas = 0
+
+    def executar(self, profundidade=0, params=None, mesmo_dominio=True) -> int:
+        """
+        Coleta, analisa e indexa as páginas em largura (BFS) até a profundidade especificada.
+
+        A profundidade e o escopo seguem as mesmas regras de `Coletor.extrair_em_profundidade`. Os valores de F, n e wij são calculados depois, por `Indexador.save_index`.
+
+        Parâmetros:
+        \n\t`profundidade (int)`: O número de níveis a coletar. O valor padrão é 0 (apenas as URLs pendentes, sem seguir links).
+        \n\t`params`: O modo de coleta (veja `Coletor.extrair_informacoes`). O valor padrão é None.
+        \n\t`mesmo_dominio (bool)`: Se True, apenas os links dos mesmos hosts das URLs pendentes são seguidos. O valor padrão é True.
+
+        Retorno:
+        \n\t`int`: O número de páginas indexadas. Um erro do estágio de indexação (por exemplo, uma falha de E/S ao gravar um bloco SPIMI) interrompe a coleta e é propagado depois que as threads são encerradas.
+        """
+        coletor = self.coletor
+        if profundidade > 1 and mesmo_dominio:
+            coletor.restringir_dominio()
+        self.paginas = 0
+        paginas = queue.Queue(self.tamanho_fila)
+        documentos = queue.Queue(self.tamanho_fila)
+        retornos = queue.SimpleQueue()
+        executor = ProcessPoolExecutor(
+            self.analisadores) if self.processos else None
+
+        analisadores = [threading.Thread(target=self._analisar, args=(paginas, documentos, executor), daemon=True)
+                        for _ in range(self.analisadores)]
+        indexacao = threading.Thread(target=self._indexar, args=(
+            documentos, retornos), daemon=True)
+        for thread in analisadores + [indexacao]:
+            thread.start()
+
+        try:
+            tamanho = coletor.tamanho_lote(params)
+            pendentes = 0
+            while True:
+                while not retornos.empty():
+                    pendentes -= self._seguir(retornos.get())
+                if coletor.fronteira:
+                    lote = coletor.fronteira.retirar_lote(tamanho)
+                    niveis = dict(lote)
+                    for url, html in coletor.baixar([url for url, _ in lote], params):
+                        if html is not None:
+                            nivel = niveis[url]
+                            # bloqueia enquanto a fila estiver cheia (contrapressão)
+                            paginas.put(
+                                (url, nivel, html, nivel + 1 < profundidade))
+                            pendentes += 1
+                elif pendentes:
+                    pendentes -= self._seguir(retornos.get())
+                else:
+                    break
+        finally:
+            for _ in analisadores:
+                paginas.put(_FIM)
+            for thread in analisadores:
+                thread.join()
+            documentos.put(_FIM)
+            indexacao.join()
+            if executor is not None:
+                executor.shutdown()
+        return self.paginas
+
+    def _seguir(self, retorno) -> int:
+        """
+        Insere na fronteira os links de uma página indexada.
+
+        Parâmetros:
+        \n\t`retorno (tuple or Exception)`: A tupla `(links, nivel)` enviada pelo estágio de indexação, ou o erro que interrompeu a indexação, que é propagado.
+
+        Retorno:
+        \n\t`int`: Sempre 1 (uma página a menos em andamento).
+        """
+        if isinstance(retorno, Exception):
+            raise retorno
+        links, nivel = retorno
+        self.coletor.seguir_links(links, nivel)
+        return 1
+
+    def _analisar(self, paginas, documentos, executor) -> None:
+        """
+        Estágio de análise: extrai os tokens e os links de cada página da fila.
+
+        Parâmetros:
+        \n\t`paginas (queue.Queue)`: A fila de páginas baixadas.
+        \n\t`documentos (queue.Queue)`: A fila de páginas analisadas.
+        \n\t`executor (ProcessPoolExecutor or None)`: O pool de processos, ou None para analisar na própria thread.
+
+        Retorno:
+        \n\t`None`
+        """
+        stop_words = self.indexador.stop_words
+        duplicatas = self.indexador.duplicatas
+        assinatura = None if duplicatas is None else (
+            duplicatas.permutacoes, duplicatas.minimo)
+        while True:
+            item = paginas.get()
+            if item is _FIM:
+                return
+            url, nivel, html, seguir = item
+            try:
+                with METRICAS.cronometro('pipeline_analise_segundos'):
+                    if executor is not None:
+                        tokens, links, impressao = executor.submit(
+                            analisar_pagina, url, html, stop_words, seguir, assinatura).result()
+                    else:
+                        tokens, links, impressao = analisar_pagina(
+                            url, html, stop_words, seguir, assinatura)
+            except Exception as erro:
+                print(f"Falha ao analisar a página {url}: {erro}")
+                tokens, links, impressao = None, [], None
+            documentos.put((url, nivel, tokens, links, impressao))
+
+    def _indexar(self, documentos, retornos) -> None:
+        """
+        Estágio de indexação: adiciona cada página analisada ao índice e devolve os seus links para a fronteira.
+
+        Se a indexação de uma página falhar, o erro é enviado pela fila de retornos ao estágio de coleta, que o propaga, e as páginas seguintes são descartadas até o fim da fila, de modo que os outros estágios não fiquem bloqueados.
+
+        Parâmetros:
+        \n\t`documentos (queue.Queue)`: A fila de páginas analisadas.
+        \n\t`retornos (queue.SimpleQueue)`: A fila de links (ou do erro da indexação) devolvidos ao estágio de coleta.
+
+        Retorno:
+        \n\t`None`
+        """
+        falhou = False
+        while True:
+            item = documentos.get()
+            if item is _FIM:
+                return
+            if falhou:
+                continue
+            url, nivel, tokens, links, impressao = item
+            duplicatas = self.indexador.duplicatas
+            try:
+                if tokens is not None and (duplicatas is None or duplicatas.verificar(url, impressao, tokens) is None):
+                    self.indexador.adicionar_documento(url, tokens)
+                    self.paginas += 1
+            except Exception as erro:
+                falhou = True
+                retornos.put(erro)
+                continue
+            retornos.put((links, nivel + 1))
+
+
+def analisar_pagina(url, html, stop_words, seguir, assinatura=None) -> tuple:
+    """
+    Extrai os tokens dos subtítulos e, se necessário, os links absolutos e a assinatura MinHash de uma página.
+
+    A função é executada nas threads ou nos processos do estágio de análise do `Pipeline`.
+
+    Parâmetros:
+    \n\t`url (str)`: A URL da página.
+    \n\t`html (str)`: O HTML da página.
+    \n\t`stop_words (set)`: O conjunto de stop words.
+    \n\t`seguir (bool)`: Se True, também devolve os links da página.
+    \n\t`assinatura (tuple or None)`: O número de permutações e o número mínimo de tokens da assinatura MinHash (veja `Duplicatas.assinatura`), ou None para não calculá-la.
+
+    Retorno:
+    \n\t`tuple`: Os tokens da página, a lista de links absolutos (vazia se `seguir` for False) e a assinatura (ou None).
+    """
+    objeto = Url.de_html(url, html)
+    tokens = Indexador.tokenizar(objeto.titles, stop_words)
+    links = Coletor.links_absolutos(url, objeto.links) if seguir else []
+    impressao = None
+    if assinatura is not None:
+        impressao = Duplicatas.assinatura(
+            Duplicatas.textos(objeto), *assinatura)
+    return tokens, links, impressao
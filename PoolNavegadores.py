@@ -0,0 +1,238 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+class PoolNavegadores:
+    """
+    A classe PoolNavegadores mantém um conjunto de navegadores headless (Chrome, via Selenium) reutilizados entre as páginas.
+
+    Em vez de abrir e fechar um navegador para cada URL, o pool mantém `navegadores` instâncias de longa duração e distribui as páginas entre elas, renderizando várias páginas em paralelo. Cada navegador é iniciado sob demanda, tem um tempo limite de carregamento de página e é reciclado (fechado e substituído por um novo) depois de `paginas_por_navegador` páginas ou quando falha.
+
+    Um objeto PoolNavegadores pode ser passado como `params_page` para `Coletor.extrair_informacoes` e `Coletor.extrair_em_profundidade`.
+
+    Atributos:
+    \n\t`navegadores (int)`: O número de navegadores do pool.
+    \n\t`paginas_por_navegador (int)`: O número de páginas renderizadas por um navegador antes de ele ser reciclado.
+    \n\t`timeout_carregamento (float)`: O tempo limite, em segundos, para carregar uma página.
+    \n\t`fabrica (callable)`: A função que cria um navegador (por padrão, um Chrome headless).
+
+    Métodos:
+    \n\t`renderizar(urls, atraso_host=None) -> list`: Renderiza as URLs em paralelo e devolve o HTML de cada uma, na mesma ordem.
+    \n\t`estatisticas() -> dict`: Devolve o número de navegadores iniciados, de páginas renderizadas, de reciclagens e de falhas.
+    \n\t`fechar() -> None`: Fecha todos os navegadores.
+
+    Exemplo:
+    >>> coletor = Coletor("Root")
+    >>> coletor.addUrl("https://www.ifmg.edu.br")
+    >>> with PoolNavegadores(navegadores=2) as navegadores:
+    ...     coletor.extrair_em_profundidade(2, navegadores)
+    >>> navegadores.estatisticas()["navegadores_iniciados"]
+    2
+    """
+
+    def __init__(self, navegadores=2, paginas_por_navegador=50, timeout_carregamento=30.0, fabrica=None) -> None:
+        """
+        O construtor da classe PoolNavegadores.
+
+        Parâmetros:
+        \n\t`navegadores (int)`: O número de navegadores do pool. O valor padrão é 2.
+        \n\t`paginas_por_navegador (int)`: O número de páginas antes de reciclar um navegador. O valor padrão é 50.
+        \n\t`timeout_carregamento (float)`: O tempo limite de carregamento de uma página, em segundos. O valor padrão é 30.0.
+        \n\t`fabrica (callable or None)`: Uma função sem parâmetros que cria um navegador com a interface do `webdriver` do Selenium (`get`, `page_source`, `set_page_load_timeout` e `quit`). Se None, cria um Chrome headless.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.navegadores = navegadores
+        self.paginas_por_navegador = paginas_por_navegador
+        self.timeout_carregamento = timeout_carregamento
+        self.fabrica = fabrica if fabrica is not None else _chrome_headless
+        self.iniciados = 0
+        self.paginas = 0
+        self.reciclagens = 0
+        self.falhas = 0
+        self._lock = threading.Lock()
+        self._livres = queue.Queue()
+        for _ in range(navegadores):
+            self._livres.put(_Navegador())
+        self._proxima = {}
+        self._travas = {}
+
+    def renderizar(self, urls, atraso_host=None) -> list:
+        """
+        Renderiza as URLs em paralelo, uma por navegador livre.
+
+        Parâmetros:
+        \n\t`urls (list)`: As URLs a serem renderizadas.
+        \n\t`atraso_host (callable or None)`: Uma função que recebe a URL e devolve o intervalo mínimo, em segundos, entre requisições ao host (por exemplo, o `Crawl-delay`), ou None.
+
+        Retorno:
+        \n\t`list`: Uma lista de tuplas `(url, html)`, na mesma ordem das URLs. `html` é o código-fonte da página após a renderização, ou None se a página não pôde ser carregada.
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=self.navegadores) as executor:
+            return list(executor.map(lambda url: self._renderizar_url(url, atraso_host), urls))
+
+    def _renderizar_url(self, url, atraso_host) -> tuple:
+        """
+        Renderiza uma URL com o primeiro navegador livre, reciclando-o se necessário.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL a ser renderizada.
+        \n\t`atraso_host (callable or None)`: A função que devolve o intervalo mínimo entre requisições ao host.
+
+        Retorno:
+        \n\t`tuple`: A tupla `(url, html)`.
+        """
+        if atraso_host is not None:
+            self._aguardar_host(url, atraso_host(url) or 0)
+        navegador = self._livres.get()
+        try:
+            if navegador.driver is None:
+                navegador.driver = self.fabrica()
+                navegador.driver.set_page_load_timeout(
+                    self.timeout_carregamento)
+                navegador.paginas = 0
+                with self._lock:
+                    self.iniciados += 1
+            try:
+                navegador.driver.get(url)
+                html = navegador.driver.page_source
+            except TimeoutException:
+                print(f"Tempo limite excedido ao carregar a página: {url}")
+                with self._lock:
+                    self.falhas += 1
+                return url, None
+            except WebDriverException:
+                print(f"Falha no navegador ao carregar a página: {url}")
+                with self._lock:
+                    self.falhas += 1
+                self._reciclar(navegador)
+                return url, None
+            navegador.paginas += 1
+            with self._lock:
+                self.paginas += 1
+            if navegador.paginas >= self.paginas_por_navegador:
+                self._reciclar(navegador)
+            return url, html
+        finally:
+            self._livres.put(navegador)
+
+    def _aguardar_host(self, url, atraso) -> None:
+        """
+        Aguarda até que o intervalo mínimo desde a última requisição ao host da URL tenha passado.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+        \n\t`atraso (float)`: O intervalo mínimo entre requisições ao host.
+
+        Retorno:
+        \n\t`None`
+        """
+        if atraso <= 0:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            trava = self._travas.setdefault(host, threading.Lock())
+        with trava:
+            espera = self._proxima.get(host, 0) - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            self._proxima[host] = time.monotonic() + atraso
+
+    def _reciclar(self, navegador) -> None:
+        """
+        Fecha o navegador; um novo navegador é criado na próxima página atribuída a ele.
+
+        Parâmetros:
+        \n\t`navegador (_Navegador)`: O navegador a ser reciclado.
+
+        Retorno:
+        \n\t`None`
+        """
+        if navegador.driver is None:
+            return
+        try:
+            navegador.driver.quit()
+        except WebDriverException:
+            pass
+        navegador.driver = None
+        with self._lock:
+            self.reciclagens += 1
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas de uso do pool.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: Um dicionário com `navegadores_iniciados`, `paginas`, `reciclagens` e `falhas`.
+        """
+        with self._lock:
+            return {
+                'navegadores_iniciados': self.iniciados,
+                'paginas': self.paginas,
+                'reciclagens': self.reciclagens,
+                'falhas': self.falhas,
+            }
+
+    def fechar(self) -> None:
+        """
+        Fecha todos os navegadores abertos. O pool continua utilizável: novos navegadores são criados sob demanda.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        navegadores = [self._livres.get() for _ in range(self.navegadores)]
+        for navegador in navegadores:
+            if navegador.driver is not None:
+                try:
+                    navegador.driver.quit()
+                except WebDriverException:
+                    pass
+                navegador.driver = None
+            self._livres.put(navegador)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.fechar()
+
+
+class _Navegador:
+    """
+    Um navegador do pool e o número de páginas que ele já renderizou.
+    """
+
+    def __init__(self) -> None:
+        self.driver = None
+        self.paginas = 0
+
+
+def _chrome_headless():
+    """
+    Cria um navegador Chrome headless.
+
+    Parâmetros:
+    \n\t`None`
+
+    Retorno:
+    \n\t`selenium.webdriver.Chrome`: O navegador.
+    """
+    opcoes = webdriver.ChromeOptions()
+    opcoes.add_argument('--headless=new')
+    opcoes.add_argument('--disable-gpu')
+    return webdriver.Chrome(options=opcoes)
@@ -0,0 +1,167 @@
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class PoolSessoes:
+    """
+    A classe PoolSessoes mantém uma sessão HTTP persistente (keep-alive) por host.
+
+    Cada host recebe uma `requests.Session` com o seu próprio pool de conexões, de modo que as requisições seguintes ao mesmo host reaproveitam as conexões já abertas em vez de abrir uma nova conexão (e um novo handshake TLS) a cada página.
+
+    Atributos:
+    \n\t`conexoes_por_host (int)`: O número máximo de conexões mantidas abertas para cada host.
+    \n\t`requisicoes (int)`: O número de requisições respondidas.
+    \n\t`conexoes (int)`: O número de conexões TCP abertas.
+
+    Métodos:
+    \n\t`get(url, **kwargs) -> requests.Response`: Faz uma requisição GET com a sessão do host da URL.
+    \n\t`estatisticas() -> dict`: Devolve o número de requisições, de conexões abertas e de conexões reutilizadas.
+    \n\t`fechar() -> None`: Fecha todas as sessões.
+
+    Exemplo:
+    >>> sessoes = PoolSessoes()
+    >>> sessoes.get("https://www.ifmg.edu.br", timeout=10).status_code
+    200
+    >>> sessoes.get("https://www.ifmg.edu.br/portal", timeout=10).status_code
+    200
+    >>> sessoes.estatisticas()["conexoes_reutilizadas"]
+    1
+    """
+
+    def __init__(self, conexoes_por_host=4) -> None:
+        """
+        O construtor da classe PoolSessoes.
+
+        Parâmetros:
+        \n\t`conexoes_por_host (int)`: O número máximo de conexões mantidas abertas para cada host. O valor padrão é 4.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.conexoes_por_host = conexoes_por_host
+        self.requisicoes = 0
+        self.conexoes = 0
+        self._sessoes = {}
+        self._lock = threading.Lock()
+        self._classes_pool = _classes_pool_contadas(self)
+
+    def sessao(self, url) -> requests.Session:
+        """
+        Devolve a sessão do host da URL, criando-a na primeira requisição ao host.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+
+        Retorno:
+        \n\t`requests.Session`: A sessão do host.
+        """
+        parsed_url = urlparse(url)
+        host = parsed_url.scheme + "://" + parsed_url.netloc
+        with self._lock:
+            sessao = self._sessoes.get(host)
+            if sessao is None:
+                sessao = requests.Session()
+                adaptador = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.conexoes_por_host)
+                adaptador.poolmanager.pool_classes_by_scheme = self._classes_pool
+                sessao.mount('http://', adaptador)
+                sessao.mount('https://', adaptador)
+                self._sessoes[host] = sessao
+        return sessao
+
+    def get(self, url, **kwargs) -> requests.Response:
+        """
+        Faz uma requisição GET com a sessão do host da URL.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL.
+        \n\t`**kwargs`: Os argumentos repassados para `requests.Session.get` (por exemplo, `timeout`).
+
+        Retorno:
+        \n\t`requests.Response`: A resposta da requisição.
+        """
+        response = self.sessao(url).get(url, **kwargs)
+        with self._lock:
+            self.requisicoes += 1
+        return response
+
+    def estatisticas(self) -> dict:
+        """
+        Devolve as estatísticas de uso das conexões.
+
+        Cada conexão TCP aberta pelas sessões (inclusive as reaberturas de conexões encerradas pelo servidor) é contada. As demais requisições foram atendidas por conexões reutilizadas.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: Um dicionário com `hosts`, `requisicoes`, `conexoes_abertas` e `conexoes_reutilizadas`.
+        """
+        with self._lock:
+            return {
+                'hosts': len(self._sessoes),
+                'requisicoes': self.requisicoes,
+                'conexoes_abertas': self.conexoes,
+                'conexoes_reutilizadas': max(0, self.requisicoes - self.conexoes),
+            }
+
+    def _registrar_conexao(self) -> None:
+        """
+        Conta uma nova conexão TCP (chamado pelas conexões do urllib3 ao conectar).
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        with self._lock:
+            self.conexoes += 1
+
+    def fechar(self) -> None:
+        """
+        Fecha todas as sessões e as suas conexões.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        with self._lock:
+            for sessao in self._sessoes.values():
+                sessao.close()
+            self._sessoes = {}
+
+
+def _classes_pool_contadas(pool_sessoes) -> dict:
+    """
+    Cria as classes de pool de conexões do urllib3 que avisam o PoolSessoes a cada nova conexão TCP.
+
+    Parâmetros:
+    \n\t`pool_sessoes (PoolSessoes)`: O objeto que conta as conexões.
+
+    Retorno:
+    \n\t`dict`: As classes de pool por esquema, no formato de `PoolManager.pool_classes_by_scheme`.
+    """
+    class ConexaoHTTP(HTTPConnection):
+        def connect(self):
+            super().connect()
+            pool_sessoes._registrar_conexao()
+
+    class ConexaoHTTPS(HTTPSConnection):
+        def connect(self):
+            super().connect()
+            pool_sessoes._registrar_conexao()
+
+    class PoolHTTP(HTTPConnectionPool):
+        ConnectionCls = ConexaoHTTP
+
+    class PoolHTTPS(HTTPSConnectionPool):
+        ConnectionCls = ConexaoHTTPS
+
+    return {'http': PoolHTTP, 'https': PoolHTTPS}
@@ -0,0 +1,528 @@
+########## ServidorBusca.py ##########
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+from urllib.parse import parse_qs, urlsplit
+from Buscador import Buscador, ConsultaNaoSuportada
+
+# O Buscador de cada processo trabalhador, aberto pelo inicializador do pool
+_BUSCADOR = None
+
+
+class ServidorBusca:
+    """
+    A classe ServidorBusca é um serviço HTTP/JSON de busca que carrega o índice uma única vez e atende várias consultas ao mesmo tempo.
+
+    As conexões são atendidas por um laço `asyncio`, e a pontuação das consultas, que usa a CPU, é executada em um pool de processos trabalhadores, cada um com o seu próprio `Buscador` (ou em threads do próprio processo, com `processos=0`). Cada consulta tem um tempo máximo de resposta.
+
+    O servidor verifica periodicamente a versão do índice no disco (veja `Buscador.versao_arquivo`). Quando um índice novo é gravado, e a sua versão permanece a mesma por um intervalo de verificação, um pool novo é aberto com o índice novo e substitui o anterior sem interromper o serviço: as consultas em andamento terminam no pool antigo.
+
+    As latências de cada operação são registradas em um histograma com intervalos em progressão geométrica, e os percentis p50, p95 e p99 são publicados em `/metricas`.
+
+    Rotas (apenas GET):
+    \n\t`/rank?q=consulta&k=10&modo=ou`: O ranqueamento dos k melhores documentos (veja `Buscador.rank`), com os documentos que contêm algum dos tokens (`modo=ou`), todos eles (`modo=e`) ou a frase (`modo=frase`).
+    \n\t`/deep_search?q=consulta&k=10`: Os links da busca em profundidade (veja `Buscador.deep_search`), em ordem alfabética.
+    \n\t`/width_search?q=consulta&k=10`: Os links da busca em largura (veja `Buscador.width_search`), em ordem alfabética.
+    \n\t`/metricas`: As latências e os contadores de cada operação e o estado do índice.
+
+    Atributos:
+    \n\t`index_file (str)`: O arquivo JSON ou o diretório do índice.
+    \n\t`host (str)`: O endereço em que o servidor escuta.
+    \n\t`porta (int)`: A porta em que o servidor escuta.
+    \n\t`processos (int)`: O número de processos trabalhadores (0 para usar threads).
+    \n\t`timeout (float)`: O tempo máximo de uma consulta, em segundos.
+    \n\t`intervalo_recarga (float)`: O intervalo entre as verificações da versão do índice, em segundos.
+    \n\t`recargas (int)`: O número de vezes em que o pool de trabalhadores foi substituído (por um índice novo ou após a falha de um trabalhador).
+    \n\t`latencias (dict)`: O histograma de latências de cada operação.
+
+    Métodos:
+    \n\t`executar() -> None`: Inicia o servidor e atende as requisições até ser interrompido.
+    \n\t`iniciar() -> None`: Abre o índice e começa a escutar (corrotina).
+    \n\t`parar() -> None`: Encerra o servidor e os trabalhadores (corrotina).
+    \n\t`metricas() -> dict`: Devolve as latências e os contadores de cada operação.
+
+    Exemplo:
+    >>> python ServidorBusca.py index-Root --porta 8080
+    Servindo index-Root em http://127.0.0.1:8080
+    >>> curl "http://127.0.0.1:8080/rank?q=ifmg&k=3"
+    {"operacao": "rank", "consulta": "ifmg", "k": 3, "total": 1, "resultados": [["https://www.ifmg.edu.br", 3.58]], "tempo_ms": 0.41}
+    """
+
+    OPERACOES = ('rank', 'deep_search', 'width_search')
+    STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+              500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+    def __init__(self, index_file, host='127.0.0.1', porta=8080, processos=None, timeout=5.0,
+                 intervalo_recarga=1.0, max_k=1000, timeout_ocioso=15.0) -> None:
+        """
+        O construtor da classe ServidorBusca.
+
+        Parâmetros:
+        \n\t`index_file (str)`: O arquivo JSON ou o diretório do índice.
+        \n\t`host (str)`: O endereço em que o servidor escuta. O valor padrão é '127.0.0.1'.
+        \n\t`porta (int)`: A porta em que o servidor escuta (0 para escolher uma porta livre). O valor padrão é 8080.
+        \n\t`processos (int or None)`: O número de processos trabalhadores. Se None, usa o número de CPUs; se 0, as consultas são executadas em threads do próprio processo. O valor padrão é None.
+        \n\t`timeout (float)`: O tempo máximo de uma consulta, em segundos. O valor padrão é 5.0.
+        \n\t`intervalo_recarga (float)`: O intervalo entre as verificações da versão do índice, em segundos. O valor padrão é 1.0.
+        \n\t`max_k (int)`: O maior valor aceito para o parâmetro k. O valor padrão é 1000.
+        \n\t`timeout_ocioso (float)`: O tempo máximo, em segundos, que uma conexão pode ficar sem enviar requisições. O valor padrão é 15.0.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.index_file = index_file
+        self.host = host
+        self.porta = porta
+        self.processos = (os.cpu_count() or 1) if processos is None else processos
+        self.timeout = timeout
+        self.intervalo_recarga = intervalo_recarga
+        self.max_k = max_k
+        self.timeout_ocioso = timeout_ocioso
+        self.versao = None
+        self.recargas = 0
+        self.latencias = {operacao: _Histograma()
+                          for operacao in self.OPERACOES}
+        self._executor = None
+        self._buscador = None
+        self._servidor = None
+        self._monitor = None
+        self._recarga = None
+        self._inicio = None
+
+    def executar(self) -> None:
+        """
+        Inicia o servidor e atende as requisições até que o processo seja interrompido (Ctrl+C).
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        async def servir():
+            await self.iniciar()
+            print(
+                f"Servindo {self.index_file} em http://{self.host}:{self.porta}")
+            try:
+                await self._servidor.serve_forever()
+            finally:
+                await self.parar()
+
+        with suppress(KeyboardInterrupt):
+            asyncio.run(servir())
+
+    async def iniciar(self) -> None:
+        """
+        Abre o índice nos trabalhadores, começa a escutar na porta e inicia a verificação periódica do índice.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        self._recarga = asyncio.Lock()
+        self.versao = Buscador.versao_arquivo(self.index_file)
+        self._executor, self._buscador = await self._carregar()
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta)
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+        self._inicio = time.monotonic()
+        self._monitor = asyncio.create_task(self._monitorar())
+
+    async def parar(self) -> None:
+        """
+        Encerra o servidor, a verificação do índice e os trabalhadores.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        if self._monitor is not None:
+            self._monitor.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._monitor
+            self._monitor = None
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _carregar(self) -> tuple:
+        """
+        Abre o índice em um pool novo de trabalhadores.
+
+        No modo de processos, o método aguarda os trabalhadores iniciarem, de modo que um índice inválido é detectado antes de o pool receber consultas. Os trabalhadores são criados por um processo servidor limpo (`forkserver`), quando disponível, para que não herdem as conexões abertas dos clientes.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`tuple`: O executor e o `Buscador` compartilhado pelas threads (ou None, no modo de processos).
+        """
+        loop = asyncio.get_running_loop()
+        if self.processos > 0:
+            metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            executor = ProcessPoolExecutor(self.processos, mp_context=multiprocessing.get_context(metodo),
+                                           initializer=_iniciar_trabalhador, initargs=(self.index_file,))
+            try:
+                await asyncio.gather(*(loop.run_in_executor(executor, os.getpid)
+                                       for _ in range(self.processos)))
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            return executor, None
+        buscador = await loop.run_in_executor(None, Buscador, self.index_file)
+        return ThreadPoolExecutor(), buscador
+
+    async def _monitorar(self) -> None:
+        """
+        Verifica periodicamente a versão do índice e o substitui quando um índice novo é gravado.
+
+        A troca só acontece depois de a versão nova permanecer a mesma por um intervalo de verificação, para não abrir um índice que ainda está sendo gravado.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`None`
+        """
+        candidata = None
+        while True:
+            await asyncio.sleep(self.intervalo_recarga)
+            versao = Buscador.versao_arquivo(self.index_file)
+            if versao is None or versao == self.versao:
+                candidata = None
+            elif versao != candidata:
+                candidata = versao
+            else:
+                await self._trocar(versao)
+                candidata = None
+
+    async def _trocar(self, versao, quebrado=None) -> None:
+        """
+        Abre o índice em um pool novo e substitui o pool atual.
+
+        Parâmetros:
+        \n\t`versao (tuple)`: A versão do índice que está sendo aberta.
+        \n\t`quebrado (Executor or None)`: O pool com um trabalhador que terminou inesperadamente. Se ele já tiver sido substituído, nada é feito.
+
+        Retorno:
+        \n\t`None`
+        """
+        async with self._recarga:
+            if quebrado is not None and quebrado is not self._executor:
+                return
+            try:
+                executor, buscador = await self._carregar()
+            except Exception as erro:
+                print(f"Falha ao abrir o índice {self.index_file}: {erro}")
+                return
+            antigo = self._executor
+            self._executor, self._buscador, self.versao = executor, buscador, versao
+            self.recargas += 1
+            if antigo is not None:
+                # As consultas já enviadas ao pool antigo terminam normalmente
+                antigo.shutdown(wait=False)
+
+    async def _consultar(self, operacao, query, k, modo='ou') -> dict:
+        """
+        Executa uma operação de busca no pool de trabalhadores, com o tempo máximo de resposta.
+
+        Parâmetros:
+        \n\t`operacao (str)`: 'rank', 'deep_search' ou 'width_search'.
+        \n\t`query (str)`: A consulta de pesquisa.
+        \n\t`k (int)`: O número de resultados a devolver.
+        \n\t`modo (str)`: O modo de consulta de 'rank' (veja `Buscador.rank`). O valor padrão é 'ou'.
+
+        Retorno:
+        \n\t`dict`: O número total de resultados e os k primeiros resultados.
+        """
+        loop = asyncio.get_running_loop()
+        executor, buscador = self._executor, self._buscador
+        try:
+            if buscador is None:
+                futuro = loop.run_in_executor(
+                    executor, _executar_no_trabalhador, operacao, query, k, modo)
+            else:
+                futuro = loop.run_in_executor(
+                    executor, _executar, buscador, operacao, query, k, modo)
+            return await asyncio.wait_for(futuro, self.timeout)
+        except BrokenProcessPool:
+            # Um trabalhador terminou inesperadamente: o pool é recriado em segundo plano
+            asyncio.create_task(self._trocar(self.versao, executor))
+            raise
+
+    async def _atender(self, reader, writer) -> None:
+        """
+        Atende as requisições HTTP/1.1 de uma conexão, mantendo-a aberta entre as requisições (keep-alive).
+
+        Parâmetros:
+        \n\t`reader (asyncio.StreamReader)`: O fluxo de leitura da conexão.
+        \n\t`writer (asyncio.StreamWriter)`: O fluxo de escrita da conexão.
+
+        Retorno:
+        \n\t`None`
+        """
+        try:
+            while True:
+                try:
+                    cabecalho = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.timeout_ocioso)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                linhas = cabecalho.decode('latin-1').split('\r\n')
+                partes = linhas[0].split()
+                cabecalhos = {}
+                for linha in linhas[1:]:
+                    nome, separador, valor = linha.partition(':')
+                    if separador:
+                        cabecalhos[nome.strip().lower()] = valor.strip()
+                try:
+                    if len(partes) != 3:
+                        raise ValueError(linhas[0])
+                    tamanho = int(cabecalhos.get('content-length', 0))
+                except ValueError:
+                    await self._responder(writer, 400, {'erro': 'requisição inválida'}, False)
+                    return
+                if tamanho:
+                    await reader.readexactly(tamanho)
+                metodo, alvo, versao_http = partes
+                conexao = cabecalhos.get('connection', '').lower()
+                manter = conexao == 'keep-alive' or (
+                    versao_http == 'HTTP/1.1' and conexao != 'close')
+                status, corpo = await self._processar(metodo, alvo)
+                await self._responder(writer, status, corpo, manter)
+                if not manter:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _processar(self, metodo, alvo) -> tuple:
+        """
+        Executa uma requisição e devolve o status HTTP e o corpo da resposta.
+
+        Os parâmetros inválidos e as consultas que o índice não suporta (uma `ConsultaNaoSuportada` do `Buscador`, como `modo=frase` em um índice sem posições) são respondidos com o status 400 e a mensagem do erro; os demais erros da consulta, inclusive um `ValueError` de uma falha interna, com o status 500.
+
+        Parâmetros:
+        \n\t`metodo (str)`: O método HTTP.
+        \n\t`alvo (str)`: O caminho e a query string da requisição.
+
+        Retorno:
+        \n\t`tuple`: O status HTTP e o dicionário a ser enviado como JSON.
+        """
+        if metodo != 'GET':
+            return 405, {'erro': f"método não suportado: {metodo}"}
+        partes = urlsplit(alvo)
+        caminho = partes.path.rstrip('/')
+        if caminho == '/metricas':
+            return 200, self.metricas()
+        operacao = caminho[1:]
+        if operacao not in self.OPERACOES:
+            return 404, {'erro': f"rota desconhecida: {partes.path}"}
+        parametros = parse_qs(partes.query)
+        query = parametros.get('q', [''])[0]
+        try:
+            k = int(parametros.get('k', ['10'])[0])
+        except ValueError:
+            k = 0
+        if not query.strip():
+            return 400, {'erro': "o parâmetro q é obrigatório"}
+        if not 1 <= k <= self.max_k:
+            return 400, {'erro': f"o parâmetro k deve estar entre 1 e {self.max_k}"}
+        modo = parametros.get('modo', ['ou'])[0]
+        if modo not in Buscador.MODOS:
+            return 400, {'erro': f"o parâmetro modo deve ser um de {', '.join(Buscador.MODOS)}"}
+
+        inicio = time.perf_counter()
+        try:
+            resultado = await self._consultar(operacao, query, k, modo)
+            status = 200
+            corpo = {'operacao': operacao, 'consulta': query, 'k': k, **resultado}
+            if operacao == 'rank':
+                corpo['modo'] = modo
+        except asyncio.TimeoutError:
+            status, corpo = 504, {'erro': f"tempo esgotado ({self.timeout} s)"}
+        except BrokenProcessPool:
+            status, corpo = 503, {'erro': "trabalhador indisponível, tente novamente"}
+        except ConsultaNaoSuportada as erro:
+            # Uma consulta que o índice não suporta (por exemplo, modo=frase sem posições) é um erro do cliente
+            status, corpo = 400, {'erro': str(erro)}
+        except Exception as erro:
+            status, corpo = 500, {'erro': repr(erro)}
+        decorrido = time.perf_counter() - inicio
+        self.latencias[operacao].registrar(decorrido, status)
+        if status == 200:
+            corpo['tempo_ms'] = round(1000 * decorrido, 3)
+        return status, corpo
+
+    async def _responder(self, writer, status, corpo, manter) -> None:
+        """
+        Envia uma resposta HTTP com o corpo em JSON.
+
+        Parâmetros:
+        \n\t`writer (asyncio.StreamWriter)`: O fluxo de escrita da conexão.
+        \n\t`status (int)`: O status HTTP.
+        \n\t`corpo (dict)`: O corpo da resposta.
+        \n\t`manter (bool)`: Se True, a conexão é mantida aberta.
+
+        Retorno:
+        \n\t`None`
+        """
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        cabecalho = (f"HTTP/1.1 {status} {self.STATUS[status]}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(dados)}\r\n"
+                     f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n")
+        writer.write(cabecalho.encode('latin-1') + dados)
+        await writer.drain()
+
+    def metricas(self) -> dict:
+        """
+        Devolve as latências e os contadores de cada operação e o estado do índice.
+
+        Parâmetros:
+        \n\t`None`
+
+        Retorno:
+        \n\t`dict`: O estado do índice (`indice`) e, para cada operação, o número de requisições, de erros e de tempos esgotados, a latência média e máxima, os percentis p50, p95 e p99 e o histograma (`operacoes`).
+        """
+        return {
+            'indice': {
+                'arquivo': self.index_file,
+                'recargas': self.recargas,
+                'processos': self.processos,
+                'em_execucao_s': round(time.monotonic() - self._inicio, 3) if self._inicio else 0.0,
+            },
+            'operacoes': {operacao: histograma.resumo() for operacao, histograma in self.latencias.items()},
+        }
+
+
+class _Histograma:
+    """
+    Um histograma de latências com intervalos em progressão geométrica (de 0,05 ms a 2 minutos, com razão 1,2).
+
+    Os percentis são estimados pelo limite superior do intervalo em que caem, com erro relativo de no máximo 20%, usando memória constante.
+    """
+
+    LIMITES = []
+    _limite = 0.05
+    while _limite < 120000:
+        LIMITES.append(round(_limite, 4))
+        _limite *= 1.2
+    del _limite
+
+    def __init__(self) -> None:
+        self.contagens = [0] * (len(self.LIMITES) + 1)
+        self.requisicoes = 0
+        self.erros = 0
+        self.tempos_esgotados = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos, status=200) -> None:
+        milissegundos = 1000 * segundos
+        self.contagens[bisect.bisect_left(self.LIMITES, milissegundos)] += 1
+        self.requisicoes += 1
+        self.soma += milissegundos
+        self.maximo = max(self.maximo, milissegundos)
+        if status == 504:
+            self.tempos_esgotados += 1
+        elif status != 200:
+            self.erros += 1
+
+    def percentil(self, p) -> float:
+        if not self.requisicoes:
+            return 0.0
+        alvo = p * self.requisicoes
+        acumulado = 0
+        for posicao, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                if posicao == len(self.LIMITES):
+                    return round(self.maximo, 3)
+                return round(min(self.LIMITES[posicao], self.maximo), 3)
+        return round(self.maximo, 3)
+
+    def resumo(self) -> dict:
+        limites = self.LIMITES + [None]
+        return {
+            'requisicoes': self.requisicoes,
+            'erros': self.erros,
+            'tempos_esgotados': self.tempos_esgotados,
+            'media_ms': round(self.soma / self.requisicoes, 3) if self.requisicoes else 0.0,
+            'p50_ms': self.percentil(0.50),
+            'p95_ms': self.percentil(0.95),
+            'p99_ms': self.percentil(0.99),
+            'max_ms': round(self.maximo, 3),
+            'histograma': [[limites[posicao], contagem] for posicao, contagem in enumerate(self.contagens) if contagem],
+        }
+
+
+def _iniciar_trabalhador(index_file) -> None:
+    """
+    Abre o índice em um processo trabalhador do `ServidorBusca`.
+
+    Parâmetros:
+    \n\t`index_file (str)`: O arquivo JSON ou o diretório do índice.
+
+    Retorno:
+    \n\t`None`
+    """
+    global _BUSCADOR
+    _BUSCADOR = Buscador(index_file)
+
+
+def _executar_no_trabalhador(operacao, query, k, modo='ou') -> dict:
+    """
+    Executa uma operação de busca com o `Buscador` do processo trabalhador.
+    """
+    return _executar(_BUSCADOR, operacao, query, k, modo)
+
+
+def _executar(buscador, operacao, query, k, modo='ou') -> dict:
+    """
+    Executa uma operação de busca e limita o resultado aos k primeiros.
+
+    Parâmetros:
+    \n\t`buscador (Buscador)`: O buscador.
+    \n\t`operacao (str)`: 'rank', 'deep_search' ou 'width_search'.
+    \n\t`query (str)`: A consulta de pesquisa.
+    \n\t`k (int)`: O número de resultados a devolver.
+    \n\t`modo (str)`: O modo de consulta de 'rank' (veja `Buscador.rank`). O valor padrão é 'ou'.
+
+    Retorno:
+    \n\t`dict`: O número total de resultados (`total`) e os k primeiros resultados (`resultados`).
+    """
+    if operacao == 'rank':
+        resultados = buscador.rank(query, k, modo)
+        return {'total': len(resultados), 'resultados': resultados}
+    links = sorted(getattr(buscador, operacao)(query))
+    return {'total': len(links), 'resultados': links[:k]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Servidor HTTP/JSON de busca sobre um índice invertido.")
+    parser.add_argument("index_file")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+    ServidorBusca(args.index_file, args.host, args.porta,
+                  args.processos, args.timeout).executar()
@@ -1,6 +1,10 @@
 ########## SistemaRI.py ##########
+import os
 from Coletor import Coletor
+from Duplicatas import Duplicatas
 from Indexador import Indexador
+from Metricas import METRICAS
+from Pipeline import Pipeline
 from Buscador import *
 
 """
@@ -8,14 +12,15 @@ O script SistemaRI.py é um sistema de recuperação de informações que realiz
 
 1. Cria um objeto da classe Coletor.
 2. Adiciona URLs ao coletor.
-3. Extrai as informações das URLs adicionadas ao coletor.
-4. Cria um objeto da classe Indexador com o coletor.
-5. Gera um índice invertido.
-6. Salva o índice invertido em um arquivo JSON.
-7. Solicita ao usuário que insira uma consulta de pesquisa.
-8. Cria um objeto da classe Buscador com o nome do arquivo do índice invertido.
-9. Pesquisa a consulta de pesquisa no índice invertido.
-10. Imprime os resultados da pesquisa.
+3. Cria um objeto da classe Indexador com o coletor.
+4. Coleta as páginas e gera o índice invertido em fluxo contínuo (Pipeline), indexando cada página enquanto a coleta continua.
+5. Salva o índice invertido em formato binário (diretório index-Root).
+6. Solicita ao usuário que insira uma consulta de pesquisa.
+7. Cria um objeto da classe Buscador com o nome do diretório do índice invertido.
+8. Pesquisa a consulta de pesquisa no índice invertido.
+9. Imprime os resultados da pesquisa.
+
+Com a variável de ambiente `SRI_METRICAS=1`, as métricas de desempenho e o perfil por amostragem são ativados durante a coleta e a indexação e gravados em `metricas.json` e `perfil.txt`.
 
 Exemplo de uso:
 >>> python SistemaRI.py
@@ -42,21 +47,30 @@ coletor = Coletor("Root")
 for url in urls:
     coletor.addUrl(url)
 
-# As informações das URLs adicionadas ao coletor são extraídas.
-# coletor.extrair_informacoes(5.0)
-coletor.extrair_em_profundidade(0, 5.0)
+# Um objeto da classe Indexador é criado com o coletor e com um detector de páginas quase duplicadas (espelhos).
+indexer = Indexador(coletor, duplicatas=Duplicatas())
 
-# Um objeto da classe Indexador é criado com o coletor.
-indexer = Indexador(coletor)
+# As métricas de desempenho (e o perfil por amostragem) são ativadas antes da coleta se a variável de ambiente SRI_METRICAS for 1.
+metricas = os.environ.get("SRI_METRICAS") == "1"
+if metricas:
+    METRICAS.ativar(perfil=True)
 
-# O índice invertido é gerado.
-indexer.inverted_index_generator()
+# As páginas são coletadas, analisadas e indexadas em fluxo contínuo.
+# coletor.extrair_em_profundidade(0, 5.0)
+# indexer.inverted_index_generator()
+Pipeline(coletor, indexer).executar(0, 5.0)
 
-# O índice invertido é salvo em um arquivo JSON.
+# O índice invertido é salvo em formato binário.
 indexer.save_index()
 
-# # Um objeto da classe Buscador é criado com o nome do arquivo do índice invertido.
-searcher = Buscador("index-Root.json")
+# As métricas e o perfil são gravados, e o perfilador é parado antes das buscas.
+if metricas:
+    METRICAS.desativar()
+    METRICAS.salvar("metricas.json")
+    METRICAS.salvar_perfil("perfil.txt")
+
+# # Um objeto da classe Buscador é criado com o nome do diretório do índice invertido.
+searcher = Buscador("index-Root")
 
 buscar = "sim"
 
@@ -0,0 +1,99 @@
+########## Tokenizador.py ##########
+import re
+import unicodedata
+from functools import lru_cache
+
+# Stop words em português (a mesma lista do corpus `stopwords` do NLTK), embutidas para que nenhum recurso seja baixado
+STOP_WORDS = frozenset("""
+a à ao aos aquela aquelas aquele aqueles aquilo as às até com como da das de dela delas dele deles depois do dos e é ela
+elas ele eles em entre era eram éramos essa essas esse esses esta está estamos estão estar estas estava estavam
+estávamos este esteja estejam estejamos estes esteve estive estivemos estiver estivera estiveram estivéramos
+estiverem estivermos estivesse estivessem estivéssemos estou eu foi fomos for fora foram fôramos forem formos fosse
+fossem fôssemos fui há haja hajam hajamos hão havemos haver hei houve houvemos houver houvera houverá houveram
+houvéramos houverão houverei houverem houveremos houveria houveriam houveríamos houvermos houvesse houvessem
+houvéssemos isso isto já lhe lhes mais mas me mesmo meu meus minha minhas muito na não nas nem no nos nós nossa
+nossas nosso nossos num numa o os ou para pela pelas pelo pelos por qual quando que quem são se seja sejam sejamos
+sem ser será serão serei seremos seria seriam seríamos seu seus só somos sou sua suas também te tem tém temos tenha
+tenham tenhamos tenho terá terão terei teremos teria teriam teríamos teu teus teve tinha tinham tínhamos tive tivemos
+tiver tivera tiveram tivéramos tiverem tivermos tivesse tivessem tivéssemos tu tua tuas um uma você vocês vos
+""".split())
+
+
+class Tokenizador:
+    """
+    A classe Tokenizador divide textos em tokens normalizados, da mesma forma no `Indexador` e no `Buscador`.
+
+    Os tokens são as sequências de letras e dígitos do texto, encontradas por uma expressão regular pré-compilada. Cada token é normalizado (forma Unicode NFC e letras minúsculas) por uma função com cache, de modo que as palavras frequentes são normalizadas uma única vez. As stop words em português são embutidas no módulo, e nenhum recurso externo é baixado ou carregado.
+
+    Atributos:
+    \n\t`PADRAO (re.Pattern)`: A expressão regular que encontra os tokens.
+    \n\t`STOP_WORDS (frozenset)`: As stop words em português.
+
+    Métodos:
+    \n\t`normalizar(token) -> str`: Normaliza um token.
+    \n\t`tokens(texto) -> list`: Devolve os tokens normalizados de um texto.
+    \n\t`documento(textos, stop_words=STOP_WORDS) -> list`: Devolve os tokens normalizados de vários textos, sem as stop words.
+
+    Exemplo:
+    >>> Tokenizador.tokens("Notícias do IFMG, campus Ribeirão das Neves")
+    ['notícias', 'do', 'ifmg', 'campus', 'ribeirão', 'das', 'neves']
+    >>> Tokenizador.documento(["Notícias do IFMG", "Campus Ribeirão das Neves"])
+    ['notícias', 'ifmg', 'campus', 'ribeirão', 'neves']
+    """
+
+    PADRAO = re.compile(r'[^\W_]+')
+    STOP_WORDS = STOP_WORDS
+
+    @staticmethod
+    @lru_cache(maxsize=1 << 16)
+    def normalizar(token) -> str:
+        """
+        Normaliza um token para a forma Unicode NFC, em letras minúsculas.
+
+        O resultado é guardado em cache, de modo que cada palavra distinta é normalizada uma única vez.
+
+        Parâmetros:
+        \n\t`token (str)`: O token.
+
+        Retorno:
+        \n\t`str`: O token normalizado.
+        """
+        return unicodedata.normalize('NFC', token).lower()
+
+    @staticmethod
+    def tokens(texto) -> list:
+        """
+        Divide um texto em tokens normalizados, mantendo as stop words.
+
+        É usado nas consultas do `Buscador`, em que as buscas por substring (`deep_search` e `width_search`) também consideram tokens curtos.
+
+        Parâmetros:
+        \n\t`texto (str)`: O texto.
+
+        Retorno:
+        \n\t`list`: Os tokens do texto, na ordem em que aparecem.
+        """
+        normalizar = Tokenizador.normalizar
+        return [normalizar(token) for token in Tokenizador.PADRAO.findall(texto)]
+
+    @staticmethod
+    def documento(textos, stop_words=STOP_WORDS) -> list:
+        """
+        Divide os textos de uma página em tokens normalizados, sem as stop words.
+
+        Parâmetros:
+        \n\t`textos (iterable)`: Os textos da página.
+        \n\t`stop_words (set)`: O conjunto de stop words. O valor padrão são as stop words em português embutidas no módulo.
+
+        Retorno:
+        \n\t`list`: Os tokens de todos os textos, na ordem em que aparecem.
+        """
+        normalizar = Tokenizador.normalizar
+        encontrar = Tokenizador.PADRAO.findall
+        tokens = []
+        for texto in textos:
+            for token in encontrar(texto):
+                token = normalizar(token)
+                if token not in stop_words:
+                    tokens.append(token)
+        return tokens
@@ -1,29 +1,37 @@
 ########## Url.py ##########
+from bs4 import BeautifulSoup
+
+PARSER_PADRAO = 'html.parser'
+
+
 class Url:
     """
     A classe Url representa uma página web.
 
     Cada objeto da classe Url contém a URL da página web, o título da página, todos os subtítulos da página, todos os links da página, todos os parágrafos da página, todas as imagens da página, todas as listas da página e todas as tabelas da página.
 
+    As informações são extraídas em uma única passagem pela árvore do HTML e guardadas como strings e tuplas de strings, sem referências à árvore do BeautifulSoup, que pode ser liberada logo após a extração. A classe usa `__slots__`, de modo que cada objeto ocupa apenas o espaço dos seus campos.
+
     Atributos:
     \n\t`url (str)`: A URL da página web.
-    \n\t`page (bs4.element.Tag)`: O título da página web.
-    \n\t`titles (bs4.element.ResultSet)`: Todos os subtítulos da página web.
-    \n\t`links (bs4.element.ResultSet)`: Todos os links da página web.
-    \n\t`paragrafos (bs4.element.ResultSet)`: Todos os parágrafos da página web.
-    \n\t`imagens (bs4.element.ResultSet)`: Todas as imagens da página web.
-    \n\t`listas (bs4.element.ResultSet)`: Todas as listas da página web.
-    \n\t`tabelas (bs4.element.ResultSet)`: Todas as tabelas da página web.
+    \n\t`page (str or None)`: O título da página web, ou None se a página não tiver título.
+    \n\t`titles (tuple)`: O texto de todos os subtítulos (h2) da página web.
+    \n\t`links (tuple)`: O endereço (`href`) de todos os links da página web.
+    \n\t`paragrafos (tuple)`: O texto de todos os parágrafos da página web.
+    \n\t`imagens (tuple)`: O endereço (`src`) de todas as imagens da página web.
+    \n\t`listas (tuple)`: O texto de todas as listas (ul e ol) da página web.
+    \n\t`tabelas (tuple)`: O texto de todas as tabelas da página web.
+
+    Métodos:
+    \n\t`de_html(url, html, parser=None) -> Url`: Cria o objeto a partir do HTML da página, liberando a árvore do BeautifulSoup logo em seguida.
 
     Exemplo:
-    >>> from bs4 import BeautifulSoup
     >>> import requests
     >>> response = requests.get("https://www.ifmg.edu.br")
-    >>> soup = BeautifulSoup(response.text, 'html.parser')
-    >>> url_obj = Url("https://www.ifmg.edu.br", soup)
+    >>> url_obj = Url.de_html("https://www.ifmg.edu.br", response.text)
     >>> print(url_obj.url)
     "https://www.ifmg.edu.br"
-    >>> print(url_obj.page.text)
+    >>> print(url_obj.page)
     "IFMG - Instituto Federal de Minas Gerais"
     >>> print(len(url_obj.titles))
     5
@@ -39,11 +47,14 @@ class Url:
     2
     """
 
+    __slots__ = ('url', 'page', 'titles', 'links', 'paragrafos',
+                 'imagens', 'listas', 'tabelas')
+
     def __init__(self, url, soup) -> None:
         """
         O construtor da classe Url.
 
-        Este método é chamado automaticamente quando um objeto da classe Url é criado. Ele inicializa a URL da página web, o título da página, todos os subtítulos da página, todos os links da página, todos os parágrafos da página, todas as imagens da página, todas as listas da página e todas as tabelas da página.
+        Este método é chamado automaticamente quando um objeto da classe Url é criado. Ele percorre a árvore do HTML uma única vez e extrai a URL da página web, o título da página, todos os subtítulos da página, todos os links da página, todos os parágrafos da página, todas as imagens da página, todas as listas da página e todas as tabelas da página.
 
         Parâmetros:
         \n\t`url (str)`: A URL da página web.
@@ -53,10 +64,51 @@ class Url:
         \n\t`None`
         """
         self.url = url
-        self.page = soup.find('title')
-        self.titles = soup.find_all('h2')
-        self.links = soup.find_all('a', href=True)
-        self.paragrafos = soup.find_all('p')
-        self.imagens = soup.find_all('img')
-        self.listas = soup.find_all(['ul', 'ol'])
-        self.tabelas = soup.find_all('table')
+        page = None
+        titles, links, paragrafos, imagens, listas, tabelas = [], [], [], [], [], []
+        for tag in soup.find_all(['title', 'h2', 'a', 'p', 'img', 'ul', 'ol', 'table']):
+            nome = tag.name
+            if nome == 'a':
+                href = tag.get('href')
+                if href is not None:
+                    links.append(href)
+            elif nome == 'p':
+                paragrafos.append(tag.get_text())
+            elif nome == 'h2':
+                titles.append(tag.get_text())
+            elif nome == 'img':
+                imagens.append(tag.get('src', ''))
+            elif nome == 'ul' or nome == 'ol':
+                listas.append(tag.get_text())
+            elif nome == 'table':
+                tabelas.append(tag.get_text())
+            elif page is None:
+                page = tag.get_text()
+        self.page = page
+        self.titles = tuple(titles)
+        self.links = tuple(links)
+        self.paragrafos = tuple(paragrafos)
+        self.imagens = tuple(imagens)
+        self.listas = tuple(listas)
+        self.tabelas = tuple(tabelas)
+
+    @classmethod
+    def de_html(cls, url, html, parser=None):
+        """
+        Cria um objeto Url a partir do HTML da página.
+
+        A árvore do BeautifulSoup é destruída logo após a extração, de modo que a memória ocupada por página coletada não depende do tamanho do seu DOM.
+
+        Parâmetros:
+        \n\t`url (str)`: A URL da página web.
+        \n\t`html (str)`: O HTML da página web.
+        \n\t`parser (str or None)`: O parser usado pelo BeautifulSoup ('html.parser', 'lxml', 'html5lib'). Se None, usa o 'html.parser'. O 'lxml' é mais rápido, mas precisa ser instalado e pedido explicitamente, pois pode montar uma árvore diferente para um HTML malformado.
+
+        Retorno:
+        \n\t`Url`: O objeto Url criado.
+        """
+        soup = BeautifulSoup(html, parser or PARSER_PADRAO)
+        try:
+            return cls(url, soup)
+        finally:
+            soup.decompose()
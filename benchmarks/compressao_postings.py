@@ -0,0 +1,107 @@
+########## compressao_postings.py ##########
+"""
+Mede o tamanho e o tempo de decodificação dos postings do índice binário comprimido (`IndiceBinario`).
+
+O script gera um corpus sintético (veja `indexacao_paralela.gerar_paginas`), indexa o corpus e grava o índice em JSON e no formato binário. Em seguida, ele imprime o número de bytes por posting do JSON, do formato binário anterior (registros de tamanho fixo `<IIIId`, com F e n_i repetidos em cada posting) e do formato atual (intervalos e frequências em varint), o tempo para decodificar todos os postings e o tempo de uma consulta a frio (abrindo o índice a cada consulta).
+
+Exemplo de uso:
+>>> python benchmarks/compressao_postings.py --paginas 5000
+formato                  bytes/posting    tamanho (MiB)
+json                            130.29            47.43
+binario (fixo)                   24.00             8.74
+binario (varint)                  2.35             0.86
+índice binário completo: 3.28 MiB
+decodificação: 381683 postings em 0.77 s (497111 postings/s)
+consulta a frio: json 860.3 ms, binario 0.6 ms
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Buscador import Buscador  # noqa: E402
+from Indexador import Indexador  # noqa: E402
+from IndiceBinario import IndiceBinario  # noqa: E402
+from indexacao_paralela import ColetorSintetico, gerar_paginas, medir  # noqa: E402
+
+# O registro de tamanho fixo de um posting no formato binário anterior: doc_id, f, F, n_i, w_ij
+POSTING_FIXO = struct.Struct('<IIIId')
+
+
+def tamanho_diretorio(diretorio) -> int:
+    """
+    Devolve a soma dos tamanhos dos arquivos de um diretório, em bytes.
+    """
+    return sum(os.path.getsize(os.path.join(diretorio, nome)) for nome in os.listdir(diretorio))
+
+
+def consulta_a_frio(index_file, consultas) -> float:
+    """
+    Devolve o tempo médio, em milissegundos, para abrir o índice e executar uma consulta.
+    """
+    total = 0.0
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        Buscador(index_file, cache=False).rank(consulta)
+        total += time.perf_counter() - inicio
+    return 1000 * total / len(consultas)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--paginas", type=int, default=20000)
+    parser.add_argument("--consultas", type=int, default=5)
+    args = parser.parse_args()
+
+    coletor = ColetorSintetico(gerar_paginas(args.paginas))
+    indexer = Indexador(coletor)
+    indexer.inverted_index_generator()
+    indexer.update_F()
+
+    pasta = tempfile.mkdtemp(prefix='compressao-')
+    try:
+        arquivo_json = os.path.join(pasta, "index.json")
+        diretorio = os.path.join(pasta, "index")
+        with open(arquivo_json, 'w') as file:
+            json.dump(indexer.inverted_index, file, indent=4)
+        IndiceBinario.escrever(
+            diretorio, indexer.inverted_index, indexer.limites)
+
+        with IndiceBinario(diretorio) as indice:
+            estatisticas = indice.estatisticas()
+            postings = estatisticas['postings']
+            tempo = medir(lambda: [indice.registros(termo)
+                          for termo in indice])
+
+        linhas = [
+            ("json", os.path.getsize(arquivo_json)),
+            ("binario (fixo)", postings * POSTING_FIXO.size),
+            ("binario (varint)", estatisticas['bytes_postings']),
+        ]
+        print(f"{'formato':<22}{'bytes/posting':>16}{'tamanho (MiB)':>17}")
+        for formato, tamanho in linhas:
+            print(
+                f"{formato:<22}{tamanho / postings:>16.2f}{tamanho / 2 ** 20:>17.2f}")
+        print(f"índice binário completo: {tamanho_diretorio(diretorio) / 2 ** 20:.2f} MiB")
+        print(f"decodificação: {postings} postings em {tempo:.2f} s "
+              f"({postings / tempo:.0f} postings/s)")
+
+        aleatorio = random.Random(7)
+        termos = list(indexer.inverted_index.keys())
+        consultas = [" ".join(aleatorio.sample(termos, 3))
+                     for _ in range(args.consultas)]
+        print(f"consulta a frio: json {consulta_a_frio(arquivo_json, consultas):.1f} ms, "
+              f"binario {consulta_a_frio(diretorio, consultas):.1f} ms")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+########## corpus.py ##########
+"""
+Gera um corpus sintético de páginas com palavras parecidas com o português, para os benchmarks.
+
+As palavras do vocabulário são formadas por sílabas do português (com acentos, dígrafos e terminações como "ção" e "ões") e aparecem nos textos em uma distribuição de Zipf, misturadas às stop words do `Tokenizador`. Cada página é gerada a partir da sua própria semente (`semente + i`), de modo que qualquer página pode ser reproduzida isoladamente, sem gerar as anteriores: o site local (veja `site_local.py`) gera as páginas sob demanda e corpora de 1 milhão de páginas não precisam caber em memória.
+
+As páginas formam uma árvore: a página i tem links para as páginas `i * ramos + 1` a `i * ramos + ramos`, além de alguns links para páginas aleatórias, de modo que uma coleta em largura a partir da página 0 alcança todas as páginas em `profundidade_maxima` níveis.
+
+Exemplo de uso:
+>>> corpus = Corpus(paginas=1000)
+>>> pagina = corpus.pagina(42)
+>>> pagina.titles[0]
+'bumafoinho quando prêlhêtrêeiro há vagur jimates bumafoinho ilil chebição'
+>>> html = corpus.html(42)
+"""
+import bisect
+import itertools
+import math
+import os
+import random
+import sys
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Tokenizador import STOP_WORDS  # noqa: E402
+
+Pagina = namedtuple('Pagina', ['url', 'page', 'titles', 'paragrafos', 'links'])
+
+INICIOS = ['b', 'c', 'd', 'f', 'g', 'j', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'br', 'cr', 'pr', 'tr',
+           'gr', 'pl', 'ch', 'lh', 'nh']
+VOGAIS = ['a', 'e', 'i', 'o', 'u', 'á', 'é', 'í', 'ó', 'ú', 'â', 'ê', 'ô', 'ã', 'õ']
+PESOS_VOGAIS = [12, 10, 7, 9, 4, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+FINAIS = ['', '', '', 's', 'r', 'l', 'm', 'n']
+TERMINACOES = ['ção', 'ções', 'mente', 'ade', 'eiro', 'eira', 'ismo', 'ista', 'agem', 'ões', 'ado', 'ada',
+               'ento', 'inho', 'inha', 'al', 'ar', 'er', 'ir', 'or']
+
+
+class Corpus:
+    """
+    Um corpus sintético reprodutível de páginas com palavras parecidas com o português.
+    """
+
+    def __init__(self, paginas=1000, vocabulario=50000, subtitulos=8, paragrafos=4, palavras=10,
+                 ramos=10, links_aleatorios=3, zipf=1.0, semente=42, base="http://127.0.0.1:8000") -> None:
+        """
+        O construtor da classe Corpus.
+
+        Parâmetros:
+        \n\t`paginas (int)`: O número de páginas do corpus.
+        \n\t`vocabulario (int)`: O número de palavras distintas.
+        \n\t`subtitulos (int)`: O número de subtítulos (h2) por página.
+        \n\t`paragrafos (int)`: O número de parágrafos por página.
+        \n\t`palavras (int)`: O número médio de palavras por subtítulo.
+        \n\t`ramos (int)`: O número de links de cada página para as suas páginas filhas na árvore.
+        \n\t`links_aleatorios (int)`: O número de links de cada página para páginas aleatórias.
+        \n\t`zipf (float)`: O expoente da distribuição de Zipf das palavras.
+        \n\t`semente (int)`: A semente do gerador de números aleatórios.
+        \n\t`base (str)`: O endereço base das URLs das páginas.
+
+        Retorno:
+        \n\t`None`
+        """
+        self.paginas = paginas
+        self.subtitulos = subtitulos
+        self.paragrafos = paragrafos
+        self.palavras = palavras
+        self.ramos = ramos
+        self.links_aleatorios = links_aleatorios
+        self.semente = semente
+        self.base = base.rstrip('/')
+        self.vocabulario = gerar_vocabulario(vocabulario, semente)
+        self.acumulados = list(itertools.accumulate(
+            1.0 / (i + 1) ** zipf for i in range(vocabulario)))
+        self.stop_words = sorted(STOP_WORDS)
+
+    @property
+    def profundidade_maxima(self) -> int:
+        """
+        O número de níveis da árvore de links, isto é, a profundidade de coleta que alcança todas as páginas.
+        """
+        if self.paginas <= 1:
+            return 1
+        return math.ceil(math.log(self.paginas * (self.ramos - 1) + 1, self.ramos)) if self.ramos > 1 else self.paginas
+
+    def url(self, i) -> str:
+        """
+        Devolve a URL da página i.
+        """
+        return f"{self.base}/pagina/{i}.html"
+
+    def palavra(self, aleatorio) -> str:
+        """
+        Sorteia uma palavra do vocabulário na distribuição de Zipf.
+        """
+        posicao = bisect.bisect_left(
+            self.acumulados, aleatorio.random() * self.acumulados[-1])
+        return self.vocabulario[min(posicao, len(self.vocabulario) - 1)]
+
+    def frase(self, aleatorio, palavras) -> str:
+        """
+        Gera uma frase com cerca de `palavras` palavras, das quais aproximadamente um terço são stop words.
+        """
+        quantidade = max(1, int(aleatorio.gauss(palavras, palavras / 4)))
+        return " ".join(aleatorio.choice(self.stop_words) if aleatorio.random() < 0.3 else self.palavra(aleatorio)
+                        for _ in range(quantidade))
+
+    def pagina(self, i) -> Pagina:
+        """
+        Gera a página i.
+
+        Parâmetros:
+        \n\t`i (int)`: O número da página, entre 0 e `paginas - 1`.
+
+        Retorno:
+        \n\t`Pagina`: A URL, o título, os subtítulos, os parágrafos e os links da página.
+        """
+        aleatorio = random.Random(self.semente * 1000003 + i)
+        filhos = range(i * self.ramos + 1,
+                       min(i * self.ramos + self.ramos, self.paginas - 1) + 1)
+        links = [self.url(filho) for filho in filhos]
+        links += [self.url(aleatorio.randrange(self.paginas))
+                  for _ in range(self.links_aleatorios)]
+        return Pagina(
+            self.url(i),
+            self.frase(aleatorio, 5).capitalize(),
+            tuple(self.frase(aleatorio, self.palavras)
+                  for _ in range(self.subtitulos)),
+            tuple(self.frase(aleatorio, 4 * self.palavras)
+                  for _ in range(self.paragrafos)),
+            tuple(links))
+
+    def __iter__(self):
+        for i in range(self.paginas):
+            yield self.pagina(i)
+
+    def __len__(self) -> int:
+        return self.paginas
+
+    def html(self, i) -> str:
+        """
+        Gera o HTML da página i.
+        """
+        pagina = self.pagina(i)
+        partes = [f"<!DOCTYPE html><html lang=\"pt-BR\"><head><meta charset=\"utf-8\"><title>{pagina.page}</title></head><body>",
+                  f"<h1>{pagina.page}</h1>"]
+        for subtitulo, paragrafo in itertools.zip_longest(pagina.titles, pagina.paragrafos):
+            if subtitulo is not None:
+                partes.append(f"<h2>{subtitulo}</h2>")
+            if paragrafo is not None:
+                partes.append(f"<p>{paragrafo}</p>")
+        partes.append("<ul>")
+        partes.extend(
+            f"<li><a href=\"{link}\">{link.rsplit('/', 1)[-1]}</a></li>" for link in pagina.links)
+        partes.append("</ul></body></html>")
+        return "".join(partes)
+
+    def consultas(self, quantidade, semente=7, termos=(1, 3)) -> list:
+        """
+        Gera um log de consultas com termos do vocabulário na mesma distribuição de Zipf dos textos.
+
+        As consultas também se repetem em uma distribuição de Zipf, como em um log real: poucas consultas são muito frequentes.
+
+        Parâmetros:
+        \n\t`quantidade (int)`: O número de consultas do log.
+        \n\t`semente (int)`: A semente do gerador de números aleatórios.
+        \n\t`termos (tuple)`: O número mínimo e máximo de termos por consulta.
+
+        Retorno:
+        \n\t`list`: As consultas.
+        """
+        aleatorio = random.Random(semente)
+        distintas = [" ".join(self.palavra(aleatorio) for _ in range(aleatorio.randint(*termos)))
+                     for _ in range(max(1, quantidade // 4))]
+        acumulados = list(itertools.accumulate(
+            1.0 / (i + 1) for i in range(len(distintas))))
+        return aleatorio.choices(distintas, cum_weights=acumulados, k=quantidade)
+
+
+def gerar_vocabulario(quantidade, semente=42) -> list:
+    """
+    Gera palavras distintas parecidas com o português, sem stop words.
+
+    Parâmetros:
+    \n\t`quantidade (int)`: O número de palavras.
+    \n\t`semente (int)`: A semente do gerador de números aleatórios.
+
+    Retorno:
+    \n\t`list`: As palavras, das mais curtas (e frequentes) para as mais longas.
+    """
+    aleatorio = random.Random(semente)
+    palavras = {}
+    while len(palavras) < quantidade:
+        silabas = aleatorio.choices(
+            [1, 2, 3, 4], weights=[2, 5, 4, 2])[0] + len(palavras) * 4 // max(quantidade, 1)
+        palavra = "".join(aleatorio.choice(INICIOS) + aleatorio.choices(VOGAIS, PESOS_VOGAIS)[0]
+                          for _ in range(silabas))
+        if aleatorio.random() < 0.15:
+            # Palavras que começam por vogal, como "amigo" e "escola"
+            palavra = aleatorio.choice('aeiou') + palavra
+        if aleatorio.random() < 0.3:
+            palavra += aleatorio.choice(TERMINACOES)
+        else:
+            palavra += aleatorio.choice(FINAIS)
+        if palavra not in STOP_WORDS and len(palavra) > 1:
+            palavras.setdefault(palavra, None)
+    return list(palavras)
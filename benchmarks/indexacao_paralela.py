@@ -0,0 +1,103 @@
+########## indexacao_paralela.py ##########
+"""
+Mede o ganho da indexação paralela (`Indexador.indexar_paralelo`) sobre a indexação sequencial (`Indexador.inverted_index_generator`).
+
+O script gera um corpus sintético de páginas, com subtítulos formados por palavras em uma distribuição de Zipf, indexa o corpus sequencialmente e com 1, 2, 4, ... processos (até o número de CPUs), verifica se os índices são iguais e imprime o tempo e o ganho de cada configuração.
+
+Exemplo de uso:
+>>> python benchmarks/indexacao_paralela.py --paginas 20000
+processos    tempo (s)    paginas/s    ganho
+sequencial       12.41         1611     1.00
+1                12.73         1571     0.97
+2                 6.52         3067     1.90
+4                 3.41         5865     3.64
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Indexador import Indexador  # noqa: E402
+
+Pagina = namedtuple('Pagina', ['url', 'titles'])
+
+
+class ColetorSintetico:
+    """
+    Um substituto do Coletor com páginas sintéticas.
+    """
+
+    def __init__(self, paginas) -> None:
+        self.codigo = "benchmark"
+        self.objects_url = paginas
+
+
+def gerar_paginas(quantidade, vocabulario=50000, subtitulos=8, palavras=12, semente=42) -> list:
+    """
+    Gera páginas sintéticas com subtítulos formados por palavras em uma distribuição de Zipf.
+
+    Parâmetros:
+    \n\t`quantidade (int)`: O número de páginas.
+    \n\t`vocabulario (int)`: O número de palavras distintas.
+    \n\t`subtitulos (int)`: O número de subtítulos por página.
+    \n\t`palavras (int)`: O número de palavras por subtítulo.
+    \n\t`semente (int)`: A semente do gerador de números aleatórios.
+
+    Retorno:
+    \n\t`list`: As páginas geradas.
+    """
+    aleatorio = random.Random(semente)
+    termos = [f"termo{i}" for i in range(vocabulario)]
+    acumulados = list(itertools.accumulate(
+        1.0 / (i + 1) for i in range(vocabulario)))
+    paginas = []
+    for i in range(quantidade):
+        titulos = tuple(" ".join(aleatorio.choices(termos, cum_weights=acumulados, k=palavras))
+                        for _ in range(subtitulos))
+        paginas.append(Pagina(f"https://exemplo.com/pagina/{i}", titulos))
+    return paginas
+
+
+def medir(funcao) -> float:
+    """
+    Executa a função e devolve o tempo decorrido, em segundos.
+    """
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--paginas", type=int, default=20000)
+    parser.add_argument("--tamanho-lote", type=int, default=256)
+    args = parser.parse_args()
+
+    coletor = ColetorSintetico(gerar_paginas(args.paginas))
+
+    sequencial = Indexador(coletor)
+    tempo_base = medir(sequencial.inverted_index_generator)
+    sequencial.update_F()
+    print(f"{'processos':<12}{'tempo (s)':>10}{'paginas/s':>13}{'ganho':>9}")
+    print(f"{'sequencial':<12}{tempo_base:>10.2f}{args.paginas / tempo_base:>13.0f}{1.0:>9.2f}")
+
+    processos = 1
+    while processos <= (os.cpu_count() or 1):
+        paralelo = Indexador(coletor)
+        tempo = medir(lambda: paralelo.indexar_paralelo(
+            processos, tamanho_lote=args.tamanho_lote))
+        paralelo.update_F()
+        if paralelo.inverted_index != sequencial.inverted_index:
+            raise SystemExit(
+                f"O índice com {processos} processos difere do índice sequencial")
+        print(f"{processos:<12}{tempo:>10.2f}{args.paginas / tempo:>13.0f}{tempo_base / tempo:>9.2f}")
+        processos *= 2
+
+
+if __name__ == "__main__":
+    main()
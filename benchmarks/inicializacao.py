@@ -0,0 +1,98 @@
+########## inicializacao.py ##########
+"""
+Mede o tempo de inicialização e a velocidade de tokenização do `Tokenizador`, comparados ao NLTK.
+
+O tempo de inicialização é medido em processos novos: o tempo para importar o `Indexador` e o `Buscador` e o tempo que a inicialização anterior, baseada no NLTK (importação do NLTK, `nltk.download` das stop words e do punkt e leitura das stop words), levava antes de qualquer trabalho. Em seguida, o script tokeniza um corpus sintético com o `Tokenizador` e com o `nltk.word_tokenize`. As medidas com o NLTK são omitidas se ele não estiver instalado.
+
+As medidas que falham (por exemplo, quando o NLTK não consegue baixar os seus recursos em uma máquina sem rede, o que antes impedia o início da indexação) são exibidas como '-'.
+
+Exemplo de uso (em uma máquina sem rede):
+>>> python benchmarks/inicializacao.py --paginas 2000
+inicialização                 tempo (s)
+Indexador + Buscador               0.08
+NLTK (anterior)                       -
+tokenização              tokens/s
+Tokenizador               1044356
+nltk.word_tokenize              -
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from Tokenizador import Tokenizador  # noqa: E402
+from indexacao_paralela import gerar_paginas  # noqa: E402
+
+INICIALIZACAO_ATUAL = "import Indexador, Buscador"
+INICIALIZACAO_NLTK = """
+import nltk
+from nltk.corpus import stopwords
+nltk.download('stopwords', quiet=True)
+nltk.download('punkt', quiet=True)
+set(stopwords.words('portuguese'))
+"""
+
+
+def tempo_processo(codigo, repeticoes=3):
+    """
+    Devolve o menor tempo, em segundos, para executar o código em um interpretador novo, ou None se ele falhar.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if resultado.returncode != 0:
+            return None
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def tokenizar_nltk(textos, stop_words) -> list:
+    """
+    A tokenização anterior do `Indexador`, com o `nltk.word_tokenize`.
+    """
+    import nltk
+    tokens = []
+    for texto in textos:
+        tokens.extend(token.lower() for token in nltk.word_tokenize(texto)
+                      if token.isalnum() and token.lower() not in stop_words)
+    return tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--paginas", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'inicialização':<26}{'tempo (s)':>13}")
+    for nome, codigo in (("Indexador + Buscador", INICIALIZACAO_ATUAL), ("NLTK (anterior)", INICIALIZACAO_NLTK)):
+        tempo = tempo_processo(codigo)
+        print(f"{nome:<26}{'-' if tempo is None else f'{tempo:.2f}':>13}")
+
+    paginas = gerar_paginas(args.paginas)
+    tokenizadores = [("Tokenizador", Tokenizador.documento)]
+    try:
+        import nltk  # noqa: F401
+        tokenizadores.append(("nltk.word_tokenize", tokenizar_nltk))
+    except ImportError:
+        pass
+    print(f"{'tokenização':<20}{'tokens/s':>13}")
+    for nome, tokenizar in tokenizadores:
+        inicio = time.perf_counter()
+        try:
+            tokens = sum(len(tokenizar(pagina.titles, Tokenizador.STOP_WORDS))
+                         for pagina in paginas)
+        except LookupError:
+            # Os recursos do NLTK não estão disponíveis (por exemplo, sem rede)
+            print(f"{nome:<20}{'-':>13}")
+            continue
+        print(f"{nome:<20}{tokens / (time.perf_counter() - inicio):>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+########## site_local.py ##########
+"""
+Um site local que serve as páginas de um corpus sintético (veja `corpus.py`), usado nos benchmarks de coleta.
+
+As páginas são geradas sob demanda em "/pagina/{i}.html", de modo que o site pode servir corpora de qualquer tamanho sem gravá-los em disco. O site também serve um "/robots.txt" sem restrições e com `Crawl-delay: 0`, para que a coleta meça o coletor e não o atraso de cortesia. As respostas usam HTTP/1.1 com keep-alive, como um servidor real, e o servidor atende cada conexão em uma thread.
+
+Exemplo de uso:
+>>> python benchmarks/site_local.py --paginas 1000 --porta 8000
+site local com 1000 páginas em http://127.0.0.1:8000/pagina/0.html
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import Corpus  # noqa: E402
+
+ROBOTS = "User-agent: *\nAllow: /\nCrawl-delay: 0\n"
+CAMINHO_PAGINA = re.compile(r'^/pagina/(\d+)\.html$')
+
+
+class SiteLocal:
+    """
+    Um servidor HTTP local com as páginas de um corpus sintético.
+
+    Atributos:
+    \n\t`corpus (Corpus)`: O corpus servido. O endereço base do corpus é ajustado para o endereço do servidor.
+    \n\t`servidor (ThreadingHTTPServer)`: O servidor HTTP.
+    \n\t`requisicoes (int)`: O número de requisições atendidas.
+
+    Métodos:
+    \n\t`iniciar() -> SiteLocal`: Inicia o servidor em uma thread.
+    \n\t`parar() -> None`: Para o servidor.
+    \n\t`url(i) -> str`: Devolve a URL da página i.
+
+    Exemplo:
+    >>> with SiteLocal(Corpus(paginas=100)) as site:
+    ...     coletor.addUrl(site.url(0))
+    """
+
+    def __init__(self, corpus, host="127.0.0.1", porta=0) -> None:
+        """
+        O construtor da classe SiteLocal.
+
+        Parâmetros:
+        \n\t`corpus (Corpus)`: O corpus servido.
+        \n\t`host (str)`: O endereço do servidor. O valor padrão é '127.0.0.1'.
+        \n\t`porta (int)`: A porta do servidor. O valor padrão é 0 (uma porta livre escolhida pelo sistema).
+
+        Retorno:
+        \n\t`None`
+        """
+        self.corpus = corpus
+        self.requisicoes = 0
+        self._trava = threading.Lock()
+        self._thread = None
+        self.servidor = ThreadingHTTPServer((host, porta), _manipulador(self))
+        self.servidor.daemon_threads = True
+        host, porta = self.servidor.server_address[:2]
+        self.corpus.base = f"http://{host}:{porta}"
+
+    def url(self, i) -> str:
+        """
+        Devolve a URL da página i.
+        """
+        return self.corpus.url(i)
+
+    def iniciar(self):
+        """
+        Inicia o servidor em uma thread.
+
+        Retorno:
+        \n\t`SiteLocal`: O próprio site.
+        """
+        self._thread = threading.Thread(
+            target=self.servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        """
+        Para o servidor e fecha o socket.
+        """
+        if self._thread is not None:
+            self.servidor.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excecao) -> None:
+        self.parar()
+
+
+def _manipulador(site):
+    """
+    Cria a classe que atende as requisições do site.
+    """
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Sem o algoritmo de Nagle, o cabeçalho e o corpo não esperam pelo ACK atrasado do cliente
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            with site._trava:
+                site.requisicoes += 1
+            if self.path == "/robots.txt":
+                self._responder(200, ROBOTS, "text/plain")
+                return
+            encontrado = CAMINHO_PAGINA.match(self.path)
+            if encontrado is None or int(encontrado.group(1)) >= len(site.corpus):
+                self._responder(404, "não encontrado", "text/plain")
+                return
+            self._responder(200, site.corpus.html(
+                int(encontrado.group(1))), "text/html")
+
+        def _responder(self, status, texto, tipo) -> None:
+            corpo = texto.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{tipo}; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *argumentos) -> None:
+            pass
+
+    return Manipulador
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--paginas", type=int, default=1000)
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    site = SiteLocal(Corpus(paginas=args.paginas, semente=args.semente),
+                     porta=args.porta)
+    print(f"site local com {args.paginas} páginas em {site.url(0)}")
+    try:
+        site.servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+########## suite.py ##########
+"""
+Executa os benchmarks de coleta, de construção do índice e de consultas e grava os resultados em JSON, para comparar execuções entre commits.
+
+Todas as entradas são sintéticas e reprodutíveis (veja `corpus.py`): o mesmo corpus, o mesmo site e o mesmo log de consultas são gerados a partir das mesmas sementes, em qualquer máquina, de 1 mil a 1 milhão de páginas. Cada etapa é executada em um processo novo, de modo que o pico de memória (RSS) medido em uma etapa não inclui as anteriores.
+
+- coleta: um site local (veja `site_local.py`) serve um corpus de `--paginas-coleta` páginas, e o `Coletor` coleta o site em largura a partir da página 0 em cada modo de `--modos-coleta` ('sincrono', 'assincrono' com o `MotorAssincrono`, ou 'pipeline' com o `Pipeline`, que também analisa e indexa as páginas).
+- indexação: o `Indexador` indexa as `--paginas` páginas do corpus, geradas à medida que são indexadas, e grava o índice binário em cada modo de `--modos-indexacao` ('memoria' ou 'spimi', com blocos de `--memoria-spimi` MiB). O tempo de geração do corpus é medido à parte e descontado.
+- consultas: o `Buscador` executa um log de `--consultas` consultas, com termos e repetições em distribuições de Zipf, sobre o índice construído na etapa de indexação, sem cache (latência por consulta) e com cache (vazão com as repetições do log).
+
+Com `--comparar base.json novo.json`, o script compara duas execuções, imprime a razão de cada métrica e termina com código 1 se alguma métrica piorar mais que `--limiar`.
+
+Exemplo de uso:
+>>> python benchmarks/suite.py --paginas 10000 --saida resultados.json
+coleta.sincrono: 500 páginas em 1.97 s (253 páginas/s), pico 36.7 MiB
+coleta.assincrono: 500 páginas em 2.93 s (171 páginas/s), pico 37.6 MiB
+indexacao.memoria: 10000 páginas em 4.53 s (2209 páginas/s), pico 125.7 MiB, índice 3.8 MiB
+indexacao.spimi: 10000 páginas em 3.53 s (2834 páginas/s), pico 64.8 MiB, índice 3.8 MiB
+consultas: p50 4.906 ms, p95 22.83 ms, p99 30.931 ms, 120 consultas/s sem cache, 765 com cache
+resultados gravados em resultados.json
+>>> python benchmarks/suite.py --comparar base.json resultados.json
+métrica                                             base          novo    razão
+...
+coleta.sincrono.paginas_por_s                       21.1         347.4   16.464
+coleta.sincrono.pico_rss_mib                        35.4          35.5    1.003
+...
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import Corpus  # noqa: E402
+from site_local import SiteLocal  # noqa: E402
+
+VERSAO = 1
+# Métricas em que um valor maior é melhor; nas demais (tempos, latências, memória, tamanhos), um valor menor é melhor
+MAIOR_MELHOR = ('por_s', 'qps', 'acertos')
+
+
+class ColetorSintetico:
+    """
+    Um substituto do Coletor com as páginas de um corpus sintético, geradas sob demanda.
+    """
+
+    def __init__(self, corpus) -> None:
+        self.codigo = "benchmark"
+        self.objects_url = corpus
+
+
+def pico_rss_mib():
+    """
+    Devolve o pico de memória residente (RSS) do processo, em MiB, ou None se não puder ser medido.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é medido em KiB no Linux e em bytes no macOS
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentil(valores, p) -> float:
+    """
+    Devolve o percentil p (entre 0 e 100) de uma lista ordenada de valores.
+    """
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(p / 100 * len(valores)))]
+
+
+def tamanho_diretorio(diretorio) -> int:
+    """
+    Devolve a soma dos tamanhos dos arquivos de um diretório, em bytes.
+    """
+    return sum(os.path.getsize(os.path.join(raiz, nome))
+               for raiz, _, nomes in os.walk(diretorio) for nome in nomes)
+
+
+def isolado(funcao, *argumentos):
+    """
+    Executa a função em um processo novo e devolve o seu resultado.
+    """
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(funcao, *argumentos).result()
+
+
+def medir_coleta(url, paginas, profundidade, modo, concorrencia) -> dict:
+    """
+    Coleta o site local em largura a partir da URL e devolve o tempo, a vazão e o pico de memória.
+    """
+    from Coletor import Coletor
+    from MotorAssincrono import MotorAssincrono
+
+    coletor = Coletor("benchmark")
+    coletor.addUrl(url)
+    params = None
+    if modo != 'sincrono':
+        params = MotorAssincrono(
+            concorrencia=concorrencia, por_host=concorrencia)
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        if modo == 'pipeline':
+            from Indexador import Indexador
+            from Pipeline import Pipeline
+            coletadas = Pipeline(coletor, Indexador(coletor)).executar(
+                profundidade, params)
+        else:
+            coletor.extrair_em_profundidade(profundidade, params)
+            coletadas = len(coletor.objects_url)
+        tempo = time.perf_counter() - inicio
+    coletor.fechar()
+    return {
+        'paginas': coletadas,
+        'completa': coletadas == paginas,
+        'tempo_s': round(tempo, 3),
+        'paginas_por_s': round(coletadas / tempo, 1),
+        'pico_rss_mib': pico_rss_mib(),
+    }
+
+
+def medir_indexacao(diretorio, parametros, modo, memoria_spimi) -> dict:
+    """
+    Indexa o corpus, grava o índice binário no diretório e devolve os tempos, o pico de memória e o tamanho do índice.
+    """
+    from Indexador import Indexador
+
+    corpus = Corpus(**parametros)
+    inicio = time.perf_counter()
+    for _ in corpus:
+        pass
+    geracao = time.perf_counter() - inicio
+
+    os.makedirs(diretorio, exist_ok=True)
+    os.chdir(diretorio)
+    rss_base = pico_rss_mib()
+    memoria = memoria_spimi * 1024 * 1024 if modo == 'spimi' else None
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        indexador = Indexador(ColetorSintetico(corpus), memoria=memoria)
+        indexador.inverted_index_generator()
+        meio = time.perf_counter()
+        indexador.save_index()
+        fim = time.perf_counter()
+    indexacao = meio - inicio - geracao
+    total = fim - inicio - geracao
+    return {
+        'paginas': len(corpus),
+        'tempo_geracao_s': round(geracao, 3),
+        'tempo_indexacao_s': round(indexacao, 3),
+        'tempo_gravacao_s': round(fim - meio, 3),
+        'tempo_total_s': round(total, 3),
+        'paginas_por_s': round(len(corpus) / total, 1),
+        'pico_rss_mib': pico_rss_mib(),
+        'rss_corpus_mib': rss_base,
+        'bytes_indice': tamanho_diretorio(os.path.join(diretorio, "index-benchmark")),
+    }
+
+
+def medir_consultas(index_file, consultas, k) -> dict:
+    """
+    Executa o log de consultas sem cache e com cache e devolve as latências, a vazão e o pico de memória.
+    """
+    from Buscador import Buscador
+
+    inicio = time.perf_counter()
+    buscador = Buscador(index_file, cache=False)
+    abertura = time.perf_counter() - inicio
+
+    latencias = []
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        antes = time.perf_counter()
+        buscador.rank(consulta, k)
+        latencias.append(1000 * (time.perf_counter() - antes))
+    tempo = time.perf_counter() - inicio
+    latencias.sort()
+
+    com_cache = Buscador(index_file)
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        com_cache.rank(consulta, k)
+    tempo_cache = time.perf_counter() - inicio
+    estatisticas = com_cache.estatisticas_cache()
+    return {
+        'consultas': len(consultas),
+        'distintas': len(set(consultas)),
+        'abertura_ms': round(1000 * abertura, 3),
+        'sem_cache': {
+            'p50_ms': round(percentil(latencias, 50), 3),
+            'p95_ms': round(percentil(latencias, 95), 3),
+            'p99_ms': round(percentil(latencias, 99), 3),
+            'max_ms': round(latencias[-1], 3),
+            'media_ms': round(sum(latencias) / len(latencias), 3),
+            'qps': round(len(consultas) / tempo, 1),
+        },
+        'com_cache': {
+            'qps': round(len(consultas) / tempo_cache, 1),
+            'acertos': round(estatisticas.get('taxa_acertos', 0.0), 3),
+        },
+        'pico_rss_mib': pico_rss_mib(),
+    }
+
+
+def metadados(args) -> dict:
+    """
+    Devolve o commit, a máquina e os parâmetros da execução.
+    """
+    def git(*comando):
+        try:
+            return subprocess.run(["git", *comando], cwd=RAIZ, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'versao': VERSAO,
+        'commit': git("rev-parse", "HEAD"),
+        'alterado': bool(git("status", "--porcelain", "--untracked-files=no")),
+        'data': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parametros': {chave: valor for chave, valor in vars(args).items()
+                       if chave not in ('saida', 'comparar', 'limiar')},
+    }
+
+
+def executar(args) -> dict:
+    """
+    Executa as etapas selecionadas e devolve os resultados.
+    """
+    parametros = {'vocabulario': args.vocabulario, 'semente': args.semente}
+    resultados = {}
+    temporario = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        if 'coleta' in args.etapas:
+            resultados['coleta'] = {}
+            corpus = Corpus(paginas=args.paginas_coleta, **parametros)
+            for modo in args.modos_coleta:
+                # Um site novo por modo, para que nenhuma conexão seja reaproveitada entre os modos
+                with SiteLocal(corpus) as site:
+                    resultado = isolado(medir_coleta, site.url(0), len(corpus),
+                                        corpus.profundidade_maxima, modo, args.concorrencia)
+                resultados['coleta'][modo] = resultado
+                print(f"coleta.{modo}: {resultado['paginas']} páginas em {resultado['tempo_s']:.2f} s "
+                      f"({resultado['paginas_por_s']:.0f} páginas/s), pico {resultado['pico_rss_mib']} MiB")
+
+        indices = {}
+        if 'indexacao' in args.etapas or 'consultas' in args.etapas:
+            resultados['indexacao'] = {}
+            for modo in args.modos_indexacao:
+                diretorio = os.path.join(temporario, modo)
+                resultado = isolado(medir_indexacao, diretorio, dict(parametros, paginas=args.paginas),
+                                    modo, args.memoria_spimi)
+                indices[modo] = os.path.join(diretorio, "index-benchmark")
+                resultados['indexacao'][modo] = resultado
+                print(f"indexacao.{modo}: {resultado['paginas']} páginas em {resultado['tempo_total_s']:.2f} s "
+                      f"({resultado['paginas_por_s']:.0f} páginas/s), pico {resultado['pico_rss_mib']} MiB, "
+                      f"índice {resultado['bytes_indice'] / 2 ** 20:.1f} MiB")
+
+        if 'consultas' in args.etapas:
+            consultas = Corpus(paginas=1, **parametros).consultas(args.consultas)
+            resultado = isolado(medir_consultas, next(
+                iter(indices.values())), consultas, args.k)
+            resultados['consultas'] = resultado
+            print(f"consultas: p50 {resultado['sem_cache']['p50_ms']} ms, p95 {resultado['sem_cache']['p95_ms']} ms, "
+                  f"p99 {resultado['sem_cache']['p99_ms']} ms, {resultado['sem_cache']['qps']:.0f} consultas/s "
+                  f"sem cache, {resultado['com_cache']['qps']:.0f} com cache")
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+    return resultados
+
+
+def achatar(resultados, prefixo="") -> dict:
+    """
+    Devolve as métricas numéricas dos resultados, com chaves no formato 'etapa.modo.metrica'.
+    """
+    metricas = {}
+    for chave, valor in resultados.items():
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            metricas.update(achatar(valor, nome + "."))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            metricas[nome] = valor
+    return metricas
+
+
+def comparar(base, novo, limiar) -> int:
+    """
+    Imprime a razão de cada métrica entre duas execuções e devolve o número de métricas que pioraram mais que o limiar.
+    """
+    with open(base) as arquivo:
+        base = json.load(arquivo)
+    with open(novo) as arquivo:
+        novo = json.load(arquivo)
+    if base['parametros'] != novo['parametros']:
+        print("aviso: as execuções usaram parâmetros diferentes")
+    print(f"{(base.get('commit') or '-')[:10]} -> {(novo.get('commit') or '-')[:10]}")
+    metricas_base = achatar(base['resultados'])
+    metricas_novo = achatar(novo['resultados'])
+    pioras = 0
+    print(f"{'métrica':<42}{'base':>14}{'novo':>14}{'razão':>9}")
+    for nome in sorted(metricas_base.keys() & metricas_novo.keys()):
+        antes, depois = metricas_base[nome], metricas_novo[nome]
+        razao = depois / antes if antes else float('inf') if depois else 1.0
+        maior_melhor = any(marca in nome for marca in MAIOR_MELHOR)
+        piorou = razao < 1 - limiar if maior_melhor else razao > 1 + limiar
+        # Contagens (páginas, consultas) não são medidas de desempenho
+        if not nome.endswith(('.paginas', '.consultas', '.distintas')) and piorou:
+            pioras += 1
+        else:
+            piorou = False
+        print(f"{nome:<42}{antes:>14}{depois:>14}{razao:>9.3f}{'  pior' if piorou else ''}")
+    return pioras
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--paginas", type=int, default=1000,
+                        help="páginas do corpus indexado (de 1 mil a 1 milhão)")
+    parser.add_argument("--paginas-coleta", type=int, default=500,
+                        help="páginas do site local coletado")
+    parser.add_argument("--vocabulario", type=int, default=50000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--etapas", type=lambda texto: texto.split(","),
+                        default=["coleta", "indexacao", "consultas"])
+    parser.add_argument("--modos-coleta", type=lambda texto: texto.split(","),
+                        default=["sincrono", "assincrono"])
+    parser.add_argument("--modos-indexacao", type=lambda texto: texto.split(","),
+                        default=["memoria", "spimi"])
+    parser.add_argument("--memoria-spimi", type=int, default=64,
+                        help="limite de memória de um bloco SPIMI, em MiB")
+    parser.add_argument("--concorrencia", type=int, default=16,
+                        help="requisições simultâneas nos modos 'assincrono' e 'pipeline'")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NOVO"))
+    parser.add_argument("--limiar", type=float, default=0.1,
+                        help="variação relativa a partir da qual uma métrica é considerada pior")
+    args = parser.parse_args()
+
+    if args.comparar:
+        sys.exit(1 if comparar(*args.comparar, args.limiar) else 0)
+
+    execucao = metadados(args)
+    execucao['resultados'] = executar(args)
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump(execucao, arquivo, indent=4, ensure_ascii=False)
+        print(f"resultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()